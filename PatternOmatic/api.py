@@ -18,76 +18,647 @@ You should have received a copy of the GNU Lesser General Public License
 along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 
 """
+import asyncio
 import time
 import pkg_resources
-from typing import List, Union, Tuple, Any
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from random import Random
+from threading import Event
+from typing import List, Union, Tuple, Any, Dict, Optional, Callable, NamedTuple, Generator
 from spacy import load as spacy_load
 from spacy.cli import download as spacy_download
+from spacy.language import Language
 
-from PatternOmatic.ge.population import Population
+from PatternOmatic.ge.checkpoint import get_checkpoint
+from PatternOmatic.ge.population import Population, Progress, spawn_generators
 from PatternOmatic.ge.stats import Stats
-from PatternOmatic.settings.config import Config
-from PatternOmatic.settings.log import LOG
+from PatternOmatic.settings.config import Config, FrozenConfig
+from PatternOmatic.settings.log import LOG, configure as configure_log
 from PatternOmatic.nlp.bnf import dynamic_generator as dgg
+from PatternOmatic.nlp.samples import SampleSet
+
+DEFAULT_LANGUAGE_MODEL = 'en_core_web_sm'
+
+# Maximum number of Doc instances kept per workspace
+DOC_CACHE_SIZE = 10000
+
+
+class GroupResult(NamedTuple):
+    """ Patterns found for a group of samples of a batch, along with their scores and the group execution stats """
+    patterns: Tuple[Any, ...]
+    fitnesses: Tuple[float, ...]
+    coverages: Tuple[int, ...]
+    stats: Stats
 
 
 def find_patterns(
         samples: List[str],
         configuration: Union[str, None] = None,
-        spacy_language_model_name: Union[str, None] = None) -> List[Tuple[Any, ...]]:
+        spacy_language_model_name: Union[str, None] = None,
+        with_coverage: bool = False,
+        resume: bool = False) -> List[Tuple[Any, ...]]:
     """
     Given some samples, this function finds optimized patterns to be used by the Spacy's Rule Based Matcher.
     Args:
         samples: List of strings from where to find common linguistic patterns
         configuration: (str) Optional configuration file path to to be loaded (Fallbacks to default configuration)
         spacy_language_model_name: (str) Optional valid Spacy Language Model (Fallbacks to Spacy's en_core_web_sm)
+        with_coverage: (bool) Whether to return the bitmap of the samples covered by each pattern as well
+        resume: (bool) Whether to resume the execution from its checkpoint, if any, instead of starting over
+
+    Returns: List of the best distinct patterns found across all runs (up to the hall of fame size, best first) and
+    list of each pattern matching score against the samples, followed by the list of each pattern coverage bitmap
+    (bit i set if the i-th sample is covered) if requested
+
+    """
+    return Session(spacy_language_model_name, configuration).find(samples, with_coverage=with_coverage, resume=resume)
+
+
+def find_patterns_iter(
+        samples: List[str],
+        configuration: Union[str, None] = None,
+        spacy_language_model_name: Union[str, None] = None) -> Generator[Progress, None, List[Tuple[Any, ...]]]:
+    """
+    Anytime counterpart of find_patterns, yields a snapshot of the search after every generation carrying the best
+    pattern found so far, so consumers can stop early and use it right away
+    Args:
+        samples: List of strings from where to find common linguistic patterns
+        configuration: (str) Optional configuration file path to to be loaded (Fallbacks to default configuration)
+        spacy_language_model_name: (str) Optional valid Spacy Language Model (Fallbacks to Spacy's en_core_web_sm)
+
+    Returns: Generator of Progress instances, returning what find_patterns does once exhausted
+
+    """
+    return (yield from Session(spacy_language_model_name, configuration).find_iter(samples))
+
+
+class Session(object):
+    """
+    Long lived PatternOmatic's session. Holds a loaded Spacy Language Model, a Doc cache, a grammar cache and an
+    optional worker pool, so repeated pattern searches just pay for the evolution
+    """
+    __slots__ = ('model_name', 'config', 'workers', '_workspace', '_pool', '_executor')
+
+    def __init__(
+            self,
+            spacy_language_model_name: Union[str, None] = None,
+            configuration: Union[str, FrozenConfig, None] = None,
+            workers: int = 1):
+        """
+        Session constructor, sets up the configuration and the log after it, then loads the language model
+        Args:
+            spacy_language_model_name: (str) Optional valid Spacy Language Model (Fallbacks to Spacy's en_core_web_sm)
+            configuration: Optional configuration file path to to be loaded or FrozenConfig instance to be used
+            (Fallbacks to the Config Singleton)
+            workers: (int) Number of worker processes to evolve runs with, 1 evolves them in this process
+        """
+        if isinstance(configuration, FrozenConfig):
+            self.config = configuration
+        elif isinstance(configuration, str):
+            LOG.info(f'Setting up configuration from the following path: {configuration}...')
+            self.config = Config(config_file_path=configuration).freeze()
+        else:
+            config = Config()
+            LOG.info(f'Existing Config instance found: {config}')
+            self.config = config.freeze()
+
+        # Sessions are the entry point of executions, parsing a configuration alone leaves the log untouched
+        configure_log(self.config.log_level, self.config.log_file)
+
+        self.model_name, nlp = _load_language_model(spacy_language_model_name)
+        self._workspace = _Workspace(nlp)
+        self.workers = workers
+        self._pool = None
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def nlp(self) -> Language:
+        """ Loaded Spacy Language Model """
+        return self._workspace.nlp
+
+    def find(
+            self,
+            samples: List[str],
+            config_overrides: Optional[Dict[str, Any]] = None,
+            with_coverage: bool = False,
+            resume: bool = False,
+            stop: Optional[Event] = None) -> Optional[List[Tuple[Any, ...]]]:
+        """
+        Given some samples, finds optimized patterns to be used by the Spacy's Rule Based Matcher.
+        Args:
+            samples: List of strings from where to find common linguistic patterns
+            config_overrides: Optional dict of configuration parameters (Config attribute names) to be used just
+            for this search
+            with_coverage: (bool) Whether to return the bitmap of the samples covered by each pattern as well
+            resume: (bool) Whether to resume the execution from its checkpoint, if any, instead of starting over
+            stop: Optional event, set (e.g. from another thread) to cancel the search between generations
+
+        Returns: List of patterns found and list of each pattern matching score against the samples, followed by the
+        list of each pattern coverage bitmap if requested. None if the search was cancelled before finishing
+
+        """
+        return self._find(samples, self.config.replace(**(config_overrides or {})), stop=stop,
+                          with_coverage=with_coverage, resume=resume)
+
+    def find_iter(
+            self,
+            samples: List[str],
+            config_overrides: Optional[Dict[str, Any]] = None,
+            with_coverage: bool = False) -> Generator[Progress, None, List[Tuple[Any, ...]]]:
+        """
+        Anytime variant of find, evolving the runs within this process one generation at a time. Every snapshot carries
+        the best pattern found so far by the whole execution. Closing the generator early stops the search, leaving
+        its statistics unreported
+        Args:
+            samples: List of strings from where to find common linguistic patterns
+            config_overrides: Optional dict of configuration parameters (Config attribute names) to be used just
+            for this search
+            with_coverage: (bool) Whether to return the bitmap of the samples covered by each pattern as well
+
+        Returns: Generator of Progress instances, returning what find does once exhausted
+
+        """
+        config = self.config.replace(**(config_overrides or {}))
+
+        LOG.info(f'Building Doc instances...')
+        docs = self._workspace.samples(samples)
+
+        stats = Stats(config)
+
+        bnf_g = self._workspace.grammar(docs, config)
+
+        LOG.info('Starting Execution...')
+        best = None
+        for run, rng in enumerate(spawn_generators(config.random_seed, config.max_runs)):
+            start = time.monotonic()
+            p = Population(docs, bnf_g, stats, config, rng)
+
+            for snapshot in p.evolve_iter():
+                if best is None or snapshot.best_fitness > best.best_fitness:
+                    best = snapshot
+                yield snapshot._replace(run=run, best_fenotype=best.best_fenotype, best_fitness=best.best_fitness)
+
+            stats.add_time(time.monotonic() - start)
+            stats.calculate_metrics()
+
+        return _conclude(stats, with_coverage, docs)
+
+    def find_async(
+            self,
+            samples: List[str],
+            config_overrides: Optional[Dict[str, Any]] = None,
+            with_coverage: bool = False) -> 'SearchJob':
+        """
+        Asynchronous variant of find, to be called from a running event loop. The search is evolved by a background
+        thread of this session, searches submitted to the same session are evolved one after another
+        Args:
+            samples: List of strings from where to find common linguistic patterns
+            config_overrides: Optional dict of configuration parameters (Config attribute names) to be used just
+            for this search
+            with_coverage: (bool) Whether to return the bitmap of the samples covered by each pattern as well
+
+        Returns: SearchJob instance, iterate it asynchronously to get the search progress and await it for its results
+
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+
+        return SearchJob(self._executor, partial(self._find, with_coverage=with_coverage), samples,
+                         self.config.replace(**(config_overrides or {})))
+
+    def close(self) -> None:
+        """ Shuts the worker pool and the background thread down, if any """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _find(
+            self,
+            samples: List[str],
+            config: FrozenConfig,
+            progress: Optional[Callable[[Progress], None]] = None,
+            stop: Optional[Event] = None,
+            with_coverage: bool = False,
+            resume: bool = False) -> List[Tuple[Any, ...]]:
+        """
+        Evolves the configured number of runs over the given samples. If a checkpoint path is configured, the
+        execution is checkpointed every checkpoint interval generations and once per run, the checkpoint being removed
+        when the execution is over
+        Args:
+            samples: List of strings from where to find common linguistic patterns
+            config: Configuration of this execution
+            progress: Optional callable, invoked with a Progress instance after every generation of the runs evolved
+            within this process
+            stop: Optional event, set to cancel the execution between generations (or between runs, for the ones
+            evolved by the worker pool)
+            with_coverage: (bool) Whether to return the bitmap of the samples covered by each pattern as well
+            resume: (bool) Whether to resume the execution from its checkpoint, if any. Runs evolved by the worker
+            pool are resumed from the last run they completed
+
+        Returns: List of patterns found and list of each pattern matching score against the samples, None if the
+        execution was cancelled
+
+        """
+        LOG.info(f'Building Doc instances...')
+        docs = self._workspace.samples(samples)
+
+        stats = Stats(config)
+
+        bnf_g = self._workspace.grammar(docs, config)
+
+        LOG.info('Starting Execution...')
+        rngs = spawn_generators(config.random_seed, config.max_runs)
+
+        checkpoint = get_checkpoint(docs, config)
+        resumed = checkpoint.load() if checkpoint is not None and resume is True else None
+        first_run = 0 if resumed is None else resumed.run
+        if resumed is not None:
+            stats = resumed.stats
+
+        if self.workers > 1:
+            futures = [self._worker_pool().submit(_evolve_in_worker, samples, config, rng) for rng in rngs[first_run:]]
+            for run, future in enumerate(futures, first_run):
+                if stop is not None and stop.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    LOG.info('Execution cancelled')
+                    return None
+                stats.merge(future.result())
+                if checkpoint is not None:
+                    checkpoint.save(stats, run + 1)
+        else:
+            for run in range(first_run, config.max_runs):
+                run_progress = None if progress is None else partial(_report_run_progress, progress, run)
+                run_checkpoint = None if checkpoint is None else partial(checkpoint.save, stats, run)
+                state = resumed.population if resumed is not None and run == first_run else None
+                if _evolve(docs, bnf_g, stats, config, run_progress, stop, rngs[run], run_checkpoint, state) is False:
+                    LOG.info('Execution cancelled')
+                    return None
+                if checkpoint is not None:
+                    checkpoint.save(stats, run + 1)
+
+        if checkpoint is not None:
+            checkpoint.remove()
+
+        return _conclude(stats, with_coverage, docs)
+
+    def find_batch(
+            self,
+            groups: Dict[str, List[str]],
+            config_overrides: Optional[Dict[str, Any]] = None) -> Dict[str, GroupResult]:
+        """
+        Finds optimized patterns for several groups of samples at once (e.g. one group per intent). Texts of every
+        group are parsed in a single pipe pass and the runs of all groups are scheduled round robin, so every group
+        progresses at the same pace over the session worker pool
+        Args:
+            groups: Dict of lists of strings from where to find common linguistic patterns, keyed by group label
+            config_overrides: Optional dict of configuration parameters (Config attribute names) to be used just
+            for this batch
+
+        Returns: Dict of GroupResult instances keyed by group label
+
+        """
+        config = self.config.replace(**(config_overrides or {}))
+
+        LOG.info(f'Building Doc instances...')
+        self._workspace.samples([text for texts in groups.values() for text in texts])
+        docs = {label: self._workspace.samples(texts) for label, texts in groups.items()}
+
+        stats = {label: Stats(config) for label in groups}
+        grammars = {label: self._workspace.grammar(docs[label], config) for label in groups}
+
+        LOG.info('Starting Execution...')
+        rngs = {label: spawn_generators(config.random_seed, config.max_runs) for label in groups}
+        schedule = [(label, rngs[label][run]) for run in range(config.max_runs) for label in groups]
+
+        if self.workers > 1:
+            futures = [(label, self._worker_pool().submit(_evolve_in_worker, groups[label], config, rng))
+                       for label, rng in schedule]
+            for label, future in futures:
+                stats[label].merge(future.result())
+        else:
+            for label, rng in schedule:
+                _evolve(docs[label], grammars[label], stats[label], config, rng=rng)
+
+        results = dict()
+        for label in groups:
+            LOG.info(f'Results for group {label}')
+            patterns_found = _conclude(stats[label], with_coverage=True, samples=docs[label])
+            patterns, fitnesses, coverages = patterns_found if len(patterns_found) > 0 else ((), (), ())
+            results[label] = GroupResult(patterns, fitnesses, coverages, stats[label])
+
+        return results
+
+    def _worker_pool(self) -> ProcessPoolExecutor:
+        """
+        Lazily starts the worker pool, each worker loading its own copy of the language model
+        Returns: ProcessPoolExecutor
+
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.model_name,))
+        return self._pool
 
-    Returns: List of patterns found and list of each pattern matching score against the samples
+
+class SearchJob(object):
+    """
+    Pattern search evolved in background. Asynchronously iterable, yielding a Progress instance per evolved
+    generation, and awaitable, returning the patterns found. Cancelling the task awaiting it, or calling its cancel
+    method, stops the evolution between generations
+    """
+    __slots__ = ('_loop', '_queue', '_stop', '_future')
+
+    def __init__(self, executor: ThreadPoolExecutor, find: Callable, samples: List[str], config: FrozenConfig):
+        """
+        SearchJob constructor, submits the search to the executor
+        Args:
+            executor: Executor evolving the search
+            find: Session's find implementation
+            samples: List of strings from where to find common linguistic patterns
+            config: Configuration of the search
+        """
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._stop = Event()
+        self._future = self._loop.run_in_executor(executor, find, samples, config, self._report, self._stop)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Progress:
+        while self._queue.empty():
+            if self._future.done():
+                raise StopAsyncIteration
+
+            getter = asyncio.ensure_future(self._queue.get())
+            try:
+                await asyncio.wait({getter, self._future}, return_when=asyncio.FIRST_COMPLETED)
+            except asyncio.CancelledError:
+                getter.cancel()
+                self.cancel()
+                raise
+
+            if getter.done():
+                return getter.result()
+            getter.cancel()
+
+        return self._queue.get_nowait()
+
+    def __await__(self):
+        return self._result().__await__()
+
+    def cancel(self) -> None:
+        """ Requests the search to stop, it will do so once its current generation is evolved """
+        self._stop.set()
+
+    async def _result(self) -> List[Tuple[Any, ...]]:
+        """
+        Waits for the search to finish
+        Raises: CancelledError if the search was cancelled before finishing
+        Returns: List of patterns found and list of each pattern matching score against the samples
+
+        """
+        try:
+            result = await asyncio.shield(self._future)
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+
+        # Searches cancelled once finished keep their result
+        if result is None:
+            raise asyncio.CancelledError
+
+        return result
+
+    def _report(self, progress: Progress) -> None:
+        """ Hands a Progress instance from the background thread over to the event loop """
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, progress)
+
+
+class _Workspace(object):
+    """ Loaded Spacy Language Model along with the Doc instances and grammars built with it """
+    __slots__ = ('nlp', 'docs', 'grammars')
+
+    def __init__(self, nlp: Language):
+        self.nlp = nlp
+        self.docs = dict()
+        self.grammars = dict()
+
+    def samples(self, texts: List[str]) -> SampleSet:
+        """
+        Builds the Doc instances of the given texts, parsing just the ones not seen before in a single pipe pass
+        Args:
+            texts: List of strings
+
+        Returns: SampleSet of the unique Spacy Doc objects, weighted by the number of texts they stand for
+
+        """
+        uncached = [text for text in dict.fromkeys(texts) if text not in self.docs]
+
+        # Grammars are bound to the Doc instances they were built with, so both caches are flushed together
+        if len(uncached) > 0 and len(self.docs) + len(uncached) > DOC_CACHE_SIZE:
+            self.docs.clear()
+            self.grammars.clear()
+            uncached = list(dict.fromkeys(texts))
+
+        for text, doc in zip(uncached, self.nlp.pipe(uncached)):
+            self.docs[text] = doc
+
+        samples = SampleSet.deduplicated(self.docs[text] for text in texts)
+        if len(samples) < samples.size:
+            LOG.info(f'{samples.size - len(samples)} duplicated samples collapsed, {len(samples)} unique samples left')
+
+        return samples
+
+    def grammar(self, samples: SampleSet, config: FrozenConfig) -> dict:
+        """
+        Generates the grammar of the given samples unless already generated for the same samples and configuration
+        Args:
+            samples: SampleSet of Spacy Doc objects
+            config: Configuration of the execution
+
+        Returns: Backus Naur Form grammar notation encoded in a dictionary
+
+        """
+        key = (tuple(sample.text for sample in samples),
+               tuple(samples.weights),
+               tuple(tuple(origins) for origins in samples.origins),
+               config.codon_length,
+               config.features_per_token,
+               config.use_boolean_features,
+               config.use_custom_attributes,
+               config.use_uniques,
+               config.use_grammar_operators,
+               config.use_token_wildcard,
+               config.use_extended_pattern_syntax,
+               config.weight_pattern_lengths,
+               config.fitness_function_type)
+
+        if key not in self.grammars:
+            self.grammars[key] = (dgg(samples, config), samples.feature_index)
+        else:
+            LOG.info('Reusing previously generated BNF')
+
+        grammar, samples.feature_index = self.grammars[key]
+        return grammar
+
+
+#
+# Execution helpers
+#
+def _load_language_model(spacy_language_model_name: Union[str, None]) -> Tuple[str, Language]:
+    """
+    Loads the given Spacy Language Model, installing and falling back to PatternOmatic's default one if needed
+    Args:
+        spacy_language_model_name: (str) Optional valid Spacy Language Model
+
+    Returns: The name of the loaded language model and the language model itself
 
     """
     LOG.info(f'Loading language model {spacy_language_model_name}...')
     if 'en-core-web-sm' not in [d.project_name for d in pkg_resources.working_set]:
         LOG.info(f'PatternOmatic\'s default spaCy\'s Language Model not installed,'
                  f' proceeding to install en_core_web_sm, please wait...')
-        spacy_download('en_core_web_sm')
+        spacy_download(DEFAULT_LANGUAGE_MODEL)
 
     try:
-        nlp = spacy_load(spacy_language_model_name)
+        return spacy_language_model_name, spacy_load(spacy_language_model_name)
     except OSError:
         LOG.warning(f'Model {spacy_language_model_name} not found, '
                     f'falling back to patternOmatic\'s default language model: en_core_web_sm')
 
-        nlp = spacy_load('en_core_web_sm')
+        return DEFAULT_LANGUAGE_MODEL, spacy_load(DEFAULT_LANGUAGE_MODEL)
 
-    LOG.info(f'Building Doc instances...')
-    samples = [nlp(sample) for sample in samples]
 
-    if isinstance(configuration, str):
-        LOG.info(f'Setting up configuration from the following path: {configuration}...')
-        config = Config(config_file_path=configuration)
-    else:
-        config = Config()
-        LOG.info(f'Existing Config instance found: {config}')
+def _evolve(
+        samples: SampleSet,
+        grammar: dict,
+        stats: Stats,
+        config: FrozenConfig,
+        progress: Optional[Callable[[Progress], None]] = None,
+        stop: Optional[Event] = None,
+        rng: Optional[Random] = None,
+        checkpoint: Optional[Callable[[Population], None]] = None,
+        state: Optional[dict] = None) -> bool:
+    """
+    Evolves a single run, updating the given Stats instance
+    Args:
+        samples: SampleSet of Spacy Doc objects
+        grammar: Backus Naur Form grammar notation encoded in a dictionary
+        stats: Stats instance of the execution
+        config: Configuration of the execution
+        progress: Optional callable, invoked with a Progress instance after every generation
+        stop: Optional event, checked between generations to stop the run
+        rng: Optional random number generator of the run
+        checkpoint: Optional callable, invoked with the population every checkpoint interval generations
+        state: Optional checkpointed state of the run, to be resumed
 
-    stats = Stats()
+    Returns: False if the run was stopped, else True
 
-    bnf_g = dgg(samples)
+    """
+    start = time.monotonic()
+    p = Population(samples, grammar, stats, config, rng, checkpoint)
+    if state is not None:
+        p.restore(state)
+    if p.evolve(progress, stop) is False:
+        return False
+    end = time.monotonic()
+    stats.add_time(end - start)
+    stats.calculate_metrics()
+    return True
 
-    LOG.info('Starting Execution...')
-    for _ in range(0, config.max_runs):
-        start = time.monotonic()
-        p = Population(samples, bnf_g, stats)
-        p.evolve()
-        end = time.monotonic()
-        stats.add_time(end - start)
-        stats.calculate_metrics()
 
+def _conclude(
+        stats: Stats,
+        with_coverage: bool = False,
+        samples: Optional[SampleSet] = None) -> List[Tuple[Any, ...]]:
+    """
+    Reports and persists the stats of an execution
+    Args:
+        stats: Stats instance of the execution
+        with_coverage: (bool) Whether to return the bitmap of the samples covered by each pattern as well
+        samples: SampleSet the execution was evolved with, mapping coverage bitmaps back to the samples given
+
+    Returns: List of the patterns of the hall of fame, best first, and list of each pattern matching score against the
+    samples, followed by the list of each pattern coverage bitmap if requested
+
+    """
     LOG.info(f'Execution report {stats}')
     stats.persist()
 
     LOG.info(f'Best individuals for this execution:')
-    stats.most_fitted_accumulator.sort(key=lambda i: i.fitness_value, reverse=True)
-    for individual in stats.most_fitted_accumulator:
+    hall_of_fame = list(stats.hall_of_fame)
+    for individual in hall_of_fame:
         LOG.info(f'{individual}')
 
-    return list(zip(*[[i.fenotype, i.fitness_value] for i in stats.most_fitted_accumulator]))
+    if with_coverage is True:
+        return list(zip(*[[i.fenotype, i.fitness_value,
+                           i.coverage if samples is None else samples.expand_coverage(i.coverage)]
+                          for i in hall_of_fame]))
+
+    return list(zip(*[[i.fenotype, i.fitness_value] for i in hall_of_fame]))
+
+
+def _report_run_progress(progress: Callable[[Progress], None], run: int, snapshot: Progress) -> None:
+    """
+    Reports the progress of a run, stamped with the run number
+    Args:
+        progress: Callable receiving Progress instances
+        run: Run number
+        snapshot: Progress instance reported by the run's population
+
+    Returns: None
+
+    """
+    progress(snapshot._replace(run=run))
+
+
+#
+# Worker processes
+#
+_WORKSPACE: Optional[_Workspace] = None
+
+
+def _init_worker(spacy_language_model_name: str) -> None:
+    """
+    Worker process initializer, loads the language model once per worker
+    Args:
+        spacy_language_model_name: (str) Name of the language model loaded by the session
+
+    Returns: None
+
+    """
+    global _WORKSPACE
+    _WORKSPACE = _Workspace(spacy_load(spacy_language_model_name))
+
+
+def _evolve_in_worker(texts: List[str], config: FrozenConfig, rng: Optional[Random] = None) -> Stats:
+    """
+    Evolves a single run within a worker process
+    Args:
+        texts: List of strings from where to find common linguistic patterns
+        config: Configuration of the execution
+        rng: Optional random number generator of the run
+
+    Returns: Stats instance of the run
+
+    """
+    samples = _WORKSPACE.samples(texts)
+    grammar = _WORKSPACE.grammar(samples, config)
+
+    stats = Stats(config)
+    _evolve(samples, grammar, stats, config, rng=rng)
+    return stats
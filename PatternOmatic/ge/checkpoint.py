@@ -0,0 +1,144 @@
+""" Execution checkpoints module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import NamedTuple, Optional
+
+from PatternOmatic.ge.stats import Stats
+from PatternOmatic.settings.config import FrozenConfig
+from PatternOmatic.settings.log import LOG
+
+
+class ExecutionState(NamedTuple):
+    """ State of an execution as last checkpointed """
+    run: int
+    stats: Stats
+    population: Optional[dict]
+
+
+class Checkpoint(object):
+    """
+    Binary file holding the state of an execution: the runs already evolved, the execution statistics and, if a run
+    was being evolved, the state of its population. Checkpoints are keyed by the samples and configuration of their
+    execution, so a checkpoint is never resumed by a different execution. Writes are atomic, a new checkpoint is
+    written aside and then renamed over the previous one
+    """
+    __slots__ = ('path', 'key')
+
+    def __init__(self, path: str, key: str):
+        """
+        Checkpoint constructor
+        Args:
+            path: OS path of the checkpoint file
+            key: Key of the execution checkpointed
+        """
+        self.path = path
+        self.key = key
+
+    @staticmethod
+    def key_of(samples: list, config: FrozenConfig) -> str:
+        """
+        Builds the key of an execution
+        Args:
+            samples: SampleSet of Spacy Doc objects
+            config: Configuration of the execution
+
+        Returns: Hexadecimal digest of the samples and the configuration
+
+        """
+        sha = hashlib.sha256(repr(sorted(config.__dict__.items())).encode('utf-8'))
+        sha.update(getattr(samples, 'digest', '').encode('utf-8'))
+        return sha.hexdigest()
+
+    def load(self) -> Optional[ExecutionState]:
+        """
+        Loads the execution state checkpointed
+        Returns: ExecutionState instance, None if there is no checkpoint of this execution
+
+        """
+        try:
+            with open(self.path, mode='rb') as f:
+                checkpoint = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError) as ex:
+            LOG.warning(f'Checkpoint {self.path} could not be read ({repr(ex)}), starting from scratch')
+            return None
+
+        if checkpoint.get('key') != self.key:
+            LOG.warning(f'Checkpoint {self.path} belongs to another execution, starting from scratch')
+            return None
+
+        LOG.info(f'Resuming execution from run {checkpoint["run"]} of checkpoint {self.path}')
+        return ExecutionState(checkpoint['run'], checkpoint['stats'], checkpoint['population'])
+
+    def save(self, stats: Stats, run: int, population=None) -> None:
+        """
+        Checkpoints the execution state
+        Args:
+            stats: Stats instance of the execution
+            run: Number of runs already evolved
+            population: Optional Population instance of the run being evolved
+
+        Returns: None
+
+        """
+        checkpoint = {'key': self.key, 'run': run, 'stats': stats,
+                      'population': None if population is None else population.state()}
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix='.checkpoint-')
+        try:
+            with os.fdopen(descriptor, mode='wb') as f:
+                pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+        LOG.debug('Checkpoint %s saved', self.path)
+
+    def remove(self) -> None:
+        """ Removes the checkpoint, once its execution is over """
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def get_checkpoint(samples: list, config: FrozenConfig) -> Optional[Checkpoint]:
+    """
+    Gets the checkpoint of an execution set up at the given configuration
+    Args:
+        samples: SampleSet of Spacy Doc objects
+        config: Configuration of the execution
+
+    Returns: Checkpoint instance, None if no checkpoint path is configured
+
+    """
+    if not config.checkpoint_path:
+        return None
+
+    return Checkpoint(config.checkpoint_path, Checkpoint.key_of(samples, config))
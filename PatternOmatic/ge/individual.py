@@ -20,31 +20,97 @@ along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 """
 import re
 import json
+from logging import DEBUG
+from math import sqrt
+from typing import List, Optional, Tuple
 
-from random import random
+import random
+from random import Random
 from itertools import cycle
 from spacy.tokens import Doc
 from spacy.matcher import Matcher
 
 from PatternOmatic.ge.stats import Stats
-from PatternOmatic.settings.config import Config
+from PatternOmatic.ge.store import FitnessStore, get_fitness_store
+from PatternOmatic.nlp import numba_engine, regex_engine, trie_engine
+from PatternOmatic.nlp.samples import SampleSet, covered_samples
+from PatternOmatic.settings.config import Config, FrozenConfig
 from PatternOmatic.settings.log import LOG
-from PatternOmatic.settings.literals import FitnessType, S, T, XPS, TOKEN_WILDCARD, UNDERSCORE, P, F, EF, IN, NOT_IN, \
-    SLD, SRD, GTH, LTH, GEQ, LEQ, EQQ, XPS_AS
+from PatternOmatic.settings.literals import FitnessType, FitnessEngine, S, T, XPS, TOKEN_WILDCARD, UNDERSCORE, P, F, \
+    EF, IN, NOT_IN, SLD, SRD, GTH, LTH, GEQ, LEQ, EQQ, XPS_AS, MUTATION_PHASE, TRANSCRIPTION_PHASE, TRANSLATION_PHASE, \
+    FITNESS_PHASE
 
 
 class Fitness(object):
     """ Dispatches the proper fitness type for individual instances """
-    __slots__ = ('_fitness', 'config', 'samples', 'fenotype')
+    __slots__ = ('_fitness', '_engine', 'config', 'samples', 'fenotype', 'rejected', 'cached', 'coverage')
 
     def __init__(self, config, samples, fenotype):
         self.config = config
         self.samples = samples
         self.fenotype = fenotype
+        self.rejected = False
+        self.cached = False
+        self.coverage = 0
         self._dispatch_fitness(self.config.fitness_function_type)
+        self._dispatch_engine(self.config.fitness_engine)
 
     def __call__(self, *args, **kwargs) -> float:
-        return self._fitness()
+        if self._is_impossible():
+            self.rejected = True
+            return self._wildcard_penalty(0.0)
+
+        store = get_fitness_store(self.config)
+        digest = getattr(self.samples, 'digest', None)
+
+        if store is None or digest is None:
+            return self._wildcard_penalty(self._contact())
+
+        key = FitnessStore.key(digest, self.config.fitness_function_type.value, self.fenotype)
+        stored = store.get(key)
+
+        if stored is not None:
+            LOG.debug('Fitness found at the fitness store!')
+            contact, self.coverage = stored
+            self.cached = True
+        else:
+            contact = self._contact()
+            store.put(key, contact, self.coverage)
+
+        return self._wildcard_penalty(contact)
+
+    def estimate(self) -> Tuple[float, float, float]:
+        """
+        Scores the fenotype against the samples (usually a random subset of the execution ones), bounding the share
+        of samples it would cover with the Wilson score interval at the configured confidence
+        Returns: Estimated fitness value along with the lower and upper bounds of its interval, after the wildcard
+        penalty
+
+        """
+        contact = self._contact()
+        n = len(self.samples)
+        z = self.config.racing_confidence
+
+        centre = contact + z * z / (2 * n)
+        margin = z * sqrt(max(0.0, contact * (1 - contact)) / n + z * z / (4 * n * n))
+        lower, upper = (centre - margin) / (1 + z * z / n), (centre + margin) / (1 + z * z / n)
+
+        return self._wildcard_penalty(contact), self._wildcard_penalty(lower), self._wildcard_penalty(upper)
+
+    @staticmethod
+    def prepare(config, samples, fenotypes: List[List[dict]]) -> None:
+        """
+        Lets the configured engine score a whole batch of fenotypes at once, ahead of their Fitness instances
+        Args:
+            config: Configuration of the execution
+            samples: SampleSet of Spacy Doc objects
+            fenotypes: Spacy's Rule Based Matcher patterns about to be scored
+
+        Returns: None
+
+        """
+        if config.fitness_engine == FitnessEngine.TRIE:
+            trie_engine.evaluate(fenotypes, samples, config.fitness_function_type == FitnessType.FULL_MATCH)
 
     def _dispatch_fitness(self, fitness_function_type: FitnessType) -> None:
         """
@@ -60,46 +126,104 @@ class Fitness(object):
         else:
             self._fitness = self._fitness_basic
 
+    def _dispatch_engine(self, fitness_engine: FitnessEngine) -> None:
+        """
+        Sets the engine matching the fenotype against the samples, other than the Spacy's Matcher
+        Args:
+            fitness_engine: The fitness engine to be used
+
+        Returns: None
+
+        """
+        if fitness_engine == FitnessEngine.NUMBA:
+            self._engine = numba_engine.coverage
+        elif fitness_engine == FitnessEngine.REGEX:
+            self._engine = regex_engine.coverage
+        elif fitness_engine == FitnessEngine.TRIE:
+            self._engine = trie_engine.coverage
+        else:
+            self._engine = None
+
+    def _contact(self) -> float:
+        """
+        Scores the fenotype with the configured engine, falling back to the Spacy's Matcher for the fenotypes the engine
+        can not handle
+        Returns: Float (fitness value, before the wildcard penalty)
+
+        """
+        if self._engine is not None:
+            full_match = self.config.fitness_function_type == FitnessType.FULL_MATCH
+            coverage = self._engine(self.fenotype, self.samples, full_match)
+
+            if coverage is not None:
+                self.coverage = coverage
+                return self._score()
+
+        return self._fitness()
+
+    def _score(self) -> float:
+        """
+        Scores the covered samples, each one adding its share of the score as many times as samples it stands for
+        Returns: Float (fitness value, before the wildcard penalty)
+
+        """
+        weights = getattr(self.samples, 'weights', None) or [1] * len(self.samples)
+
+        # Dividing the covered weight once, collapsed samples score exactly the same as the samples they stand for. The
+        # coverage bitmap is walked once, shifting it per sample would take quadratic time
+        covered = sum(weights[index] for index in covered_samples(self.coverage))
+        return covered / sum(weights)
+
+    def _is_impossible(self) -> bool:
+        """
+        Checks against the samples feature co-occurrence index, if any, whether the fenotype can not match any sample
+        Returns: True if the fenotype is guaranteed to score no contact at all, False otherwise
+
+        """
+        feature_index = getattr(self.samples, 'feature_index', None)
+
+        if feature_index is None:
+            return False
+
+        full_match = self.config.fitness_function_type == FitnessType.FULL_MATCH
+        return not feature_index.is_feasible(self.fenotype, full_match)
+
     def _fitness_basic(self) -> float:
         """
         Sets the fitness value for an individual. If makes a partial match over a sample, a score is added
         for that sample even if the matches are only a portion of the sample's length
-        Returns: Float (fitness value)
+        Returns: Float (fitness value, before the wildcard penalty)
 
         """
-        max_score_per_sample = 1 / len(self.samples)
         matcher = Matcher(self.samples[0].vocab)
         matcher.add(repr(FitnessType.BASIC), None, self.fenotype)
-        contact = 0.0
 
-        for sample in self.samples:
+        for index, sample in enumerate(self.samples):
             matches = matcher(sample)
             if len(matches) > 0:
-                contact += max_score_per_sample
+                self.coverage |= 1 << index
 
-        return self._wildcard_penalty(contact)
+        return self._score()
 
     def _fitness_full_match(self) -> float:
         """
         Sets the fitness value for an individual. It only gives a partial score if any of the matches equals the full
         length of the sample
-        Returns: Float
+        Returns: Float (fitness value, before the wildcard penalty)
 
         """
-        max_score_per_sample = 1 / len(self.samples)
-
         current_vocab = self.samples[0].vocab
 
         matcher = Matcher(current_vocab)
         matcher.add(repr(FitnessType.FULL_MATCH), None, self.fenotype)
-        contact = 0.0
 
-        for sample in self.samples:
+        for index, sample in enumerate(self.samples):
             matches = matcher(sample)
             if len(matches) > 0:
                 for match in matches:
-                    contact += max_score_per_sample if match[2] == len(sample) and match[1] == 0 else + 0
-        return self._wildcard_penalty(contact)
+                    if match[2] == len(sample) and match[1] == 0:
+                        self.coverage |= 1 << index
+        return self._score()
 
     def _wildcard_penalty(self, contact: float) -> float:
         """
@@ -112,20 +236,27 @@ class Fitness(object):
         """
         if self.config.use_token_wildcard:
             num_tokens = len(self.fenotype)
-            for item in self.fenotype:
-                if item == {}:
-                    LOG.debug('Applying token wildcard penalty!')
-                    penalty = 1/num_tokens
-                    contact -= penalty
+            wildcards = self.fenotype.count({})
+            if wildcards > 0 and LOG.isEnabledFor(DEBUG):
+                LOG.debug('Applying token wildcard penalty to %d tokens!', wildcards)
+            for _ in range(wildcards):
+                penalty = 1/num_tokens
+                contact -= penalty
 
         return contact
 
 
 class Individual(object):
-    """ Individual implementation of an AI Grammatical Evolution algorithm in OOP fashion """
-    __slots__ = ('config', 'samples', 'grammar', 'stats', 'bin_genotype', 'int_genotype', 'fenotype', 'fitness_value')
-
-    def __init__(self, samples: [Doc], grammar: dict, stats: Stats, dna: str = None):
+    """
+    Individual implementation of an AI Grammatical Evolution algorithm in OOP fashion. Lazy individuals just hold their
+    binary genotype, their fenotype and fitness value being worked out on first access, or for a whole batch at once
+    by evaluate_batch
+    """
+    __slots__ = ('config', 'samples', 'grammar', 'stats', 'rng', 'bin_genotype', '_int_genotype', '_fenotype',
+                 '_fenotype_key', '_fitness_value', 'coverage', 'partial')
+
+    def __init__(self, samples: [Doc], grammar: dict, stats: Stats, dna: str = None, config: FrozenConfig = None,
+                 lazy: bool = False, rng: Random = None):
         """
         Individual constructor, if dna is not supplied, sets up randomly its binary genotype
         Args:
@@ -133,30 +264,255 @@ class Individual(object):
             grammar: Backus Naur Form grammar notation encoded in a dictionary
             stats (Stats): statistics object related with this run
             dna: Optional, binary string representation
+            config: Optional configuration of the execution (Fallbacks to the Config Singleton)
+            lazy: Whether to put off working the fenotype and fitness value out until they are needed
+            rng: Optional random number generator of the run (Fallbacks to the random module)
         """
-        self.config = Config()
+        self.config = Config() if config is None else config
 
         self.samples = samples
         self.grammar = grammar
         self.stats = stats
-        self.bin_genotype = self._initialize() if dna is None else self.mutate(dna, self.config.mutation_probability)
-        self.int_genotype = self._transcription()
-        self.fenotype = self._translation()
-        self.fitness_value = Fitness(self.config, self.samples, self.fenotype).__call__()
+        self.rng = random if rng is None else rng
+        if dna is None:
+            self.bin_genotype = self._initialize()
+        else:
+            with self.stats.phases(MUTATION_PHASE):
+                self.bin_genotype = self.mutate(dna, self.config.mutation_probability, self.rng)
+        self._int_genotype = None
+        self._fenotype = None
+        self._fenotype_key = None
+        self._fitness_value = None
+        self.coverage = 0
+        self.partial = False
+
+        if lazy is False:
+            self.evaluate()
 
-        # Stats concerns
+    @classmethod
+    def restore(cls, samples: [Doc], grammar: dict, stats: Stats, bin_genotype: str, fitness_value: Optional[float],
+                coverage: int, partial: bool, config: FrozenConfig = None, rng: Random = None) -> 'Individual':
+        """
+        Rebuilds an individual from its genotype, as checkpointed or seeded, without mutating it. Individuals with no
+        fitness value are lazy, scored when needed
+        Args:
+            samples: list of Spacy doc objects
+            grammar: Backus Naur Form grammar notation encoded in a dictionary
+            stats (Stats): statistics object related with this run
+            bin_genotype: Binary string representation
+            fitness_value: Fitness value of the individual, None if not evaluated yet
+            coverage: Bitmap of the samples covered by the individual
+            partial: Whether the fitness value is just an estimate
+            config: Optional configuration of the execution (Fallbacks to the Config Singleton)
+            rng: Optional random number generator of the run (Fallbacks to the random module)
+
+        Returns: Individual instance
+
+        """
+        individual = cls.__new__(cls)
+        individual.config = Config() if config is None else config
+        individual.samples = samples
+        individual.grammar = grammar
+        individual.stats = stats
+        individual.rng = random if rng is None else rng
+        individual.bin_genotype = bin_genotype
+        individual._int_genotype = None
+        individual._fenotype = None
+        individual._fenotype_key = None
+        individual._fitness_value = fitness_value
+        individual.coverage = coverage
+        individual.partial = partial
+        return individual
+
+    @property
+    def int_genotype(self) -> [int]:
+        """ Integer representation of the genotype, transcribed on first access """
+        if self._int_genotype is None:
+            with self.stats.phases(TRANSCRIPTION_PHASE):
+                self._int_genotype = self._transcription()
+        return self._int_genotype
+
+    @int_genotype.setter
+    def int_genotype(self, int_genotype: [int]) -> None:
+        self._int_genotype = int_genotype
+
+    @property
+    def fenotype(self) -> List[dict]:
+        """ Spacy's Rule Based Matcher pattern, translated on first access """
+        if self._fenotype is None:
+            with self.stats.phases(TRANSLATION_PHASE):
+                self._fenotype = self._translation()
+        return self._fenotype
+
+    @fenotype.setter
+    def fenotype(self, fenotype: List[dict]) -> None:
+        self._fenotype = fenotype
+        self._fenotype_key = None
+
+    @property
+    def fenotype_key(self) -> str:
+        """ Canonical JSON encoding of the fenotype, telling distinct fenotypes apart, encoded on first access """
+        if getattr(self, '_fenotype_key', None) is None:
+            self._fenotype_key = json.dumps(self.fenotype, sort_keys=True, default=str)
+        return self._fenotype_key
+
+    @property
+    def fitness_value(self) -> float:
+        """ Fitness value, scored on first access """
+        if self._fitness_value is None:
+            self.evaluate()
+        return self._fitness_value
+
+    @fitness_value.setter
+    def fitness_value(self, fitness_value: float) -> None:
+        self._fitness_value = fitness_value
+
+    @property
+    def evaluated(self) -> bool:
+        """ Whether the fitness value has already been worked out """
+        return self._fitness_value is not None
+
+    def evaluate(self) -> None:
+        """ Scores the individual, updating the statistics of its run """
+        self._evaluate()
         self._is_solution()
 
+    def _evaluate(self) -> None:
+        """ Scores the individual, updating the statistics of its run but AES, left to the caller """
+        with self.stats.phases(FITNESS_PHASE):
+            fitness = Fitness(self.config, self.samples, self.fenotype)
+            self.fitness_value = fitness.__call__()
+        self.coverage = fitness.coverage
+        self.partial = False
+
+        # Stats concerns
+        self.stats.sum_full_evaluations(1)
+        if fitness.rejected is True:
+            self.stats.sum_rejected(1)
+        if fitness.cached is True:
+            self.stats.sum_cache_hits(1)
+
+    def keep_estimate(self, estimate: float) -> None:
+        """
+        Takes the fitness value estimated against a subset of the samples as the individual's one, leaving its coverage
+        unknown (AES is left to the caller)
+        Args:
+            estimate: Estimated fitness value
+
+        Returns: None
+
+        """
+        self.fitness_value = estimate
+        self.coverage = 0
+        self.partial = True
+
+        # Stats concerns
+        self.stats.sum_partial_evaluations(1)
+
+    @staticmethod
+    def evaluate_batch(individuals: List['Individual'], elite: Optional[float] = None) -> List['Individual']:
+        """
+        Scores the individuals of a batch not evaluated yet, in order, letting the fitness engine score all of their
+        fenotypes at once first. Individuals sharing their genotype with another one of the batch take its fenotype
+        and fitness value instead of working them out again. If racing is enabled, the batch is raced against a random
+        subset of the samples first and just the individuals that could still reach the current elite (or the best
+        individual of the batch, by its interval lower bound), or the success threshold, are scored against every
+        sample. Every individual scored by the batch, twins included, counts towards AES in batch order, as if scored
+        one by one. Fitness values are worked out sequentially
+        Args:
+            individuals: List of Individual instances of the same run
+            elite: Optional fitness value of the best fully scored individual of the current generation
+
+        Returns: The same list of Individual instances
+
+        """
+        known = {individual.bin_genotype: individual for individual in individuals if individual.evaluated}
+        fresh, pending, twins = [], [], []
+
+        for individual in individuals:
+            if individual.evaluated:
+                continue
+            fresh.append(individual)
+            if individual.bin_genotype in known:
+                twins.append(individual)
+            else:
+                known[individual.bin_genotype] = individual
+                pending.append(individual)
+
+        if len(fresh) == 0:
+            return individuals
+
+        config, samples, rng, phases = fresh[0].config, fresh[0].samples, fresh[0].rng, fresh[0].stats.phases
+
+        if len(pending) == 0:
+            promoted = pending
+        elif isinstance(samples, SampleSet) and 0 < config.racing_sample_size < len(samples):
+            subset = samples.subset(rng.sample(range(len(samples)), config.racing_sample_size))
+
+            with phases(FITNESS_PHASE):
+                Fitness.prepare(config, subset, [i.fenotype for i in pending])
+                estimates = [Fitness(config, subset, individual.fenotype).estimate() for individual in pending]
+
+            best_lower = max(lower for _, lower, _ in estimates)
+            bar = min(config.success_threshold, best_lower if elite is None else max(elite, best_lower))
+
+            # The individual with the best lower bound is always scored, so no batch is left just estimated
+            leader = max(range(len(pending)), key=lambda index: estimates[index][1])
+
+            promoted = []
+            for index, (individual, (estimate, _, upper)) in enumerate(zip(pending, estimates)):
+                if upper >= bar or index == leader:
+                    promoted.append(individual)
+                else:
+                    individual.keep_estimate(estimate)
+        else:
+            promoted = pending
+
+        with phases(FITNESS_PHASE):
+            Fitness.prepare(config, samples, [i.fenotype for i in promoted])
+        for individual in promoted:
+            individual._evaluate()
+
+        for twin in twins:
+            twin._take_after(known[twin.bin_genotype])
+        fresh[0].stats.sum_cache_hits(len(twins))
+
+        for individual in fresh:
+            individual._is_solution()
+
+        return individuals
+
+    def _take_after(self, twin: 'Individual') -> None:
+        """ Takes the already worked out fenotype and fitness value of an individual sharing the same genotype """
+        self._int_genotype = twin._int_genotype
+        self._fenotype = twin._fenotype
+        self._fenotype_key = twin._fenotype_key
+        self._fitness_value = twin._fitness_value
+        self.coverage = twin.coverage
+        self.partial = twin.partial
+
     @property
     def __dict__(self):
         """ Dictionary representation for a slotted class (that has no dict at all) """
         # Above works just for POPOs
-        return {s: getattr(self, s, None) for s in self.__slots__ if s in ('bin_genotype', 'fenotype', 'fitness_value')}
+        return {s: getattr(self, s, None) for s in ('bin_genotype', 'fenotype', 'fitness_value')}
 
     def __repr__(self):
         """ String representation of a slotted class using hijacked dict """
         return f'{self.__class__.__name__}({self.__dict__})'
 
+    def __getstate__(self):
+        """
+        Pickles the individual itself, leaving out the samples, grammar, stats and random number generator it shares
+        with its population
+        """
+        return {s: getattr(self, s, None) for s in self.__slots__ if s not in ('samples', 'grammar', 'stats', 'rng')}
+
+    def __setstate__(self, state):
+        """ Unpickles an individual detached from any population """
+        for k, v in state.items():
+            setattr(self, k, v)
+
     #
     # Problem specific GE methods
     #
@@ -166,7 +522,7 @@ class Individual(object):
         Returns: String, binary fashion
 
         """
-        return ''.join([''.join('1') if random() > 0.5
+        return ''.join([''.join('1') if self.rng.random() > 0.5
                         else ''.join('0') for _ in range(0, self.config.dna_length)]).strip()
 
     def _transcription(self) -> [int]:
@@ -186,10 +542,7 @@ class Individual(object):
         while done is not True:
             # First save previous iteration copy
             old_symbolic_string = symbolic_string
-            ci = next(circular)
-
-            for key in self.grammar.keys():
-                symbolic_string = self._translate(ci, key, symbolic_string)
+            symbolic_string = self._derive(next(circular), symbolic_string)
 
             # Check if anything changed from last iteration
             if old_symbolic_string == symbolic_string:
@@ -199,6 +552,23 @@ class Individual(object):
 
         return json.loads(translated_individual)
 
+    def _derive(self, ci: int, symbolic_string: str) -> str:
+        """
+        Derivation step of the translation, the first occurrence of every grammar symbol is rewritten by the rule
+        fired by the codon
+        Args:
+            ci: Codon integer value
+            symbolic_string: String representation of the individual's Spacy's Rule Based Matcher pattern
+
+        Returns: String representation of the individual's Spacy's Rule Based Matcher pattern
+
+        """
+        for key in self.grammar.keys():
+            if key in symbolic_string:
+                symbolic_string = self._translate(ci, key, symbolic_string)
+
+        return symbolic_string
+
     def _translate(self, ci: iter, key, symbolic_string: str):
         """
         Helper method to reduce cognitive overload of the public method with the same name (_translation)
@@ -249,12 +619,13 @@ class Individual(object):
     # Generic GA methods
     #
     @classmethod
-    def mutate(cls, dna, mutation_probability) -> str:
+    def mutate(cls, dna, mutation_probability, rng: Random = random) -> str:
         """
         Mutates a given dna string by a mutation probability
         Args:
             dna: binary string representation of a dna sequence
             mutation_probability: Chances of each gen to be mutated
+            rng: Optional random number generator (Fallbacks to the random module)
 
         Returns: Binary string
 
@@ -262,7 +633,7 @@ class Individual(object):
         mutated_dna = ''
 
         for gen in dna:
-            if random() < mutation_probability:
+            if rng.random() < mutation_probability:
                 if gen == '1':
                     mutated_dna += '0'
                 else:
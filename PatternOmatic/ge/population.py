@@ -19,21 +19,46 @@ along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 
 """
 import random
-from typing import List, Tuple, Dict
+import time
+from random import Random
+from threading import Event
+from typing import List, Tuple, Dict, NamedTuple, Callable, Optional, Iterator
+
+import numpy as np
+from numpy.random import SeedSequence
 from spacy.tokens import Doc
 
 from PatternOmatic.ge.individual import Individual
-from PatternOmatic.ge.stats import Stats
-from PatternOmatic.settings.config import Config
-from PatternOmatic.settings.literals import SelectionType, ReplacementType
+from PatternOmatic.ge.seeding import seed_genotypes
+from PatternOmatic.ge.stats import Stats, HallOfFame
+from PatternOmatic.ge.store import get_fitness_store
+from PatternOmatic.settings.config import Config, FrozenConfig
+from PatternOmatic.settings.literals import SelectionType, ReplacementType, SELECTION_PHASE, RECOMBINATION_PHASE, \
+    REPLACEMENT_PHASE
 from PatternOmatic.settings.log import LOG
 
 
+def spawn_generators(seed: int, runs: int) -> List[Random]:
+    """
+    Spawns an independent random number generator per run from a single seed, so every run draws the same numbers
+    whether runs are evolved one after another or by parallel workers
+    Args:
+        seed: Seed of the execution, negative for an unseeded (unpredictable) one
+        runs: Number of runs
+
+    Returns: List of Random instances, one per run
+
+    """
+    children = SeedSequence(None if seed < 0 else seed).spawn(runs)
+    return [Random(int.from_bytes(child.generate_state(4).tobytes(), 'little')) for child in children]
+
+
 class Selection(object):
     """ Dispatches the proper selection type for population instances """
-    __slots__ = '_select'
+    __slots__ = ('_select', 'rng')
 
-    def __init__(self, selection_type: SelectionType):
+    def __init__(self, selection_type: SelectionType, rng: Random = None):
+        self.rng = random if rng is None else rng
         self.__dispatch_selection(selection_type)
 
     def __call__(self, generation: List[Individual]) -> List[Individual]:
@@ -45,8 +70,9 @@ class Selection(object):
         Returns: A list of Individual instances
 
         """
-        LOG.debug(f'Selecting individuals...')
-        return self._select(generation)
+        LOG.debug('Selecting individuals...')
+        Individual.evaluate_batch(generation)
+        return self._select(generation, self.rng)
 
     def __dispatch_selection(self, selection_type: SelectionType) -> None:
         """
@@ -66,13 +92,14 @@ class Selection(object):
             self._select = self._binary_tournament
 
     @staticmethod
-    def _binary_tournament(generation: List[Individual]) -> List[Individual]:
+    def _binary_tournament(generation: List[Individual], rng: Random) -> List[Individual]:
         """
         Selects members of the current generation into the mating pool in order to produce offspring by comparing pairs
         of Individuals and adding the best of each pair to the "mating pool" until its filled
 
         Args:
             generation: A list of Individual instances
+            rng: Random number generator of the run
 
         Returns: A list of Individual instances
 
@@ -80,11 +107,11 @@ class Selection(object):
         mating_pool = []
 
         while len(mating_pool) <= len(generation):
-            i = random.randint(0, len(generation) - 1)
+            i = rng.randint(0, len(generation) - 1)
             j = i
 
             while j == i:
-                j = random.randint(0, len(generation) - 1)
+                j = rng.randint(0, len(generation) - 1)
 
             i = generation[i]
             j = generation[j]
@@ -97,11 +124,12 @@ class Selection(object):
         return mating_pool
 
     @staticmethod
-    def _k_tournament(generation: List[Individual]) -> List[Individual]:
+    def _k_tournament(generation: List[Individual], rng: Random) -> List[Individual]:
         """
         Not implemented
         Args:
             generation: A list of Individual instances
+            rng: Random number generator of the run
 
         Raises: NotImplementedError
         Returns: A list of Individual instances
@@ -113,18 +141,20 @@ class Selection(object):
 
 class Recombination(object):
     """ Dispatches the proper recombination type for population instances """
-    __slots__ = ('_recombine', 'config', 'grammar', 'samples', 'stats')
+    __slots__ = ('_recombine', 'config', 'grammar', 'samples', 'stats', 'rng')
 
-    def __init__(self, grammar: Dict, samples: List[Doc], stats: Stats):
+    def __init__(self, grammar: Dict, samples: List[Doc], stats: Stats, config: FrozenConfig = None,
+                 rng: Random = None):
         self._recombine = None
-        self.config = Config()
+        self.config = Config() if config is None else config
         self.grammar = grammar
         self.samples = samples
         self.stats = stats
+        self.rng = random if rng is None else rng
         self.__dispatch_recombination_type()
 
     def __call__(self, mating_pool: List[Individual], generation: List[Individual]) -> List[Individual]:
-        LOG.debug(f'Combining individuals...')
+        LOG.debug('Combining individuals...')
         return self._recombine(mating_pool, generation)
 
     def __dispatch_recombination_type(self) -> None:
@@ -151,20 +181,22 @@ class Recombination(object):
         offspring_max_size = round(len(generation) * self.config.offspring_max_size_factor)
 
         while len(offspring) <= offspring_max_size:
-            parent_1 = random.choice(mating_pool)
-            parent_2 = random.choice(mating_pool)
+            parent_1 = self.rng.choice(mating_pool)
+            parent_2 = self.rng.choice(mating_pool)
 
-            if random.random() < self.config.mating_probability:
-                cut = random.randint(1, self.config.codon_length - 1) * self.config.num_codons_per_individual
+            if self.rng.random() < self.config.mating_probability:
+                cut = self.rng.randint(1, self.config.codon_length - 1) * self.config.num_codons_per_individual
 
                 # Create children
                 child_1 = Individual(self.samples, self.grammar, self.stats,
                                      dna=parent_1.bin_genotype[:cut] + parent_2.bin_genotype[
-                                                                       -(self.config.dna_length - cut):])
+                                                                       -(self.config.dna_length - cut):],
+                                     config=self.config, lazy=True, rng=self.rng)
 
                 child_2 = Individual(self.samples, self.grammar, self.stats,
                                      dna=parent_2.bin_genotype[:cut] + parent_1.bin_genotype[
-                                                                 -(self.config.dna_length - cut):])
+                                                                 -(self.config.dna_length - cut):],
+                                     config=self.config, lazy=True, rng=self.rng)
 
                 offspring.append(child_1)
                 offspring.append(child_2)
@@ -174,14 +206,22 @@ class Recombination(object):
 
 class Replacement(object):
     """ Dispatches the proper recombination type for population instances """
-    __slots__ = '_replace'
+    __slots__ = ('_replace', 'hall_of_fame')
 
-    def __init__(self, replacement_type: ReplacementType):
+    def __init__(self, replacement_type: ReplacementType, hall_of_fame: Optional[HallOfFame] = None):
         self.__dispatch_replacement_type(replacement_type)
+        self.hall_of_fame = hall_of_fame
 
     def __call__(self, generation: List[Individual], offspring: List[Individual]) \
             -> Tuple[List[Individual], List[Individual]]:
-        LOG.debug(f'Replacing individuals...')
+        LOG.debug('Replacing individuals...')
+        elite = max((individual.fitness_value for individual in generation
+                     if individual.evaluated and individual.partial is False), default=None)
+        Individual.evaluate_batch(generation + offspring, elite)
+
+        if self.hall_of_fame is not None:
+            self.hall_of_fame.update(generation + offspring)
+
         return self._replace(generation, offspring)
 
     def __dispatch_replacement_type(self, replacement_type: ReplacementType) -> None:
@@ -260,57 +300,185 @@ class Replacement(object):
         return generation, offspring
 
 
+class Progress(NamedTuple):
+    """ Lightweight snapshot of a run, taken once per generation """
+    run: int
+    generation: int
+    best_fenotype: List[dict]
+    best_fitness: float
+    evaluations: int
+    elapsed: float
+
+
 class Population(object):
     """ Population implementation of an AI Grammatical Evolution algorithm in OOP fashion """
-    __slots__ = ('config', 'samples', 'grammar', 'stats', 'generation', 'offspring', 'best_individual',
-                 'selection', 'recombination', 'replacement')
+    __slots__ = ('config', 'samples', 'grammar', 'stats', 'rng', 'generation', 'offspring', 'best_individual',
+                 'selection', 'recombination', 'replacement', 'evaluations', 'generations_done', 'checkpoint')
 
-    def __init__(self, samples: [Doc], grammar: dict, stats: Stats):
+    def __init__(self, samples: [Doc], grammar: dict, stats: Stats, config: FrozenConfig = None, rng: Random = None,
+                 checkpoint: Optional[Callable[['Population'], None]] = None):
         """
         Population constructor, initializes a list of Individual objects
         Args:
             samples: list of Spacy doc objets
             grammar: Backus Naur Form grammar notation encoded in a dictionary
+            stats: statistics object related with this run
+            config: Optional configuration of the execution (Fallbacks to the Config Singleton)
+            rng: Optional random number generator of the run (Fallbacks to the random module)
+            checkpoint: Optional callable, invoked with the population every checkpoint interval generations
         """
-        self.config = Config()
+        self.config = Config() if config is None else config
 
         self.samples = samples
         self.grammar = grammar
         self.stats = stats
+        self.rng = random if rng is None else rng
+        self.stats.dedup_ratio = getattr(samples, 'dedup_ratio', 0.0)
         self.generation = self._genesis()
+        self.evaluations = len(self.generation)
         self.offspring = list()
         self.best_individual = None
+        self.generations_done = 0
+        self.checkpoint = checkpoint
 
-        self.selection = Selection(self.config.selection_type)
-        self.recombination = Recombination(grammar, samples, stats)
-        self.replacement = Replacement(self.config.replacement_type)
+        self.selection = Selection(self.config.selection_type, self.rng)
+        self.recombination = Recombination(grammar, samples, stats, self.config, self.rng)
+        self.replacement = Replacement(self.config.replacement_type, stats.hall_of_fame)
 
     #
     # Population specific methods
     #
     def _genesis(self) -> List[Individual]:
         """
-        Initializes the first generation
+        Initializes the first generation, a fraction of it (up to the seed fraction) taken from the seeds set up, if
+        any, and the rest random
         Returns: A list of individual objects
 
         """
-        return [Individual(self.samples, self.grammar, self.stats) for _ in range(0, self.config.dna_length)]
+        size = self.config.dna_length
+        genotypes = seed_genotypes(self.grammar, self.config)[:round(size * self.config.seed_fraction)]
+
+        seeded = [Individual.restore(self.samples, self.grammar, self.stats, genotype, None, 0, False, self.config,
+                                     self.rng) for genotype in genotypes]
+
+        return seeded + [Individual(self.samples, self.grammar, self.stats, config=self.config, lazy=True, rng=self.rng)
+                         for _ in range(len(seeded), size)]
+
+    def state(self) -> dict:
+        """
+        Takes a compact snapshot of the run, to be checkpointed: the genotype matrix (one bit per gen), fitness
+        vector, coverages and estimate flags of the current generation, followed by the best individual, along with
+        the random number generator state and the generation and evaluation counters
+        Returns: Dict holding the state of the run
+
+        """
+        individuals = self.generation + ([] if self.best_individual is None else [self.best_individual])
+        genes = np.frombuffer(''.join(i.bin_genotype for i in individuals).encode('ascii'), dtype=np.uint8) - ord('0')
+
+        return {
+            'generations_done': self.generations_done,
+            'evaluations': self.evaluations,
+            'rng': self.rng.getstate(),
+            'genotypes': np.packbits(genes.reshape(len(individuals), self.config.dna_length), axis=1),
+            'fitness': np.array([i.fitness_value for i in individuals], dtype=np.float64),
+            'coverage': [i.coverage for i in individuals],
+            'partial': np.array([i.partial for i in individuals], dtype=np.bool_),
+            'best': self.best_individual is not None
+        }
+
+    def restore(self, state: dict) -> None:
+        """
+        Restores the run from a snapshot taken by state
+        Args:
+            state: Dict holding the state of the run
+
+        Returns: None
+
+        """
+        genes = np.unpackbits(state['genotypes'], axis=1, count=self.config.dna_length) + ord('0')
+        individuals = [Individual.restore(self.samples, self.grammar, self.stats, row.tobytes().decode('ascii'),
+                                          float(fitness), coverage, bool(partial), self.config, self.rng)
+                       for row, fitness, coverage, partial in
+                       zip(genes.astype(np.uint8), state['fitness'], state['coverage'], state['partial'])]
+
+        self.best_individual = individuals.pop() if state['best'] else None
+        self.generation = individuals
+        self.offspring = list()
+        self.generations_done = state['generations_done']
+        self.evaluations = state['evaluations']
+        self.rng.setstate(state['rng'])
 
     def _best_challenge(self) -> None:
         """
         Compares current generation best fitness individual against previous generation best fitness individual.
-        Updates the best individual attribute accordingly
+        Updates the best individual attribute accordingly. Individuals whose fitness value is just an estimate, left
+        behind while racing, do not take part, unless the whole generation was just estimated: its top individual is
+        then scored against every sample
         """
+        challenger = next((individual for individual in self.generation if individual.partial is False), None)
+
+        if challenger is None:
+            challenger = max(self.generation, key=lambda individual: individual.fitness_value)
+            challenger.evaluate()
+
         if self.best_individual is not None:
-            if self.generation[0].fitness_value > self.best_individual.fitness_value:
-                self.best_individual = self.generation[0]
+            if challenger.fitness_value > self.best_individual.fitness_value:
+                self.best_individual = challenger
         else:
-            self.best_individual = self.generation[0]
+            self.best_individual = challenger
+
+    def _record(self, generation: int, scored: int, cache_hits: int, elapsed: float) -> None:
+        """
+        Records the telemetry of a generation just evolved. The mean fitness leaves aside the fitness values just
+        estimated by racing, and fenotypes are told apart by the keys they already share with the hall of fame
+        Args:
+            generation: Index of the generation
+            scored: Number of fenotypes scored along the generation, fully or not
+            cache_hits: Number of fenotypes not scored along the generation, their fitness value being already known
+            elapsed: Time lapsed since the run started (or was resumed)
+
+        Returns: None
+
+        """
+        size = len(self.generation)
+        fitness_values = [individual.fitness_value for individual in self.generation if individual.partial is False]
+        self.stats.telemetry.record(
+            generation,
+            self.best_individual.fitness_value,
+            sum(fitness_values) / len(fitness_values) if len(fitness_values) > 0 else np.nan,
+            len({individual.bin_genotype for individual in self.generation}) / size,
+            len({individual.fenotype_key for individual in self.generation}) / size,
+            scored,
+            cache_hits,
+            elapsed)
 
     #
     # Evolution
     #
-    def evolve(self):
+    def evolve(self, progress: Optional[Callable[[Progress], None]] = None, stop: Optional[Event] = None) -> bool:
+        """
+        Evolves the population along all of its generations
+        Args:
+            progress: Optional callable, invoked with a Progress instance after every generation
+            stop: Optional event, checked between generations to stop the run cooperatively
+
+        Returns: False if the run was stopped before its last generation (its statistics are discarded), else True
+
+        """
+        if stop is not None and stop.is_set():
+            return False
+
+        for snapshot in self.evolve_iter():
+            if progress is not None:
+                progress(snapshot)
+
+            if stop is not None and stop.is_set() and snapshot.generation < self.config.max_generations:
+                LOG.info(f'Evolution stopped at generation {snapshot.generation}')
+                return False
+
+        return True
+
+    def evolve_iter(self) -> Iterator[Progress]:
         """
         Search Engine:
             1) Selects individuals of the current generation to constitute who will mate
@@ -318,17 +486,43 @@ class Population(object):
             3) Replace/mix the this generation with the offspring
             4) Save the best individual by fitness
             5) Calculate statistics for this Run
+
+        Yields a Progress instance after every generation, so the best individual found so far can be used right away.
+        Statistics are calculated once the last generation is consumed, closing the generator earlier discards them
+
+        Returns: Iterator of Progress instances
+
         """
 
         LOG.info('Evolution taking place, please wait...')
 
-        self.stats.reset()
-
-        for _ in range(self.config.max_generations):
-            mating_pool = self.selection(self.generation)
-            self.offspring = self.recombination(mating_pool, self.generation)
-            self.generation, self.offspring = self.replacement(self.generation, self.offspring)
+        if self.generations_done == 0:
+            self.stats.reset()
+        start = time.monotonic()
+
+        for generation in range(self.generations_done, self.config.max_generations):
+            scored = self.stats.full_evaluations + self.stats.partial_evaluations
+            cache_hits = self.stats.cache_hits
+
+            with self.stats.phases(SELECTION_PHASE):
+                mating_pool = self.selection(self.generation)
+            with self.stats.phases(RECOMBINATION_PHASE):
+                self.offspring = self.recombination(mating_pool, self.generation)
+            self.evaluations += len(self.offspring)
+            with self.stats.phases(REPLACEMENT_PHASE):
+                self.generation, self.offspring = self.replacement(self.generation, self.offspring)
             self._best_challenge()
+            self.generations_done = generation + 1
+            self.stats.add_phases()
+            if self.config.telemetry_path:
+                self._record(generation, self.stats.full_evaluations + self.stats.partial_evaluations - scored,
+                             self.stats.cache_hits - cache_hits, time.monotonic() - start)
+
+            if self.checkpoint is not None and self.generations_done % self.config.checkpoint_interval == 0:
+                self.checkpoint(self)
+
+            yield Progress(0, generation + 1, self.best_individual.fenotype, self.best_individual.fitness_value,
+                           self.evaluations, time.monotonic() - start)
 
         LOG.info(f'Best candidate found on this run: {self.best_individual}')
 
@@ -340,3 +534,7 @@ class Population(object):
             self.stats.add_sr(True)
         else:
             self.stats.add_sr(False)
+
+        store = get_fitness_store(self.config)
+        if store is not None:
+            store.flush()
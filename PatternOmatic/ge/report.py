@@ -0,0 +1,209 @@
+""" Execution reports module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from threading import Lock
+from typing import List, Optional, Dict, Iterable, Tuple, BinaryIO
+
+from PatternOmatic.settings.literals import ReportFormat
+from PatternOmatic.settings.log import LOG
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Number of buffered records that triggers a flush
+FLUSH_SIZE = 1024
+
+
+class ReportWriter(object):
+    """
+    Buffered writer of report records, either JSON Lines or CSV headed by the schema of its records. Files may be
+    gzipped (every flush appending a gzip member) and are rotated once they grow beyond their size limit, or when the
+    schema of the CSV records changes. Flushes take an exclusive lock on the file, so writers of parallel runs and
+    processes can share it (on platforms without file locks, writes are serialised just within the process)
+    """
+    __slots__ = ('path', 'report_format', 'compress', 'max_bytes', 'backups', '_buffer', '_lock')
+
+    def __init__(self, path: str, report_format: ReportFormat, compress: bool = False, max_bytes: int = 0,
+                 backups: int = 5):
+        """
+        ReportWriter constructor
+        Args:
+            path: OS path of the report file
+            report_format: ReportFormat instance
+            compress: Whether to gzip the report
+            max_bytes: Size of the report file (as stored) beyond which it is rotated, 0 or less never rotates it
+            backups: Number of rotated report files kept, as path.1 (the newest) to path.backups
+        """
+        self.path = path
+        self.report_format = report_format
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._buffer = list()
+        self._lock = Lock()
+
+    def write(self, records: Iterable[dict]) -> None:
+        """
+        Buffers some records, flushing them if the buffer is full
+        Args:
+            records: Iterable of dicts, sharing their keys
+
+        Returns: None
+
+        """
+        with self._lock:
+            self._buffer.extend(records)
+            pending = len(self._buffer)
+
+        if pending >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """ Appends the buffered records to the report file """
+        with self._lock:
+            if len(self._buffer) == 0:
+                return
+
+            header, body = self._encode(self._buffer)
+
+            while True:
+                with open(self.path, mode='ab') as f:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+                    # Another writer may have rotated the file while this one waited for the lock
+                    if not self._is_current(f):
+                        continue
+
+                    if self._must_rotate(f, header):
+                        self._rotate()
+                        continue
+
+                    self._append(f, body if header is None or f.tell() > 0 else header + body)
+                    break
+
+            self._buffer.clear()
+
+    def _encode(self, records: List[dict]) -> Tuple[Optional[bytes], bytes]:
+        """
+        Encodes records into their report format
+        Args:
+            records: List of dicts, sharing their keys
+
+        Returns: Schema header line (None for JSON Lines) and lines of the records, as bytes
+
+        """
+        if self.report_format == ReportFormat.JSON:
+            return None, ''.join(json.dumps(record, default=str) + '\n' for record in records).encode('utf-8')
+
+        fields = list(records[0])
+        text = io.StringIO()
+        writer = csv.writer(text, lineterminator='\n')
+        writer.writerow(fields)
+        header = text.getvalue()
+
+        writer.writerows([ReportWriter._cell(record.get(field)) for field in fields] for record in records)
+        return header.encode('utf-8'), text.getvalue()[len(header):].encode('utf-8')
+
+    @staticmethod
+    def _cell(value):
+        """ CSV cell of a value, nested values being JSON encoded """
+        if value is None:
+            return ''
+        if isinstance(value, (dict, list, tuple)):
+            return json.dumps(value, default=str)
+        return value
+
+    def _is_current(self, f: BinaryIO) -> bool:
+        """ Whether an opened file is still the one at the report path """
+        try:
+            return os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _must_rotate(self, f: BinaryIO, header: Optional[bytes]) -> bool:
+        """ Whether the report file is beyond its size limit, or headed by another schema """
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return False
+
+        if 0 < self.max_bytes <= size:
+            return True
+
+        if header is not None:
+            try:
+                with (gzip.open(self.path, mode='rb') if self.compress else open(self.path, mode='rb')) as r:
+                    return r.readline() != header
+            except OSError:
+                return True
+
+        return False
+
+    def _rotate(self) -> None:
+        """ Shifts the rotated report files by one, the current one becoming path.1, dropping the oldest one """
+        LOG.debug('Rotating report file %s', self.path)
+        if self.backups <= 0:
+            os.unlink(self.path)
+            return
+
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{self.path}.{i}'):
+                os.replace(f'{self.path}.{i}', f'{self.path}.{i + 1}')
+        os.replace(self.path, f'{self.path}.1')
+
+    def _append(self, f: BinaryIO, data: bytes) -> None:
+        """ Appends data to the locked report file in a single write """
+        if self.compress:
+            data = gzip.compress(data)
+        f.write(data)
+        f.flush()
+
+
+#
+# Process wide writers
+#
+_WRITERS: Dict[Tuple[str, ReportFormat, bool, int, int], ReportWriter] = dict()
+_WRITERS_LOCK = Lock()
+
+
+def get_report_writer(path: str, config) -> ReportWriter:
+    """
+    Gets the writer of a report file, set up at the given configuration, created once per process
+    Args:
+        path: OS path of the report file
+        config: Configuration of the execution
+
+    Returns: ReportWriter instance
+
+    """
+    key = (path, config.report_format, config.report_compress, config.report_max_bytes, config.report_backups)
+
+    with _WRITERS_LOCK:
+        if key not in _WRITERS:
+            _WRITERS[key] = ReportWriter(path, *key[1:])
+
+    return _WRITERS[key]
@@ -0,0 +1,193 @@
+""" Population seeding module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import json
+import os
+import pickle
+import re
+from threading import Lock
+from typing import List, Optional, Union, Dict, Tuple
+
+import numpy as np
+
+from PatternOmatic.ge.individual import Individual
+from PatternOmatic.settings.config import FrozenConfig
+from PatternOmatic.settings.literals import S
+from PatternOmatic.settings.log import LOG
+
+# Maximum number of derivation steps tried while inverse mapping a single pattern
+MAPPING_BUDGET = 2000
+
+_WHITESPACE = re.compile(r'\s')
+
+
+def inverse_map(fenotype: List[dict], grammar: dict, config: FrozenConfig,
+                budget: int = MAPPING_BUDGET) -> Optional[str]:
+    """
+    Finds a genotype translated into the given pattern by the given grammar. Codons are chosen derivation step by
+    derivation step. The values a codon may take are grouped by the outcome of the step, and narrowed down again
+    whenever the codon is used once more, pruning the outcomes that can not be derived into the pattern anymore
+    Args:
+        fenotype: Spacy's Rule Based Matcher pattern
+        grammar: Backus Naur Form grammar notation encoded in a dictionary
+        config: Configuration of the execution
+        budget: Maximum number of derivation steps tried
+
+    Returns: Binary string representation of the genotype, None if the pattern could not be mapped
+
+    """
+    widths = [len(range(i, min(i + config.codon_length - 1, config.dna_length)))
+              for i in range(0, config.dna_length, config.codon_length - 1)]
+    target = _WHITESPACE.sub('', json.dumps(fenotype, ensure_ascii=False, separators=(',', ':')))[1:-1]
+    symbols = re.compile('(' + '|'.join(re.escape(key) for key in sorted(grammar, key=len, reverse=True)) + ')')
+
+    probe = Individual.restore(None, grammar, None, '', None, 0, False, config)
+    steps = [0]
+
+    def derivable(symbolic_string: str) -> bool:
+        """ Whether the pattern could still be derived from a symbolic string """
+        pieces = symbols.split(_WHITESPACE.sub('', symbolic_string))
+        expression = ''.join('.*?' if index % 2 else re.escape(piece) for index, piece in enumerate(pieces))
+        return re.fullmatch(expression, target, re.DOTALL) is not None
+
+    def search(step: int, symbolic_string: str, codons: Dict[int, List[int]]) -> Optional[Dict[int, List[int]]]:
+        """ Depth first search of the codons deriving the pattern, narrowing the values each codon may take """
+        position = step % len(widths)
+
+        outcomes = dict()
+        for ci in codons.get(position, range(1 << widths[position])):
+            outcomes.setdefault(probe._derive(ci, symbolic_string), []).append(ci)
+
+        for derived, values in outcomes.items():
+            steps[0] += 1
+            if steps[0] > budget:
+                return None
+
+            narrowed = {**codons, position: values}
+
+            if derived == symbolic_string:
+                try:
+                    if json.loads('[' + derived + ']') == fenotype:
+                        return narrowed
+                except ValueError:
+                    pass
+            elif derivable(derived):
+                found = search(step + 1, derived, narrowed)
+                if found is not None:
+                    return found
+
+        return None
+
+    codons = search(0, grammar[S][0], dict())
+    if codons is None:
+        return None
+
+    return ''.join(format(codons.get(position, [0])[0], f'0{width}b') for position, width in enumerate(widths))
+
+
+def load_seeds(path: str, dna_length: int, checkpoint: bool = False) -> List[Union[str, List[dict]]]:
+    """
+    Loads the seeds of a seed file: either a JSON list of patterns (lists of token dicts) and binary genotype strings,
+    or, just if allowed, a checkpoint, whose genotypes are taken. Checkpoints are unpickled, so they must be trusted
+    Args:
+        path: OS path of the seed file
+        dna_length: Number of gens of a genotype
+        checkpoint: Whether the seed file may be a checkpoint written by PatternOmatic
+
+    Returns: List of patterns and genotypes
+
+    """
+    try:
+        with open(path, mode='rb') as f:
+            content = f.read()
+    except OSError as ex:
+        LOG.warning(f'Seed file {path} could not be read ({repr(ex)}), populations will not be seeded')
+        return []
+
+    try:
+        seeds = json.loads(content.decode('utf-8'))
+        return seeds if isinstance(seeds, list) else []
+    except ValueError:
+        if checkpoint is False:
+            LOG.warning(f'Seed file {path} holds no JSON patterns, populations will not be seeded (checkpoints are '
+                        f'read just if SEED_CHECKPOINT is enabled)')
+            return []
+
+    try:
+        population = pickle.loads(content)['population']
+        genotypes = population['genotypes']
+        if genotypes.shape[1] != (dna_length + 7) // 8:
+            raise ValueError('Genotype length mismatch')
+        genes = np.unpackbits(genotypes, axis=1, count=dna_length) + ord('0')
+        return [row.tobytes().decode('ascii') for row in genes.astype(np.uint8)]
+    except Exception as ex:
+        LOG.warning(f'Seed file {path} holds neither patterns nor a checkpoint ({repr(ex)})')
+        return []
+
+
+#
+# Process wide seeds
+#
+_GENOTYPES: Dict[Tuple[str, float, bool, str, int, int], List[str]] = dict()
+_GENOTYPES_LOCK = Lock()
+
+
+def seed_genotypes(grammar: dict, config: FrozenConfig) -> List[str]:
+    """
+    Gets the distinct genotypes of the seeds set up at the given configuration, patterns being inverse mapped against
+    the given grammar. Genotypes are worked out once per process and seed file version
+    Args:
+        grammar: Backus Naur Form grammar notation encoded in a dictionary
+        config: Configuration of the execution
+
+    Returns: List of binary string representations of genotypes
+
+    """
+    if not config.seed_path or config.seed_fraction <= 0.0:
+        return []
+
+    try:
+        modified = os.path.getmtime(config.seed_path)
+    except OSError:
+        modified = 0.0
+
+    key = (config.seed_path, modified, config.seed_checkpoint, json.dumps(grammar, default=str), config.dna_length,
+           config.codon_length)
+
+    with _GENOTYPES_LOCK:
+        if key not in _GENOTYPES:
+            genotypes = []
+            seeds = load_seeds(config.seed_path, config.dna_length, config.seed_checkpoint)
+
+            for seed in seeds:
+                if isinstance(seed, str):
+                    genotype = seed if len(seed) == config.dna_length and set(seed) <= {'0', '1'} else None
+                elif isinstance(seed, list):
+                    genotype = inverse_map(seed, grammar, config)
+                else:
+                    genotype = None
+
+                if genotype is not None and genotype not in genotypes:
+                    genotypes.append(genotype)
+
+            LOG.info(f'{len(genotypes)} out of {len(seeds)} seeds mapped into genotypes')
+            _GENOTYPES[key] = genotypes
+
+    return _GENOTYPES[key]
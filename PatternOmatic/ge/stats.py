@@ -18,11 +18,234 @@ You should have received a copy of the GNU Lesser General Public License
 along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 
 """
+import heapq
 import operator
-from time import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Iterable, Iterator, Dict, Tuple, List
 
-from PatternOmatic.settings.literals import ReportFormat
-from PatternOmatic.settings.config import Config
+import numpy as np
+
+from PatternOmatic.ge.report import get_report_writer
+from PatternOmatic.settings.config import Config, FrozenConfig
+
+
+class HallOfFame(object):
+    """
+    Bounded archive of the best distinct fenotypes found along an execution. Entries are kept in a min heap keyed by
+    fitness, so the worst of them is evicted in O(log N) whenever a better one comes, along with the set of the keys of
+    the fenotypes archived, so every fenotype is archived just once
+    """
+    __slots__ = ('size', 'heap', 'keys', 'counter')
+
+    def __init__(self, size: int):
+        """
+        HallOfFame constructor
+        Args:
+            size: Maximum number of distinct fenotypes archived
+        """
+        self.size = size
+        self.heap = list()
+        self.keys = set()
+        self.counter = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __iter__(self):
+        """ Iterates over the individuals archived, best first """
+        yield from (entry[-1] for entry in sorted(self.heap, reverse=True))
+
+    def add(self, individual: any) -> bool:
+        """
+        Archives an individual if its fenotype is not archived yet and it is better than the worst individual archived
+        Args:
+            individual: Individual instance, whose fitness value is not just an estimate
+
+        Returns: True if the individual was archived, else False
+
+        """
+        fitness_value = individual.fitness_value
+        if self.size <= 0 or (len(self.heap) >= self.size and fitness_value <= self.heap[0][0]):
+            return False
+
+        key = individual.fenotype_key
+        if key in self.keys:
+            return False
+
+        # Earlier individuals win ties, so the counter is negated to sort them higher
+        self.counter += 1
+        entry = (fitness_value, -self.counter, key, individual)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, entry)
+        else:
+            self.keys.discard(heapq.heapreplace(self.heap, entry)[2])
+        self.keys.add(key)
+
+        return True
+
+    def update(self, individuals: Iterable[any]) -> None:
+        """
+        Archives the individuals that deserve it, leaving aside the ones whose fitness value is just an estimate
+        Args:
+            individuals: Iterable of Individual instances
+
+        Returns: None
+
+        """
+        for individual in individuals:
+            if individual.evaluated and individual.partial is False:
+                self.add(individual)
+
+
+class PhaseTimer(object):
+    """
+    Low overhead monotonic timers of the phases of the evolution, used as context managers. Phases may nest (e.g.
+    translating a fenotype while scoring it), the time of a nested phase being charged to it alone, so phase times add
+    up to the time timed. Disabled timers time nothing
+    """
+    __slots__ = ('enabled', 'seconds', 'counts', '_stack', '_mark', '_next')
+
+    _UNTIMED = nullcontext()
+
+    def __init__(self, enabled: bool = False):
+        """
+        PhaseTimer constructor
+        Args:
+            enabled: Whether to time the phases
+        """
+        self.enabled = enabled
+        self.seconds = dict()
+        self.counts = dict()
+        self._stack = list()
+        self._mark = 0.0
+        self._next = None
+
+    def __call__(self, phase: str):
+        """
+        Times a phase
+        Args:
+            phase: Name of the phase
+
+        Returns: Context manager timing the phase
+
+        """
+        if self.enabled is False:
+            return self._UNTIMED
+
+        self._next = phase
+        return self
+
+    def __enter__(self):
+        now = perf_counter()
+        if len(self._stack) > 0:
+            outer = self._stack[-1]
+            self.seconds[outer] = self.seconds.get(outer, 0.0) + now - self._mark
+
+        self._stack.append(self._next)
+        self.counts[self._next] = self.counts.get(self._next, 0) + 1
+        self._mark = now
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        now = perf_counter()
+        phase = self._stack.pop()
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + now - self._mark
+        self._mark = now
+        return False
+
+    def take(self) -> Dict[str, Tuple[float, int]]:
+        """
+        Takes the time and count of every phase timed since last taken, starting over
+        Returns: Dict of phase names to their seconds and counts
+
+        """
+        taken = {phase: (seconds, self.counts[phase]) for phase, seconds in self.seconds.items()}
+        self.seconds = dict()
+        self.counts = dict()
+        return taken
+
+
+class Telemetry(object):
+    """
+    Per generation time series of the runs of an execution. Every run gets a row of preallocated arrays, one per
+    field and as long as the maximum number of generations, that generations fill in place. Generations never evolved
+    are left as NaN
+    """
+    __slots__ = ('generations', 'series', 'row')
+
+    FIELDS = ('best_fitness', 'mean_fitness', 'genotype_diversity', 'fenotype_diversity', 'evaluations', 'cache_hits',
+              'elapsed')
+
+    def __init__(self, generations: int):
+        """
+        Telemetry constructor
+        Args:
+            generations: Maximum number of generations of a run
+        """
+        self.generations = generations
+        self.series = np.full((0, len(self.FIELDS), generations), np.nan)
+        self.row = -1
+
+    def __len__(self):
+        return self.series.shape[0]
+
+    def start_run(self) -> None:
+        """ Preallocates the row of a new run """
+        self.series = np.concatenate((self.series, np.full((1, len(self.FIELDS), self.generations), np.nan)))
+        self.row = self.series.shape[0] - 1
+
+    def record(self, generation: int, *values: float) -> None:
+        """
+        Records the values of the fields of a generation of the current run, starting one if none was
+        Args:
+            generation: Index of the generation
+            *values: Value of every field, in order
+
+        Returns: None
+
+        """
+        if self.row < 0:
+            self.start_run()
+        self.series[self.row, :, generation] = values
+
+    def merge(self, other: 'Telemetry') -> None:
+        """
+        Appends the runs of another Telemetry instance
+        Args:
+            other: Telemetry instance of runs evolved elsewhere
+
+        Returns: None
+
+        """
+        self.series = np.concatenate((self.series, other.series))
+        self.row = self.series.shape[0] - 1
+
+    def columns(self) -> Dict[str, List]:
+        """
+        Columns of the time series, a record per generation evolved
+        Returns: Dict of column names to lists of values, run and generation indexes first
+
+        """
+        runs, generations = np.nonzero(~np.isnan(self.series[:, 0, :]))
+        columns = {'run': runs.tolist(), 'generation': generations.tolist()}
+        columns.update({field: self.series[runs, index, generations].tolist()
+                        for index, field in enumerate(self.FIELDS)})
+        return columns
+
+    def records(self, execution: str) -> Iterator[dict]:
+        """
+        Records of the time series, one per generation evolved
+        Args:
+            execution: Identifier of the execution, repeated along its records
+
+        Returns: Iterator of dicts, execution, run and generation first
+
+        """
+        columns = self.columns()
+        for values in zip(*columns.values()):
+            yield {'execution': execution, **dict(zip(columns, values))}
 
 
 class Stats(object):
@@ -34,27 +257,55 @@ class Stats(object):
         'aes_accumulator',
         'time_accumulator',
         'most_fitted_accumulator',
+        'hall_of_fame',
+        'phases',
+        'phase_accumulator',
+        'telemetry',
         'solution_found',
         'success_rate',
         'mbf',
         'aes',
         'mean_time',
+        'rejected',
+        'dedup_ratio',
+        'full_evaluations',
+        'partial_evaluations',
+        'cache_hits',
+        'phase_times',
+        'phase_counts',
+        'phase_generation_times',
         'aes_counter'
     ]
 
-    def __init__(self):
-        """ Stats instances constructor """
-        self.config = Config()
+    def __init__(self, config: FrozenConfig = None):
+        """
+        Stats instances constructor
+        Args:
+            config: Optional configuration of the execution (Fallbacks to the Config Singleton)
+        """
+        self.config = Config() if config is None else config
         self.success_rate_accumulator = list()
         self.mbf_accumulator = list()
         self.aes_accumulator = list()
         self.time_accumulator = list()
         self.most_fitted_accumulator = list()
+        self.hall_of_fame = HallOfFame(self.config.hall_of_fame_size)
+        self.phases = PhaseTimer(self.config.profile_phases)
+        self.phase_accumulator = list()
+        self.telemetry = Telemetry(self.config.max_generations)
         self.solution_found = False
         self.success_rate = None
         self.mbf = None
         self.aes = None
         self.mean_time = None
+        self.rejected = 0
+        self.dedup_ratio = 0.0
+        self.full_evaluations = 0
+        self.partial_evaluations = 0
+        self.cache_hits = 0
+        self.phase_times = None
+        self.phase_counts = None
+        self.phase_generation_times = None
 
         self.aes_counter = 0
 
@@ -62,13 +313,18 @@ class Stats(object):
     def __dict__(self):
         """ Dictionary representation for a slotted class (that has no dict at all) """
         # Above works just for POPOs
-        stats_dict = \
-            {s: getattr(self, s, None) for s in self.__slots__ if s in ('success_rate', 'mbf', 'aes', 'mean_time')}
+        stats_dict = {s: getattr(self, s, None) for s in self.__slots__
+                      if s in ('success_rate', 'mbf', 'aes', 'mean_time', 'rejected', 'dedup_ratio',
+                               'full_evaluations', 'partial_evaluations')}
 
         most_fitted = self.get_most_fitted()
         most_fitted_dict = {'most_fitted': most_fitted.__dict__} if most_fitted is not None else {'most_fitted': None}
         stats_dict.update(most_fitted_dict)
 
+        if self.config.profile_phases is True:
+            stats_dict.update({s: getattr(self, s, None)
+                               for s in ('phase_times', 'phase_counts', 'phase_generation_times')})
+
         return stats_dict
 
     def __repr__(self):
@@ -129,6 +385,18 @@ class Stats(object):
         """
         self.most_fitted_accumulator.append(individual)
 
+    def add_phases(self) -> None:
+        """
+        Adds the time and count of every phase timed along the last generation to the accumulator, if timing phases
+
+        """
+        if self.phases.enabled is False:
+            return
+
+        if len(self.phase_accumulator) == 0:
+            self.phase_accumulator.append(list())
+        self.phase_accumulator[-1].append(self.phases.take())
+
     def sum_aes(self, es: int) -> None:
         """
         Sums a new Evaluations to Solution value to the counter
@@ -140,6 +408,51 @@ class Stats(object):
         """
         self.aes_counter += es
 
+    def sum_rejected(self, rejected: int) -> None:
+        """
+        Sums a number of fenotypes rejected by the samples feature index, without running the Matcher, to the counter
+        Args:
+            rejected: Number of rejected fenotypes
+
+        Returns:
+
+        """
+        self.rejected += rejected
+
+    def sum_full_evaluations(self, evaluations: int) -> None:
+        """
+        Sums a number of fenotypes scored against every sample to the counter
+        Args:
+            evaluations: Number of full evaluations
+
+        Returns:
+
+        """
+        self.full_evaluations += evaluations
+
+    def sum_partial_evaluations(self, evaluations: int) -> None:
+        """
+        Sums a number of fenotypes scored just against a subset of the samples, while racing, to the counter
+        Args:
+            evaluations: Number of partial evaluations
+
+        Returns:
+
+        """
+        self.partial_evaluations += evaluations
+
+    def sum_cache_hits(self, hits: int) -> None:
+        """
+        Sums a number of fenotypes whose fitness value was taken from the fitness store, or from a twin of the same
+        batch, instead of being scored, to the counter
+        Args:
+            hits: Number of cache hits
+
+        Returns:
+
+        """
+        self.cache_hits += hits
+
     #
     # Metrics
     #
@@ -147,15 +460,71 @@ class Stats(object):
         """ Resets variables that depend on the run """
         self.aes_counter = 0
         self.solution_found = False
+        self.telemetry.start_run()
+
+        if self.phases.enabled is True:
+            self.phases.take()
+            self.phase_accumulator.append(list())
 
     def calculate_metrics(self):
         """ Calculates the common GE evaluation metrics """
         self.add_aes(self.aes_counter)
+        self._calculate_means()
+
+    def merge(self, other: 'Stats') -> None:
+        """
+        Merges the accumulators of the Stats instance of runs evolved elsewhere (e.g. another process) and recalculates
+        the common GE evaluation metrics
+        Args:
+            other: Stats instance whose metrics have already been calculated
+
+        Returns: None
+
+        """
+        self.success_rate_accumulator.extend(other.success_rate_accumulator)
+        self.mbf_accumulator.extend(other.mbf_accumulator)
+        self.aes_accumulator.extend(other.aes_accumulator)
+        self.time_accumulator.extend(other.time_accumulator)
+        self.most_fitted_accumulator.extend(other.most_fitted_accumulator)
+        for individual in other.hall_of_fame:
+            self.hall_of_fame.add(individual)
+        self.rejected += other.rejected
+        self.dedup_ratio = other.dedup_ratio
+        self.full_evaluations += other.full_evaluations
+        self.partial_evaluations += other.partial_evaluations
+        self.cache_hits += other.cache_hits
+        self.telemetry.merge(other.telemetry)
+        self.phase_accumulator.extend(other.phase_accumulator)
+        self._calculate_means()
+
+    def _calculate_means(self):
+        """ Averages the accumulators """
         self.success_rate = Stats.avg(self.success_rate_accumulator)
         self.mbf = Stats.avg(self.mbf_accumulator)
         self.aes = Stats.avg(self.aes_accumulator)
         self.mean_time = Stats.avg(self.time_accumulator)
 
+        self._calculate_phase_means()
+
+    def _calculate_phase_means(self):
+        """ Averages the time and count of every phase per run, and its time per generation """
+        runs = [run for run in self.phase_accumulator if len(run) > 0]
+        if len(runs) == 0:
+            return
+
+        generations = sum(len(run) for run in runs)
+        seconds, counts = dict(), dict()
+
+        for run in runs:
+            for generation in run:
+                for phase, (phase_seconds, phase_count) in generation.items():
+                    seconds[phase] = seconds.get(phase, 0.0) + phase_seconds
+                    counts[phase] = counts.get(phase, 0) + phase_count
+
+        self.phase_times = {phase: total / len(runs) for phase, total in seconds.items()}
+        self.phase_counts = {phase: total / len(runs) for phase, total in counts.items()}
+        self.phase_generation_times = {phase: total / generations for phase, total in seconds.items()}
+
     #
     # Auxiliary methods
     #
@@ -182,29 +551,18 @@ class Stats(object):
 
     def persist(self) -> None:
         """
-        Makes or append execution result to file. If no valid format is specified CSV will be used as default
+        Appends the execution report to the report file, along with the per generation telemetry to the telemetry file,
+        if configured, through their report writers
         Returns: None
 
         """
-        if self.config.report_format == ReportFormat.JSON:
-            with open(self.config.report_path, mode='a+') as f:
-                f.writelines(f'{dict(self)}' + '\n')
-        else:
-            with open(self.config.report_path, mode='a+') as f:
-                f.writelines(self._to_csv() + '\n')
+        timestamp = datetime.now(timezone.utc).isoformat()
 
-    def _to_csv(self):
-        """
-        Generates Comma Separated Value (csv) representation of a Stats instance object
-        Returns: String, csv instance representation
-
-        """
-        csv = f'{time()}' + '\t'
+        writer = get_report_writer(self.config.report_path, self.config)
+        writer.write([{'timestamp': timestamp, **dict(self)}])
+        writer.flush()
 
-        for k, v in self.__dict__.items():
-            if not type(v) is dict:
-                csv = csv + str(v) + '\t'
-            else:
-                for _, vi in v.items():
-                    csv = csv + str(vi) + '\t'
-        return csv
+        if self.config.telemetry_path:
+            writer = get_report_writer(self.config.telemetry_path, self.config)
+            writer.write(self.telemetry.records(timestamp))
+            writer.flush()
@@ -0,0 +1,215 @@
+""" Persistent fitness store module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import json
+import sqlite3
+import time
+from threading import Lock
+from typing import List, Optional, Tuple, Dict
+
+from PatternOmatic.settings.log import LOG
+
+# Number of pending writes that triggers a flush
+FLUSH_SIZE = 512
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fitness (
+    digest TEXT NOT NULL,
+    fitness_type INTEGER NOT NULL,
+    fenotype TEXT NOT NULL,
+    contact REAL NOT NULL,
+    coverage TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    UNIQUE (digest, fitness_type, fenotype)
+);
+CREATE INDEX IF NOT EXISTS fitness_last_used ON fitness (last_used);
+"""
+
+
+class FitnessStore(object):
+    """
+    SQLite backed store of the scores of fenotypes against sample sets, shared across executions (and processes).
+    Entries are keyed by sample set digest, fitness type and canonical fenotype, holding the matching score of the
+    fenotype (before any penalty) along with the bitmap of the samples it hits. The least recently used entries are
+    evicted once the store grows beyond its size limit
+    """
+    __slots__ = ('path', 'max_entries', '_connection', '_lock', '_pending', '_used', '_size')
+
+    def __init__(self, path: str, max_entries: int = 1000000):
+        """
+        FitnessStore constructor, creates the store if it does not exist yet
+        Args:
+            path: OS path of the SQLite database file
+            max_entries: Maximum number of entries kept
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._connection = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(_SCHEMA)
+        self._lock = Lock()
+        self._pending = dict()
+        self._used = dict()
+        self._size = self._count()
+
+    @staticmethod
+    def key(digest: str, fitness_type: int, fenotype: List[dict]) -> Tuple[str, int, str]:
+        """
+        Builds the key of a fenotype scored against a sample set
+        Args:
+            digest: Digest of the sample set
+            fitness_type: Value of the FitnessType used
+            fenotype: Spacy's Rule Based Matcher pattern
+
+        Returns: Key tuple, holding the canonical JSON representation of the fenotype
+
+        """
+        return digest, fitness_type, json.dumps(fenotype, sort_keys=True, separators=(',', ':'))
+
+    def get(self, key: Tuple[str, int, str]) -> Optional[Tuple[float, int]]:
+        """
+        Looks a fenotype score up
+        Args:
+            key: Key tuple
+
+        Returns: Matching score and coverage bitmap of the fenotype, None if not stored
+
+        """
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+
+            row = self._connection.execute(
+                'SELECT contact, coverage FROM fitness WHERE digest = ? AND fitness_type = ? AND fenotype = ?',
+                key).fetchone()
+
+            if row is None:
+                return None
+
+            self._used[key] = time.time()
+            return row[0], int(row[1], 16)
+
+    def put(self, key: Tuple[str, int, str], contact: float, coverage: int) -> None:
+        """
+        Stores a fenotype score, writes are flushed in batches
+        Args:
+            key: Key tuple
+            contact: Matching score of the fenotype
+            coverage: Bitmap of the samples hit by the fenotype
+
+        Returns: None
+
+        """
+        with self._lock:
+            self._pending[key] = (contact, coverage)
+            pending = len(self._pending)
+
+        if pending >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """ Writes the pending entries and recency updates down, evicting entries beyond the size limit """
+        with self._lock:
+            now = time.time()
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO fitness VALUES (?, ?, ?, ?, ?, ?)',
+                    [(*key, contact, format(coverage, 'x'), now) for key, (contact, coverage) in self._pending.items()])
+                self._connection.executemany(
+                    'UPDATE fitness SET last_used = ? WHERE digest = ? AND fitness_type = ? AND fenotype = ?',
+                    [(used, *key) for key, used in self._used.items()])
+
+                # Counting is linear, so the store size is just estimated until it may be beyond its limit
+                self._size += len(self._pending)
+                if self._size > self.max_entries:
+                    self._evict()
+
+            self._pending.clear()
+            self._used.clear()
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Flushes, evicts the entries beyond the size limit and reclaims the space they took on disk
+        Returns: Number of entries before and after the compaction
+
+        """
+        with self._lock:
+            before = self._count()
+
+        self.flush()
+
+        with self._lock:
+            with self._connection:
+                self._evict()
+            self._connection.execute('VACUUM')
+            after = self._count()
+
+        LOG.info(f'Fitness store {self.path} compacted from {before} to {after} entries')
+        return {'before': before, 'after': after}
+
+    def close(self) -> None:
+        """ Flushes and closes the store """
+        self.flush()
+        self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
+
+    def _count(self) -> int:
+        return self._connection.execute('SELECT COUNT(*) FROM fitness').fetchone()[0]
+
+    def _evict(self) -> None:
+        """ Deletes the least recently used entries beyond the size limit """
+        excess = self._count() - self.max_entries
+        if excess > 0:
+            LOG.debug('Evicting %d entries from the fitness store', excess)
+            self._connection.execute(
+                'DELETE FROM fitness WHERE rowid IN (SELECT rowid FROM fitness ORDER BY last_used LIMIT ?)', (excess,))
+        self._size = self._count()
+
+
+#
+# Process wide stores
+#
+_STORES: Dict[str, FitnessStore] = dict()
+_STORES_LOCK = Lock()
+
+
+def get_fitness_store(config) -> Optional[FitnessStore]:
+    """
+    Gets the fitness store set up at the given configuration, opened once per process
+    Args:
+        config: Configuration of the execution
+
+    Returns: FitnessStore instance, None if no fitness store path is configured
+
+    """
+    if not config.fitness_store_path:
+        return None
+
+    path = config.fitness_store_path
+
+    with _STORES_LOCK:
+        if path not in _STORES:
+            _STORES[path] = FitnessStore(path, config.fitness_store_max_entries)
+
+    return _STORES[path]
@@ -18,46 +18,60 @@ You should have received a copy of the GNU Lesser General Public License
 along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 
 """
-from inspect import getmembers
+from math import gcd
+from functools import reduce
+from collections import Counter
 from spacy.tokens import Doc, Token
-from PatternOmatic.settings.config import Config
+from PatternOmatic.nlp.samples import FeatureIndex, SampleSet
+from PatternOmatic.settings.config import Config, FrozenConfig
 from PatternOmatic.settings.literals import S, P, T, F, OP, NEGATION, ZERO_OR_ONE, ZERO_OR_MORE, ONE_OR_MORE, LENGTH, \
     XPS, IN, NOT_IN, EQQ, GEQ, LEQ, GTH, LTH, TOKEN_WILDCARD, UNDERSCORE, EF, ORTH, TEXT, LOWER, POS, TAG, DEP, LEMMA, \
     SHAPE, ENT_TYPE, IS_ALPHA, IS_ASCII, IS_DIGIT, IS_BRACKET, IS_LOWER, IS_PUNCT, IS_QUOTE, IS_SPACE, IS_TITLE, \
-    IS_OOV, IS_UPPER, IS_STOP, IS_CURRENCY, IS_LEFT_PUNCT, IS_RIGHT_PUNCT, LIKE_NUM, LIKE_EMAIL, \
-    LANG, NORM, PREFIX, SENTIMENT, STRING, SUFFIX, TEXT_WITH_WS, WHITESPACE, LIKE_URL, MATCHER_SUPPORTED_ATTRIBUTES, \
+    FitnessType, IS_OOV, IS_UPPER, IS_STOP, IS_CURRENCY, IS_LEFT_PUNCT, IS_RIGHT_PUNCT, LIKE_NUM, LIKE_EMAIL, \
+    LANG, NORM, PREFIX, SENTIMENT, STRING, SUFFIX, TEXT_WITH_WS, WHITESPACE, LIKE_URL, MATCHER_UNSUPPORTED_ATTRIBUTES, \
     ENT_ID, ENT_IOB, ENT_KB_ID, HAS_VECTOR
-from PatternOmatic.settings.log import LOG
+from PatternOmatic.settings.log import LOG, Abbreviated
 
 
 #
 # Dynamic Grammar (Backus Naur Form) Generator
 #
-def dynamic_generator(samples: [Doc]) -> dict:
+def dynamic_generator(samples: [Doc], config: FrozenConfig = None) -> dict:
     """
     Dynamically generates a grammar in Backus Naur Form (BNF) notation representing the available Spacy NLP
     Linguistic Feature values of the given sample list of Doc instances
     Args:
         samples: List of Spacy Doc objects
+        config: Optional configuration of the execution (Fallbacks to the Config Singleton)
 
     Returns: Backus Naur Form grammar notation encoded in a dictionary
 
     """
-    config = Config()
+    config = Config() if config is None else config
 
-    LOG.info(f'Generating BNF based on the following samples: {str(samples)}')
+    LOG.info('Generating BNF based on the following samples: %s', Abbreviated(samples))
 
     # BNF root
     pattern_grammar = {S: [P]}
 
     # Watch out features of seen samples and max number of tokens per sample
-    max_length_token, min_length_token, features_dict, extended_features = _features_seen(samples)
+    max_length_token, min_length_token, features_dict, extended_features, length_counts, feature_index = \
+        _features_seen(samples, config)
 
-    # Update times token per pattern [Min length of tokens, Max length of tokens] interval
-    pattern_grammar[P] = _symbol_stacker(T, max_length_token, min_length_token)
+    # Keep the feature co-occurrence index along the samples, so impossible patterns are not scored
+    if isinstance(samples, SampleSet):
+        samples.feature_index = feature_index
+
+    # Update times token per pattern, seen lengths only when patterns must fully match samples with no operators
+    if config.fitness_function_type == FitnessType.FULL_MATCH and config.use_grammar_operators is False:
+        pattern_grammar[P] = _seen_length_stacker(T, length_counts, config.weight_pattern_lengths,
+                                                 1 << (config.codon_length - 1))
+    else:
+        # [Min length of tokens, Max length of tokens] interval
+        pattern_grammar[P] = _symbol_stacker(T, max_length_token, min_length_token)
 
     # Update times features per token (Max length of features)
-    pattern_grammar[T] = _symbol_stacker(F, _get_features_per_token(features_dict))
+    pattern_grammar[T] = _symbol_stacker(F, _get_features_per_token(features_dict, config))
 
     if config.use_token_wildcard is True:
         pattern_grammar[T].append(TOKEN_WILDCARD)
@@ -78,9 +92,9 @@ def dynamic_generator(samples: [Doc]) -> dict:
         pattern_grammar.update({k: v})
 
     if config.use_custom_attributes is True:
-        pattern_grammar = _add_custom_attributes(pattern_grammar, extended_features)
+        pattern_grammar = _add_custom_attributes(pattern_grammar, extended_features, config)
 
-    LOG.info(f'Dynamically generated BNF: {str(pattern_grammar)}')
+    LOG.info('Dynamically generated BNF: %s', Abbreviated(pattern_grammar))
 
     return pattern_grammar
 
@@ -88,16 +102,19 @@ def dynamic_generator(samples: [Doc]) -> dict:
 #
 # BNF Utilities
 #
-def _features_seen(samples: [Doc]) -> (int, int, dict, dict):
+def _features_seen(samples: [Doc], config: FrozenConfig = None) -> (int, int, dict, dict, Counter, FeatureIndex):
     """
     Builds up a dictionary containing Spacy Linguistic Feature Keys and their respective seen values for the sample
     Args:
         samples: List of Spacy Doc objects
+        config: Optional configuration of the execution (Fallbacks to the Config Singleton)
 
-    Returns: Integer, the max length of a doc within the sample and a dict of features
+    Returns: Integer, the max length of a doc within the sample, integer, the min length of a doc within the sample,
+    a dict of features, a dict of extended features, a Counter of the number of samples per length and the feature
+    co-occurrence index of the samples
 
     """
-    config = Config()
+    config = Config() if config is None else config
 
     # Just tokenizer features
     orth_list = []
@@ -119,15 +136,36 @@ def _features_seen(samples: [Doc]) -> (int, int, dict, dict):
     # Capture the len of the largest doc
     max_doc_length = 0
     min_doc_length = 999999999
+    length_counts = Counter()
+
+    # Token feature co-occurrence and adjacency index
+    feature_index = FeatureIndex()
 
     # Set token extensions
     if config.use_custom_attributes is True:
-        _set_token_extension_attributes(samples[0][0])
+        _set_token_extension_attributes(samples)
         extended_features = _extended_features_seen([token for sample in samples for token in sample])
     else:
         extended_features = {UNDERSCORE: {}}
 
-    for sample in samples:
+    # Collapsed samples count as many times as samples they stand for
+    weights = getattr(samples, 'weights', None) or [1] * len(samples)
+
+    for sample, weight in zip(samples, weights):
+        sample_length = len(sample)
+        length_counts[sample_length] += weight
+        feature_index.add(sample)
+
+    # Without uniques, feature values are weighted by repetition, so collapsed samples are walked in their original
+    # order as many times as samples they stand for
+    if config.use_uniques is True:
+        walked = samples
+    else:
+        origins = getattr(samples, 'origins', None) or [[index] for index in range(len(samples))]
+        order = sorted((origin, index) for index, sample_origins in enumerate(origins) for origin in sample_origins)
+        walked = [samples[index] for _, index in order]
+
+    for sample in walked:
         sample_length = len(sample)
 
         for token in sample:
@@ -193,43 +231,29 @@ def _features_seen(samples: [Doc]) -> (int, int, dict, dict):
     features = _feature_pruner(features)
     extended_features[UNDERSCORE] = _feature_pruner(extended_features[UNDERSCORE])
 
-    return max_doc_length, min_doc_length, features, extended_features
+    return max_doc_length, min_doc_length, features, extended_features, length_counts, feature_index
 
 
-def _set_token_extension_attributes(token: Token) -> None:
+def _set_token_extension_attributes(samples: [Doc]) -> None:
     """
-    Given a Spacy Token instance, register all the Spacy token attributes not accepted by the Spacy Matcher
-    as custom attributes inside the Token Extensions (token._. space)
-    Returns: None
-
-    """
-    # Retrieve cleaned up Token Attributes
-    token_attributes = _clean_token_attributes(
-        {k: v for k, v in getmembers(token) if type(v) in (str, bool, float)})
-
-    # Set token custom attributes
-    lambda_list = []
-    i = 0
-    for k, v in token_attributes.items():
-        lambda_list.append(lambda token_=token, k_=k: getattr(token_, k_))
-        token.set_extension(str('custom_'+k).upper(), getter=lambda_list[i])
-        i += 1
-
-
-def _clean_token_attributes(token_attributes: dict) -> dict:
-    """
-    Removes from input dict keys contained in a set that represents the Spacy Matcher supported token attributes
+    Registers all the Spacy token attributes not accepted by the Spacy Matcher as custom attributes inside the Token
+    Extensions (token._. space). Their values are computed once per sample and stored in the Doc's user data, so the
+    Matcher reads them back as plain values instead of running a getter per token and per pattern
     Args:
-        token_attributes: dict of token features
+        samples: List of Spacy Doc objects
 
-    Returns: Token attributes dict without Spacy Matcher's supported attribute keys
+    Returns: None
 
     """
-    token_attributes.pop('__doc__')
-    for item in MATCHER_SUPPORTED_ATTRIBUTES:
-        token_attributes.pop(item)
+    extensions = [(attribute, str('custom_' + attribute).upper()) for attribute in MATCHER_UNSUPPORTED_ATTRIBUTES]
 
-    return token_attributes
+    for _, extension in extensions:
+        Token.set_extension(extension, default=None, force=True)
+
+    for sample in samples:
+        for token in sample:
+            for attribute, extension in extensions:
+                token._.set(extension, getattr(token, attribute))
 
 
 def _extended_features_seen(tokens: [Token]) -> dict:
@@ -325,16 +349,53 @@ def _symbol_stacker(symbol: str, max_length: int, min_length: int = 1) -> list:
     return symbol_times_list
 
 
-def _get_features_per_token(features_dict: dict) -> int:
+def _seen_length_stacker(symbol: str, length_counts: Counter, use_weights: bool = False,
+                         max_productions: int = 0) -> list:
+    """
+    Given a symbol creates a list with one item per seen length, where each item is the symbol repeated that length.
+    If weights are used, each item is repeated proportionally to the number of samples of its length. Translation
+    picks productions by codon modulo the number of productions, so a repeated production is fired more often. As
+    codons can not pick productions beyond their range, repetitions are scaled down to fit it, keeping every length
+    at least once
+    Args:
+        symbol: string
+        length_counts: Counter of the number of samples per length
+        use_weights: boolean, whether to repeat items by how often their length was seen
+        max_productions: Number of values a codon may take, 0 or less for no limit
+
+    Returns: list of symbol
+
+    """
+    stack = _symbol_stacker(symbol, max(length_counts))
+    lengths = sorted(length_counts)
+
+    if use_weights is True:
+        divisor = reduce(gcd, length_counts.values())
+        repeats = {length: length_counts[length] // divisor for length in lengths}
+        total = sum(repeats.values())
+
+        if 0 < max_productions < total:
+            repeats = {length: max(1, round(repeat * max_productions / total)) for length, repeat in repeats.items()}
+            # Rounding up may still overflow the codon range, trim the most repeated lengths
+            while sum(repeats.values()) > max_productions and max(repeats.values()) > 1:
+                repeats[max(repeats, key=repeats.get)] -= 1
+
+        return [stack[length - 1] for length in lengths for _ in range(repeats[length])]
+
+    return [stack[length - 1] for length in lengths]
+
+
+def _get_features_per_token(features_dict: dict, config: FrozenConfig = None) -> int:
     """
     Given the configuration set up, determine the maximum number of features per token at grammar
     Args:
         features_dict: dictionary of features keys with all possible feature value options
+        config: Optional configuration of the execution (Fallbacks to the Config Singleton)
 
     Returns: integer
 
     """
-    config = Config()
+    config = Config() if config is None else config
 
     if config.features_per_token <= 0:
         max_length_features = len(features_dict.keys())
@@ -420,17 +481,19 @@ def _all_feature_terminal_list(features_dict: dict) -> list:
     return all_terminal_list
 
 
-def _add_custom_attributes(pattern_grammar: dict, extended_features: dict) -> dict:
+def _add_custom_attributes(pattern_grammar: dict, extended_features: dict, config: FrozenConfig = None) -> dict:
     """
     Adds support to a specific set of custom attributes at BNF dict
     Args:
         pattern_grammar: BNF dict
         extended_features: dict of token features not supported by default by the Spacy's Matcher
+        config: Optional configuration of the execution (Fallbacks to the Config Singleton)
 
     Returns: Backus Naur Form grammar notation encoded in a dictionary with Spacy's custom attributes
 
     """
-    pattern_grammar[UNDERSCORE] = _symbol_stacker(EF, _get_features_per_token(extended_features[UNDERSCORE]))
+    pattern_grammar[UNDERSCORE] = \
+        _symbol_stacker(EF, _get_features_per_token(extended_features[UNDERSCORE], config))
     pattern_grammar[EF] = list(extended_features[UNDERSCORE].keys())
     pattern_grammar.update(extended_features[UNDERSCORE].items())
     pattern_grammar[T].append(UNDERSCORE)
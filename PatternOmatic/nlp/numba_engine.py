@@ -0,0 +1,137 @@
+""" Numba compiled fitness engine module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from PatternOmatic.nlp.samples import TokenEncoding
+from PatternOmatic.settings.log import LOG
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _coverage(matrix: np.ndarray, lengths: np.ndarray, attributes: np.ndarray, codes: np.ndarray,
+              full_match: bool) -> np.ndarray:
+    """
+    Matches a compiled pattern against every encoded sample
+    Args:
+        matrix: Codes matrix of shape (attributes, samples, longest sample length)
+        lengths: Array of sample lengths
+        attributes: Attribute index of each pattern token constraint, of shape (pattern length, constraints), -1 if none
+        codes: Code each pattern token constraint expects, of shape (pattern length, constraints)
+        full_match: Whether the pattern has to match a whole sample
+
+    Returns: Boolean array, True for the samples covered by the pattern
+
+    """
+    size = attributes.shape[0]
+    covered = np.zeros(lengths.shape[0], dtype=np.bool_)
+
+    for s in range(lengths.shape[0]):
+        if full_match:
+            last = 0 if size == lengths[s] else -1
+        else:
+            last = lengths[s] - size
+
+        for start in range(last + 1):
+            matched = True
+            for t in range(size):
+                for k in range(attributes.shape[1]):
+                    if attributes[t, k] >= 0 and matrix[attributes[t, k], s, start + t] != codes[t, k]:
+                        matched = False
+                        break
+                if not matched:
+                    break
+
+            if matched:
+                covered[s] = True
+                break
+
+    return covered
+
+
+_coverage_kernel = njit(cache=True, nogil=True)(_coverage) if njit is not None else None
+
+_warned = False
+
+
+def compile_pattern(fenotype: List[dict], encoding: TokenEncoding) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Compiles a pattern into arrays of token constraints over the encoded samples
+    Args:
+        fenotype: Spacy's Rule Based Matcher pattern
+        encoding: TokenEncoding of the samples
+
+    Returns: Attribute index and expected code arrays, None if the pattern uses Grammar Operators, Extended Pattern
+    Syntax or attributes that are not encoded
+
+    """
+    if len(fenotype) == 0 or not all(isinstance(token, dict) for token in fenotype):
+        return None
+
+    width = max(1, max(len(token) for token in fenotype))
+    attributes = np.full((len(fenotype), width), -1, dtype=np.int64)
+    codes = np.full((len(fenotype), width), -1, dtype=np.int64)
+
+    for t, token in enumerate(fenotype):
+        for k, (attribute, value) in enumerate(token.items()):
+            if attribute not in encoding.attributes or isinstance(value, (dict, list)):
+                return None
+            attributes[t, k] = encoding.attributes[attribute]
+            codes[t, k] = encoding.code(attribute, value)
+
+    return attributes, codes
+
+
+def coverage(fenotype: List[dict], samples: list, full_match: bool) -> Optional[int]:
+    """
+    Finds the samples covered by a pattern with the compiled kernel
+    Args:
+        fenotype: Spacy's Rule Based Matcher pattern
+        samples: SampleSet of Spacy Doc objects
+        full_match: Whether the pattern has to match a whole sample
+
+    Returns: Coverage bitmap, None if the pattern (or the samples) can not be handled by this engine or numba is
+    not installed
+
+    """
+    global _warned
+
+    if _coverage_kernel is None:
+        if _warned is False:
+            LOG.warning('Numba fitness engine requested but numba is not installed, falling back to the Matcher')
+            _warned = True
+        return None
+
+    encoding = getattr(samples, 'encoding', None)
+    if encoding is None:
+        return None
+
+    compiled = compile_pattern(fenotype, encoding)
+    if compiled is None:
+        return None
+
+    matrix, lengths = encoding.arrays()
+    covered = _coverage_kernel(matrix, lengths, compiled[0], compiled[1], full_match)
+    return sum(1 << int(index) for index in np.flatnonzero(covered))
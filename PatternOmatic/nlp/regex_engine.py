@@ -0,0 +1,207 @@
+""" Regular expression fitness engine module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import json
+import operator
+import re
+from typing import List, Optional, Pattern, Set
+
+from PatternOmatic.nlp.samples import TokenEncoding, OP_KEY, SYMBOL_SEPARATOR, SYMBOL_OFFSET
+from PatternOmatic.settings.literals import NEGATION, ZERO_OR_ONE, ONE_OR_MORE, ZERO_OR_MORE, IN, NOT_IN, EQQ, GEQ, \
+    LEQ, GTH, LTH, XPS_AS
+
+# Maximum number of compiled patterns kept per sample set, the least recently used ones are dropped first
+PATTERN_CACHE_SIZE = 8192
+
+_SEPARATOR = re.escape(SYMBOL_SEPARATOR)
+_NEVER = '(?!)'
+
+_QUANTIFIERS = {ZERO_OR_ONE: '?', ONE_OR_MORE: '+', ZERO_OR_MORE: '*'}
+
+_PREDICATES = {
+    IN[1:-1]: lambda value, values: value in values,
+    NOT_IN[1:-1]: lambda value, values: value not in values,
+    XPS_AS[EQQ]: operator.eq,
+    XPS_AS[GEQ]: operator.ge,
+    XPS_AS[LEQ]: operator.le,
+    XPS_AS[GTH]: operator.gt,
+    XPS_AS[LTH]: operator.lt
+}
+
+
+def compile_pattern(fenotype: List[dict], encoding: TokenEncoding) -> Optional[Pattern]:
+    """
+    Compiles a pattern into a regular expression over the encoded samples strings. Every token pattern turns into a
+    token record expression, Grammar Operators into the matching regular expression quantifiers (or a negative
+    lookahead for the negation) and Extended Pattern Syntax predicates into classes of the codes satisfying them
+    Args:
+        fenotype: Spacy's Rule Based Matcher pattern
+        encoding: TokenEncoding of the samples
+
+    Returns: Compiled regular expression, None if the pattern uses attributes that are not encoded or predicates
+    that can not be evaluated
+
+    """
+    if len(fenotype) == 0 or not all(isinstance(token, dict) for token in fenotype):
+        return None
+
+    expression = []
+
+    for token in fenotype:
+        slots = [None] * len(encoding.attributes)
+
+        for attribute, value in token.items():
+            if attribute == OP_KEY:
+                continue
+            if attribute not in encoding.attributes:
+                return None
+
+            slot = _compile_value(attribute, value, encoding)
+            if slot is None:
+                return None
+            slots[encoding.attributes[attribute]] = slot
+
+        record = _SEPARATOR + _record(slots)
+        op = token.get(OP_KEY)
+
+        if op is None:
+            expression.append(record)
+        elif op == NEGATION:
+            expression.append(f'(?!{record}){_SEPARATOR}.{{{len(slots)}}}')
+        elif op in _QUANTIFIERS:
+            expression.append(f'(?:{record}){_QUANTIFIERS[op]}')
+        else:
+            return None
+
+    return re.compile(''.join(expression), re.DOTALL)
+
+
+def coverage(fenotype: List[dict], samples: list, full_match: bool) -> Optional[int]:
+    """
+    Finds the samples covered by a pattern with its regular expression, compiled once per sample set
+    Args:
+        fenotype: Spacy's Rule Based Matcher pattern
+        samples: SampleSet of Spacy Doc objects
+        full_match: Whether the pattern has to match a whole sample
+
+    Returns: Coverage bitmap, None if the pattern (or the samples) can not be handled by this engine
+
+    """
+    encoding = getattr(samples, 'encoding', None)
+    if encoding is None:
+        return None
+
+    regex = _cached_pattern(fenotype, encoding)
+    if regex is None:
+        return None
+
+    covered = 0
+    for index, symbols in enumerate(encoding.symbols()):
+        if full_match:
+            hit = regex.fullmatch(symbols) is not None
+        else:
+            # Empty matches (of patterns made of optional tokens only) are not matches for the Spacy's Matcher
+            hit = any(match.end() > match.start() for match in regex.finditer(symbols))
+        if hit:
+            covered |= 1 << index
+
+    return covered
+
+
+def _cached_pattern(fenotype: List[dict], encoding: TokenEncoding) -> Optional[Pattern]:
+    """ Looks the compiled regular expression of a pattern up, compiling it if not cached """
+    key = json.dumps(fenotype, sort_keys=True)
+    cache = encoding.compiled_patterns
+
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    regex = cache[key] = compile_pattern(fenotype, encoding)
+    if len(cache) > PATTERN_CACHE_SIZE:
+        cache.popitem(last=False)
+
+    return regex
+
+
+def _record(slots: List[Optional[str]]) -> str:
+    """ Joins the expressions of the attributes of a token record, runs of unconstrained attributes being merged """
+    expression = []
+    run = 0
+
+    for slot in slots:
+        if slot is None:
+            run += 1
+            continue
+        if run > 0:
+            expression.append('.' if run == 1 else f'.{{{run}}}')
+            run = 0
+        expression.append(slot)
+
+    if run > 0:
+        expression.append('.' if run == 1 else f'.{{{run}}}')
+
+    return ''.join(expression)
+
+
+def _compile_value(attribute: str, value, encoding: TokenEncoding) -> Optional[str]:
+    """
+    Compiles the value expected for an attribute into the expression of its code point
+    Args:
+        attribute: Pattern attribute name
+        value: Pattern value, plain or Extended Pattern Syntax dict
+        encoding: TokenEncoding of the samples
+
+    Returns: Regular expression matching a single code point, None if the value can not be compiled
+
+    """
+    if isinstance(value, list):
+        return None
+
+    if not isinstance(value, dict):
+        code = encoding.code(attribute, value)
+        return _NEVER if code < 0 else re.escape(chr(code + SYMBOL_OFFSET))
+
+    values = encoding.values[attribute]
+    allowed = set(values.values())
+
+    for predicate, argument in value.items():
+        if predicate not in _PREDICATES:
+            return None
+        try:
+            allowed &= {code for held, code in values.items() if _PREDICATES[predicate](held, argument)}
+        except TypeError:
+            return None
+
+    return _code_class(allowed, set(values.values()) - allowed)
+
+
+def _code_class(allowed: Set[int], disallowed: Set[int]) -> str:
+    """ Smallest character class matching the allowed codes and none of the disallowed ones """
+    if len(disallowed) == 0:
+        return '.'
+    if len(allowed) == 0:
+        return _NEVER
+    if len(allowed) == 1:
+        return re.escape(chr(next(iter(allowed)) + SYMBOL_OFFSET))
+
+    negated = len(disallowed) < len(allowed)
+    codes = sorted(disallowed if negated else allowed)
+    return ('[^' if negated else '[') + ''.join(re.escape(chr(code + SYMBOL_OFFSET)) for code in codes) + ']'
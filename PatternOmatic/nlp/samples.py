@@ -0,0 +1,371 @@
+""" Samples related classes module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import hashlib
+from collections import OrderedDict
+import numpy as np
+from typing import List, Iterable, Any, Tuple
+from spacy.tokens import Doc
+
+from PatternOmatic.settings.literals import OP, MATCHER_UNSUPPORTED_ATTRIBUTES
+
+
+#
+# Token attributes as read by the Spacy's Matcher, keyed by pattern attribute name
+#
+INDEXED_ATTRIBUTES = {
+    'ORTH': lambda token: token.orth_,
+    'TEXT': lambda token: token.text,
+    'LOWER': lambda token: token.lower_,
+    'LENGTH': lambda token: len(token),
+    'POS': lambda token: token.pos_,
+    'TAG': lambda token: token.tag_,
+    'DEP': lambda token: token.dep_,
+    'LEMMA': lambda token: token.lemma_,
+    'SHAPE': lambda token: token.shape_,
+    'ENT_TYPE': lambda token: token.ent_type_,
+    'IS_ALPHA': lambda token: token.is_alpha,
+    'IS_ASCII': lambda token: token.is_ascii,
+    'IS_DIGIT': lambda token: token.is_digit,
+    'IS_LOWER': lambda token: token.is_lower,
+    'IS_UPPER': lambda token: token.is_upper,
+    'IS_TITLE': lambda token: token.is_title,
+    'IS_PUNCT': lambda token: token.is_punct,
+    'IS_SPACE': lambda token: token.is_space,
+    'IS_STOP': lambda token: token.is_stop,
+    'LIKE_NUM': lambda token: token.like_num,
+    'LIKE_URL': lambda token: token.like_url,
+    'LIKE_EMAIL': lambda token: token.like_email
+}
+
+OP_KEY = OP[1:-1]
+
+# Code point leading every token record of the encoded samples strings, attribute codes being shifted past it
+SYMBOL_SEPARATOR = '\x00'
+SYMBOL_OFFSET = 1
+
+
+class FeatureIndex(object):
+    """
+    Token feature co-occurrence and adjacency index over a list of samples.
+
+    Every token of every sample owns a bit position, samples being laid out one after another with an unused position
+    in between. Each (attribute, value) pair maps to the bitmap of the positions whose token holds that value, so the
+    tokens holding a combination of values are given by an AND of bitmaps, and the tokens following them by a shift.
+    """
+    __slots__ = ('postings', 'positions', 'starts', 'ends', 'size')
+
+    def __init__(self):
+        self.postings = dict()
+        self.positions = 0
+        self.starts = 0
+        self.ends = 0
+        self.size = 0
+
+    def add(self, sample: Doc) -> None:
+        """
+        Indexes the tokens of a sample
+        Args:
+            sample: Spacy Doc object
+
+        Returns: None
+
+        """
+        if len(sample) == 0:
+            return
+
+        for token in sample:
+            bit = 1 << (self.size + token.i)
+            self.positions |= bit
+            for attribute, getter in INDEXED_ATTRIBUTES.items():
+                key = (attribute, getter(token))
+                self.postings[key] = self.postings.get(key, 0) | bit
+
+        self.starts |= 1 << self.size
+        self.ends |= 1 << (self.size + len(sample) - 1)
+        self.size += len(sample) + 1
+
+    def is_feasible(self, fenotype: List[dict], full_match: bool = False) -> bool:
+        """
+        Checks, in O(pattern length) bitmap operations, whether a pattern could match any of the indexed samples. Only
+        attributes compared by equality are taken into account, the rest of them are assumed to always match. Patterns
+        using Grammar Operators are considered feasible from their first operator token on
+        Args:
+            fenotype: Spacy's Rule Based Matcher pattern
+            full_match: boolean, whether the pattern has to match a whole sample
+
+        Returns: False if the pattern is guaranteed not to match, True otherwise
+
+        """
+        candidates = self.starts if full_match is True else self.positions
+
+        for index, token_pattern in enumerate(fenotype):
+            if not isinstance(token_pattern, dict) or OP_KEY in token_pattern:
+                return True
+
+            if index > 0:
+                candidates = (candidates << 1) & self.positions
+
+            for attribute, value in token_pattern.items():
+                if attribute in INDEXED_ATTRIBUTES and not isinstance(value, (dict, list)):
+                    candidates &= self.postings.get((attribute, value), 0)
+
+            if candidates == 0:
+                return False
+
+        if full_match is True:
+            return candidates & self.ends != 0
+
+        return True
+
+
+class TokenEncoding(object):
+    """
+    Samples encoded once as integer codes, one per token and indexed attribute. Values are interned per attribute, so
+    checking a token attribute against a pattern value is an integer comparison
+    """
+    __slots__ = ('attributes', 'values', 'tokens', 'compiled_patterns', 'batch_coverages', '_arrays', '_symbols')
+
+    def __init__(self, samples: Iterable[Doc]):
+        self.attributes = {attribute: index for index, attribute in enumerate(INDEXED_ATTRIBUTES)}
+        self.values = {attribute: dict() for attribute in INDEXED_ATTRIBUTES}
+        self.tokens = [[self._encode(token) for token in sample] for sample in samples]
+        self.compiled_patterns = OrderedDict()
+        self.batch_coverages = dict()
+        self._arrays = None
+        self._symbols = None
+
+    def code(self, attribute: str, value: Any) -> int:
+        """
+        Looks the code of an attribute value up
+        Args:
+            attribute: Pattern attribute name
+            value: Pattern value
+
+        Returns: Code of the value, -2 if no token holds it
+
+        """
+        return self.values[attribute].get(value, -2)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lays the encoded samples out as a padded matrix, built once
+        Returns: Codes matrix of shape (attributes, samples, longest sample length) padded with -1, and the array of
+        sample lengths
+
+        """
+        if self._arrays is None:
+            lengths = np.array([len(tokens) for tokens in self.tokens], dtype=np.int64)
+            matrix = np.full((len(self.attributes), len(self.tokens), max(lengths, default=0)), -1, dtype=np.int64)
+            for s, tokens in enumerate(self.tokens):
+                for t, codes in enumerate(tokens):
+                    matrix[:, s, t] = codes
+            self._arrays = (matrix, lengths)
+
+        return self._arrays
+
+    def symbols(self) -> List[str]:
+        """
+        Lays the encoded samples out as strings, built once. Every token is written down as a record made of a
+        SYMBOL_SEPARATOR followed by one code point per attribute, the code of its value plus SYMBOL_OFFSET
+        Returns: List of strings, one per sample
+
+        """
+        if self._symbols is None:
+            self._symbols = [''.join(SYMBOL_SEPARATOR + ''.join(chr(code + SYMBOL_OFFSET) for code in codes)
+                                     for codes in tokens)
+                             for tokens in self.tokens]
+
+        return self._symbols
+
+    def _encode(self, token) -> Tuple[int, ...]:
+        """ Codes of every indexed attribute of a token, interning the values not seen before """
+        return tuple(self.values[attribute].setdefault(getter(token), len(self.values[attribute]))
+                     for attribute, getter in INDEXED_ATTRIBUTES.items())
+
+
+class SampleSet(list):
+    """
+    List of Spacy Doc objects along with the structures precomputed over them for the current execution. Samples a
+    Matcher can not tell apart may be collapsed into a single one, weighted by the number of samples it stands for
+    """
+    __slots__ = ('feature_index', 'weights', 'origins', '_digest', '_encoding')
+
+    def __init__(self, samples: Iterable[Doc] = (), weights: List[int] = None, origins: List[List[int]] = None):
+        """
+        SampleSet constructor
+        Args:
+            samples: Spacy Doc objects
+            weights: Optional number of samples each one stands for (Fallbacks to one each)
+            origins: Optional indices of the samples each one stands for (Fallbacks to its own index)
+        """
+        super().__init__(samples)
+        self.feature_index = None
+        self.weights = [1] * len(self) if weights is None else weights
+        self.origins = [[index] for index in range(len(self))] if origins is None else origins
+        self._digest = None
+        self._encoding = None
+
+    @classmethod
+    def deduplicated(cls, samples: Iterable[Doc]) -> 'SampleSet':
+        """
+        Builds a SampleSet collapsing the samples with the same token attribute signature
+        Args:
+            samples: Spacy Doc objects
+
+        Returns: SampleSet of the unique samples, weighted by the number of times they were seen
+
+        """
+        positions = dict()
+        unique, weights, origins = [], [], []
+
+        for index, sample in enumerate(samples):
+            position = positions.setdefault(signature(sample), len(unique))
+            if position == len(unique):
+                unique.append(sample)
+                weights.append(0)
+                origins.append([])
+            weights[position] += 1
+            origins[position].append(index)
+
+        return cls(unique, weights, origins)
+
+    def subset(self, indices: Iterable[int]) -> 'SampleSet':
+        """
+        Builds a SampleSet holding some of these samples, along with their weights
+        Args:
+            indices: Indices of the samples to be kept
+
+        Returns: SampleSet instance
+
+        """
+        indices = list(indices)
+        return SampleSet([self[i] for i in indices], [self.weights[i] for i in indices],
+                         [self.origins[i] for i in indices])
+
+    @property
+    def size(self) -> int:
+        """ Number of samples, counting the collapsed ones """
+        return sum(self.weights)
+
+    @property
+    def dedup_ratio(self) -> float:
+        """ Share of the samples collapsed into others, 0.0 if there were no duplicates """
+        return 1 - len(self) / self.size if self.size > 0 else 0.0
+
+    def expand_coverage(self, coverage: int) -> int:
+        """
+        Maps a coverage bitmap over these samples back to the samples they stand for
+        Args:
+            coverage: Coverage bitmap, bit i being set if the i-th sample of this set is covered
+
+        Returns: Coverage bitmap, bit i being set if the i-th sample originally seen is covered
+
+        """
+        expanded = 0
+        for index in covered_samples(coverage):
+            for origin in self.origins[index]:
+                expanded |= 1 << origin
+        return expanded
+
+    @property
+    def encoding(self) -> TokenEncoding:
+        """ Integer encoding of the samples, built once """
+        if self._encoding is None:
+            self._encoding = TokenEncoding(self)
+
+        return self._encoding
+
+    @property
+    def digest(self) -> str:
+        """
+        Fingerprint of the samples, covering the annotations of their tokens, so the same texts parsed by different
+        language models do not share it, and their weights
+        Returns: Hexadecimal digest
+
+        """
+        if self._digest is None:
+            sha = hashlib.sha1()
+            for sample, weight in zip(self, self.weights):
+                for token in sample:
+                    sha.update(repr((token.text, token.whitespace_, token.pos_, token.tag_, token.dep_, token.head.i,
+                                     token.lemma_, token.ent_type_)).encode('utf-8'))
+                sha.update(f'\x00{weight}\x00'.encode('utf-8'))
+            self._digest = sha.hexdigest()
+
+        return self._digest
+
+
+def signature(sample: Doc) -> Tuple[Tuple[Any, ...], ...]:
+    """
+    Token attribute signature of a sample, the same for samples no pattern can tell apart
+    Args:
+        sample: Spacy Doc object
+
+    Returns: Tuple of the values of every attribute read by the Matcher (custom attributes included), per token
+
+    """
+    return tuple(tuple(getter(token) for getter in INDEXED_ATTRIBUTES.values()) +
+                 tuple(getattr(token, attribute) for attribute in MATCHER_UNSUPPORTED_ATTRIBUTES)
+                 for token in sample)
+
+
+#
+# Coverage bitmaps, bit i being set if the i-th sample is covered
+#
+def covered_samples(coverage: int) -> List[int]:
+    """
+    Lists the indices of the samples covered by a pattern
+    Args:
+        coverage: Coverage bitmap of the pattern
+
+    Returns: List of sample indices
+
+    """
+    return [index for index, bit in enumerate(reversed(bin(coverage)[2:])) if bit == '1']
+
+
+def coverage_union(coverages: Iterable[int]) -> int:
+    """
+    Joins the coverage of several patterns
+    Args:
+        coverages: Coverage bitmaps of the patterns
+
+    Returns: Coverage bitmap of the samples covered by any of the patterns
+
+    """
+    union = 0
+    for coverage in coverages:
+        union |= coverage
+    return union
+
+
+def coverage_overlap(coverage_a: int, coverage_b: int) -> float:
+    """
+    Measures how much the coverage of two patterns overlap (Jaccard index)
+    Args:
+        coverage_a: Coverage bitmap of a pattern
+        coverage_b: Coverage bitmap of another pattern
+
+    Returns: Float within interval [0.0, 1.0], 0.0 if none of them covers any sample
+
+    """
+    union = bin(coverage_a | coverage_b).count('1')
+    return bin(coverage_a & coverage_b).count('1') / union if union > 0 else 0.0
@@ -0,0 +1,182 @@
+""" Shared prefix trie fitness engine module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+from typing import List, Optional, Tuple, Dict
+
+from PatternOmatic.nlp.samples import TokenEncoding
+
+# Token constraint, the (attribute index, code) pairs a token has to hold, and pattern, a tuple of token constraints
+Constraint = Tuple[Tuple[int, int], ...]
+CompiledPattern = Tuple[Constraint, ...]
+
+
+class _Node(object):
+    """ Trie node, reached by the patterns sharing the token constraints along its path """
+    __slots__ = ('children', 'pattern')
+
+    def __init__(self):
+        self.children = dict()
+        self.pattern = None
+
+
+class PatternTrie(object):
+    """
+    Trie of the token constraints of a batch of patterns. Samples are walked once per start position, a shared prefix
+    being tested once for all of the patterns starting with it, and the walk being pruned at the first failing
+    constraint
+    """
+    __slots__ = ('root', 'patterns')
+
+    def __init__(self):
+        self.root = _Node()
+        self.patterns = list()
+
+    def insert(self, pattern: CompiledPattern) -> None:
+        """
+        Inserts a pattern into the trie
+        Args:
+            pattern: Compiled pattern
+
+        Returns: None
+
+        """
+        node = self.root
+        for constraint in pattern:
+            node = node.children.setdefault(constraint, _Node())
+
+        if node.pattern is None:
+            node.pattern = pattern
+            self.patterns.append(pattern)
+
+    def coverages(self, samples: List[List[Tuple[int, ...]]], full_match: bool) -> Dict[CompiledPattern, int]:
+        """
+        Finds the samples covered by every pattern of the trie
+        Args:
+            samples: Encoded samples, as lists of token codes
+            full_match: Whether the patterns have to match a whole sample
+
+        Returns: Coverage bitmap of every pattern inserted
+
+        """
+        covered = dict.fromkeys(self.patterns, 0)
+
+        for index, sample in enumerate(samples):
+            bit = 1 << index
+            for start in range(min(1, len(sample)) if full_match else len(sample)):
+                self._walk(sample, start, full_match, bit, covered)
+
+        return covered
+
+    def _walk(self, sample: List[Tuple[int, ...]], start: int, full_match: bool, bit: int,
+              covered: Dict[CompiledPattern, int]) -> None:
+        """ Walks the trie along a sample from a start position, marking the patterns matching there """
+        stack = [(self.root, start)]
+
+        while stack:
+            node, position = stack.pop()
+            codes = sample[position]
+            last = position + 1 == len(sample)
+
+            for constraint, child in node.children.items():
+                if all(codes[attribute] == code for attribute, code in constraint):
+                    if child.pattern is not None and (last or not full_match):
+                        covered[child.pattern] |= bit
+                    if not last and len(child.children) > 0:
+                        stack.append((child, position + 1))
+
+
+def compile_pattern(fenotype: List[dict], encoding: TokenEncoding) -> Optional[CompiledPattern]:
+    """
+    Compiles a pattern into a tuple of token constraints over the encoded samples
+    Args:
+        fenotype: Spacy's Rule Based Matcher pattern
+        encoding: TokenEncoding of the samples
+
+    Returns: Compiled pattern, None if the pattern uses Grammar Operators, Extended Pattern Syntax or attributes that
+    are not encoded
+
+    """
+    if len(fenotype) == 0 or not all(isinstance(token, dict) for token in fenotype):
+        return None
+
+    pattern = []
+    for token in fenotype:
+        constraint = []
+        for attribute, value in token.items():
+            if attribute not in encoding.attributes or isinstance(value, (dict, list)):
+                return None
+            constraint.append((encoding.attributes[attribute], encoding.code(attribute, value)))
+        pattern.append(tuple(sorted(constraint)))
+
+    return tuple(pattern)
+
+
+def evaluate(fenotypes: List[List[dict]], samples: list, full_match: bool) -> None:
+    """
+    Finds the samples covered by a batch of patterns with a single trie, keeping them for the coverage lookups of the
+    patterns of this batch
+    Args:
+        fenotypes: Spacy's Rule Based Matcher patterns
+        samples: SampleSet of Spacy Doc objects
+        full_match: Whether the patterns have to match a whole sample
+
+    Returns: None
+
+    """
+    encoding = getattr(samples, 'encoding', None)
+    if encoding is None:
+        return
+
+    trie = PatternTrie()
+    for fenotype in fenotypes:
+        pattern = compile_pattern(fenotype, encoding)
+        if pattern is not None:
+            trie.insert(pattern)
+
+    encoding.batch_coverages = {(full_match, pattern): coverage
+                                for pattern, coverage in trie.coverages(encoding.tokens, full_match).items()}
+
+
+def coverage(fenotype: List[dict], samples: list, full_match: bool) -> Optional[int]:
+    """
+    Finds the samples covered by a pattern, looked up from the last batch evaluated or walked on its own otherwise
+    Args:
+        fenotype: Spacy's Rule Based Matcher pattern
+        samples: SampleSet of Spacy Doc objects
+        full_match: Whether the pattern has to match a whole sample
+
+    Returns: Coverage bitmap, None if the pattern (or the samples) can not be handled by this engine
+
+    """
+    encoding = getattr(samples, 'encoding', None)
+    if encoding is None:
+        return None
+
+    pattern = compile_pattern(fenotype, encoding)
+    if pattern is None:
+        return None
+
+    covered = encoding.batch_coverages.get((full_match, pattern))
+    if covered is None:
+        trie = PatternTrie()
+        trie.insert(pattern)
+        covered = trie.coverages(encoding.tokens, full_match)[pattern]
+
+    return covered
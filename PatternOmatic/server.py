@@ -0,0 +1,339 @@
+""" Local HTTP job service module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import json
+import queue
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Event, Lock, Thread
+from typing import List, Dict, Any, Optional, Union, Tuple
+
+from PatternOmatic.api import Session
+from PatternOmatic.settings.config import FrozenConfig
+from PatternOmatic.settings.log import LOG
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+
+# Maximum number of jobs waiting to be run
+DEFAULT_QUEUE_SIZE = 16
+
+# Maximum number of jobs kept to be queried, the oldest finished ones are forgotten first
+JOB_HISTORY_SIZE = 1000
+
+# Configuration parameters jobs may override, just the evolutionary and grammar tuning ones ([GE] and [DGG] sections).
+# Files and logging ([IO] section) stay as the server was configured
+JOB_OVERRIDES = frozenset((
+    'max_runs', 'success_threshold', 'population_size', 'max_generations', 'codon_length',
+    'num_codons_per_individual', 'mutation_probability', 'offspring_max_size_factor', 'mating_probability', 'k_value',
+    'selection_type', 'recombination_type', 'replacement_type', 'fitness_function_type', 'fitness_engine',
+    'racing_sample_size', 'racing_confidence', 'random_seed', 'seed_fraction', 'hall_of_fame_size',
+    'features_per_token', 'use_boolean_features', 'use_custom_attributes', 'use_uniques', 'use_grammar_operators',
+    'use_token_wildcard', 'use_extended_pattern_syntax', 'weight_pattern_lengths'))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class Job(object):
+    """ Pattern finding job submitted to the service """
+    __slots__ = ('id', 'samples', 'config_overrides', 'status', 'patterns', 'fitnesses', 'coverages', 'error', 'stop')
+
+    def __init__(self, samples: List[str], config_overrides: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex
+        self.samples = samples
+        self.config_overrides = config_overrides
+        self.status = QUEUED
+        self.patterns = None
+        self.fitnesses = None
+        self.coverages = None
+        self.error = None
+        self.stop = Event()
+
+    @property
+    def __dict__(self):
+        """ Dictionary representation for a slotted class (that has no dict at all) """
+        return {'id': self.id, 'status': self.status, 'error': self.error}
+
+    @property
+    def finished(self) -> bool:
+        """ Whether the job will not be run anymore """
+        return self.status in (DONE, FAILED, CANCELLED)
+
+
+class JobService(object):
+    """
+    Runs the jobs of a bounded queue one after another with a long lived session, the runs of every job being evolved
+    by the session worker pool
+    """
+    __slots__ = ('session', 'jobs', '_queue', '_lock', '_dispatcher')
+
+    def __init__(self, session: Session, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        JobService constructor
+        Args:
+            session: Session holding the pre-loaded language model and the worker pool
+            queue_size: Maximum number of jobs waiting to be run
+        """
+        self.session = session
+        self.jobs = OrderedDict()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = Lock()
+        self._dispatcher = None
+
+    def start(self) -> None:
+        """ Starts running the queued jobs """
+        if self._dispatcher is None:
+            self._dispatcher = Thread(target=self._dispatch, name='PatternOmatic-dispatcher', daemon=True)
+            self._dispatcher.start()
+
+    def close(self) -> None:
+        """ Cancels every pending job, waits for the dispatcher to stop and closes the session """
+        with self._lock:
+            for job in self.jobs.values():
+                job.stop.set()
+
+        if self._dispatcher is not None:
+            self._queue.put(None)
+            self._dispatcher.join()
+            self._dispatcher = None
+
+        self.session.close()
+
+    def submit(self, samples: List[str], config_overrides: Optional[Dict[str, Any]] = None) -> Job:
+        """
+        Queues a new job
+        Args:
+            samples: List of strings from where to find common linguistic patterns
+            config_overrides: Optional dict of configuration parameters (Config attribute names) for this job
+
+        Raises: queue.Full if there is no room left for the job
+        Returns: Job instance
+
+        """
+        job = Job(samples, config_overrides)
+
+        with self._lock:
+            self._queue.put_nowait(job)
+            self.jobs[job.id] = job
+            self._forget_finished_jobs()
+
+        LOG.info(f'Job {job.id} queued')
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancels a job, running jobs are stopped between generations
+        Args:
+            job_id: Identifier of the job
+
+        Returns: The Job instance, None if unknown
+
+        """
+        job = self.jobs.get(job_id)
+
+        if job is not None and not job.finished:
+            job.stop.set()
+            if job.status == QUEUED:
+                job.status = CANCELLED
+            LOG.info(f'Job {job.id} cancelled')
+
+        return job
+
+    def _dispatch(self) -> None:
+        """ Runs queued jobs until a None one is found """
+        while True:
+            job = self._queue.get()
+
+            if job is None:
+                return
+
+            if job.stop.is_set():
+                job.status = CANCELLED
+                continue
+
+            job.status = RUNNING
+            try:
+                patterns_found = self.session.find(job.samples, job.config_overrides, with_coverage=True, stop=job.stop)
+
+                # Jobs cancelled once finished keep their result
+                if patterns_found is None:
+                    job.status = CANCELLED
+                else:
+                    job.patterns, job.fitnesses, job.coverages = \
+                        patterns_found if len(patterns_found) > 0 else ([], [], [])
+                    job.status = DONE
+            except Exception as ex:
+                LOG.error(f'Job {job.id} failed: {repr(ex)}')
+                job.error = repr(ex)
+                job.status = FAILED
+
+    def _forget_finished_jobs(self) -> None:
+        """ Drops the oldest finished jobs beyond the job history size """
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished]:
+            if len(self.jobs) <= JOB_HISTORY_SIZE:
+                break
+            del self.jobs[job_id]
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP/JSON interface of the job service:
+        POST /jobs                  {"samples": [...], "config": {...}} queues a job
+        GET /jobs/<id>              job status
+        GET /jobs/<id>/result       patterns found by a done job
+        DELETE /jobs/<id>           cancels a job
+    """
+    server_version = 'PatternOmatic'
+
+    def do_POST(self) -> None:
+        """ Queues a job, replying with too many requests if the queue is full """
+        if self.path.rstrip('/') != '/jobs':
+            return self._reply(HTTPStatus.NOT_FOUND, {'error': 'Not found'})
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            samples = body['samples']
+            config_overrides = body.get('config') or {}
+            if not isinstance(samples, list) or not all(isinstance(s, str) for s in samples) or len(samples) == 0 \
+                    or not isinstance(config_overrides, dict):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            return self._reply(HTTPStatus.BAD_REQUEST, {'error': 'A non empty list of string samples is expected'})
+
+        # Jobs must not touch the files of the server (checkpoints, reports, stores, seeds, logs)
+        forbidden = sorted(set(config_overrides) - JOB_OVERRIDES)
+        if len(forbidden) > 0:
+            error = f'Configuration parameters {", ".join(forbidden)} can not be overridden by jobs'
+            return self._reply(HTTPStatus.BAD_REQUEST, {'error': error})
+
+        try:
+            job = self.server.service.submit(samples, config_overrides)
+        except queue.Full:
+            return self._reply(HTTPStatus.TOO_MANY_REQUESTS, {'error': 'Job queue is full, try again later'})
+
+        self._reply(HTTPStatus.ACCEPTED, job.__dict__)
+
+    def do_GET(self) -> None:
+        """ Replies with the status or the result of a job """
+        job, resource = self._route()
+
+        if job is None:
+            return self._reply(HTTPStatus.NOT_FOUND, {'error': 'Not found'})
+
+        if resource is None:
+            return self._reply(HTTPStatus.OK, job.__dict__)
+
+        if job.status != DONE:
+            return self._reply(HTTPStatus.CONFLICT, job.__dict__)
+
+        self._reply(HTTPStatus.OK, {'id': job.id, 'patterns': job.patterns, 'fitnesses': job.fitnesses,
+                                    'coverages': job.coverages})
+
+    def do_DELETE(self) -> None:
+        """ Cancels a job """
+        job, resource = self._route()
+
+        if job is None or resource is not None:
+            return self._reply(HTTPStatus.NOT_FOUND, {'error': 'Not found'})
+
+        self._reply(HTTPStatus.ACCEPTED, self.server.service.cancel(job.id).__dict__)
+
+    def log_message(self, format_string: str, *args) -> None:
+        """ Routes the access log to PatternOmatic's logger """
+        LOG.debug('%s ' + format_string, self.address_string(), *args)
+
+    def _route(self) -> Tuple[Optional[Job], Optional[str]]:
+        """
+        Finds the job and the resource of the job requested by the path
+        Returns: Job instance (None if unknown) and the resource name (None for the job itself)
+
+        """
+        parts = self.path.strip('/').split('/')
+
+        if len(parts) not in (2, 3) or parts[0] != 'jobs' or (len(parts) == 3 and parts[2] != 'result'):
+            return None, None
+
+        return self.server.service.jobs.get(parts[1]), parts[2] if len(parts) == 3 else None
+
+    def _reply(self, status: HTTPStatus, body: dict) -> None:
+        """
+        Sends a JSON response
+        Args:
+            status: HTTP status code
+            body: JSON serializable dict
+
+        Returns: None
+
+        """
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class JobServer(ThreadingHTTPServer):
+    """ HTTP server exposing a job service """
+    daemon_threads = True
+
+    def __init__(self, service: JobService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        super().__init__((host, port), JobRequestHandler)
+        self.service = service
+
+
+def serve(
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        spacy_language_model_name: Union[str, None] = None,
+        configuration: Union[str, FrozenConfig, None] = None,
+        workers: int = 1,
+        queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+    """
+    Runs the job service until interrupted
+    Args:
+        host: Interface to listen on, localhost by default
+        port: Port to listen on
+        spacy_language_model_name: (str) Optional valid Spacy Language Model (Fallbacks to Spacy's en_core_web_sm)
+        configuration: Optional configuration file path to to be loaded or FrozenConfig instance to be used
+        workers: (int) Number of worker processes to evolve runs with
+        queue_size: Maximum number of jobs waiting to be run
+
+    Returns: None
+
+    """
+    service = JobService(Session(spacy_language_model_name, configuration, workers), queue_size)
+    server = JobServer(service, host, port)
+    service.start()
+
+    LOG.info(f'Serving PatternOmatic jobs on http://{host}:{server.server_port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        LOG.info('Shutting down...')
+    finally:
+        server.server_close()
+        service.close()
@@ -21,13 +21,19 @@ along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 import configparser
 from typing import Optional
-from PatternOmatic.settings.log import LOG
+from PatternOmatic.settings.log import LOG, LOG_FILE as DEFAULT_LOG_FILE
 from PatternOmatic.settings.literals import GE, MAX_RUNS, SUCCESS_THRESHOLD, POPULATION_SIZE, MAX_GENERATIONS, \
     CODON_LENGTH, CODONS_X_INDIVIDUAL, MUTATION_PROBABILITY, OFFSPRING_FACTOR, MATING_PROBABILITY, K_VALUE, \
     SELECTION_TYPE, REPLACEMENT_TYPE, RECOMBINATION_TYPE, RecombinationType, ReplacementType, SelectionType, \
-    FitnessType, FITNESS_FUNCTION_TYPE, \
-    DGG, FEATURES_X_TOKEN, USE_BOOLEAN_FEATURES, USE_CUSTOM_ATTRIBUTES, USE_UNIQUES, \
-    USE_GRAMMAR_OPERATORS, USE_TOKEN_WILDCARD, USE_EXTENDED_PATTERN_SYNTAX, REPORT_PATH, IO, ReportFormat, REPORT_FORMAT
+    FitnessType, FITNESS_FUNCTION_TYPE, FitnessEngine, FITNESS_ENGINE, RACING_SAMPLE_SIZE, RACING_CONFIDENCE, \
+    RANDOM_SEED, SEED_FRACTION, HALL_OF_FAME_SIZE, DGG, FEATURES_X_TOKEN, USE_BOOLEAN_FEATURES, USE_CUSTOM_ATTRIBUTES, \
+    USE_UNIQUES, USE_GRAMMAR_OPERATORS, USE_TOKEN_WILDCARD, USE_EXTENDED_PATTERN_SYNTAX, WEIGHT_PATTERN_LENGTHS, \
+    REPORT_PATH, IO, ReportFormat, REPORT_FORMAT, REPORT_COMPRESS, REPORT_MAX_BYTES, REPORT_BACKUPS, PROFILE_PHASES, \
+    LOG_LEVEL, LOG_FILE, FITNESS_STORE_PATH, FITNESS_STORE_MAX_ENTRIES, TELEMETRY_PATH, CHECKPOINT_PATH, \
+    CHECKPOINT_INTERVAL, SEED_PATH, SEED_CHECKPOINT
+
+# Maximum number of patterns kept by the hall of fame, if not set up
+DEFAULT_HALL_OF_FAME_SIZE = 10
 
 
 class SingletonMetaNaive(type):
@@ -66,6 +72,12 @@ class Config(metaclass=SingletonMetaNaive):
         'recombination_type',
         'replacement_type',
         'fitness_function_type',
+        'fitness_engine',
+        'racing_sample_size',
+        'racing_confidence',
+        'random_seed',
+        'seed_fraction',
+        'hall_of_fame_size',
         'features_per_token',
         'use_boolean_features',
         'use_custom_attributes',
@@ -73,8 +85,22 @@ class Config(metaclass=SingletonMetaNaive):
         'use_grammar_operators',
         'use_token_wildcard',
         'use_extended_pattern_syntax',
+        'weight_pattern_lengths',
         'report_path',
         'report_format',
+        'report_compress',
+        'report_max_bytes',
+        'report_backups',
+        'profile_phases',
+        'log_level',
+        'log_file',
+        'telemetry_path',
+        'fitness_store_path',
+        'fitness_store_max_entries',
+        'checkpoint_path',
+        'checkpoint_interval',
+        'seed_path',
+        'seed_checkpoint',
         'file_path'
     )
 
@@ -127,6 +153,16 @@ class Config(metaclass=SingletonMetaNaive):
         self.fitness_function_type = FitnessType(
             self._validate_config_argument(GE, FITNESS_FUNCTION_TYPE, 1, config_parser))
 
+        self.fitness_engine = FitnessEngine(
+            self._validate_config_argument(GE, FITNESS_ENGINE, 0, config_parser))
+
+        self.racing_sample_size = self._validate_config_argument(GE, RACING_SAMPLE_SIZE, 0, config_parser)
+        self.racing_confidence = self._validate_config_argument(GE, RACING_CONFIDENCE, 1.96, config_parser)
+        self.random_seed = self._validate_config_argument(GE, RANDOM_SEED, -1, config_parser)
+        self.seed_fraction = self._validate_config_argument(GE, SEED_FRACTION, 0.1, config_parser)
+        self.hall_of_fame_size = self._validate_config_argument(GE, HALL_OF_FAME_SIZE, DEFAULT_HALL_OF_FAME_SIZE,
+                                                                config_parser)
+
         #
         # BNF Grammar Generation configuration options
         #
@@ -138,11 +174,14 @@ class Config(metaclass=SingletonMetaNaive):
         self.use_token_wildcard = self._validate_config_argument(DGG, USE_TOKEN_WILDCARD, False, config_parser)
         self.use_extended_pattern_syntax = \
             self._validate_config_argument(DGG, USE_EXTENDED_PATTERN_SYNTAX, False, config_parser)
+        self.weight_pattern_lengths = \
+            self._validate_config_argument(DGG, WEIGHT_PATTERN_LENGTHS, False, config_parser)
 
         #
         # Configuration validation
         #
         self._check_xps_op_restriction()
+        self.hall_of_fame_size = self._restrict_hall_of_fame_size(self.hall_of_fame_size)
 
         #
         # IO
@@ -151,6 +190,24 @@ class Config(metaclass=SingletonMetaNaive):
             self._validate_config_argument(IO, REPORT_PATH, '/tmp/patternomatic_report.txt', config_parser)
 
         self.report_format = ReportFormat(self._validate_config_argument(IO, REPORT_FORMAT, 0, config_parser))
+        self.report_compress = self._validate_config_argument(IO, REPORT_COMPRESS, False, config_parser)
+        self.report_max_bytes = self._validate_config_argument(IO, REPORT_MAX_BYTES, 0, config_parser)
+        self.report_backups = self._validate_config_argument(IO, REPORT_BACKUPS, 5, config_parser)
+        self.profile_phases = self._validate_config_argument(IO, PROFILE_PHASES, False, config_parser)
+        self.telemetry_path = self._validate_config_argument(IO, TELEMETRY_PATH, '', config_parser)
+
+        self.fitness_store_path = self._validate_config_argument(IO, FITNESS_STORE_PATH, '', config_parser)
+        self.fitness_store_max_entries = \
+            self._validate_config_argument(IO, FITNESS_STORE_MAX_ENTRIES, 1000000, config_parser)
+
+        self.checkpoint_path = self._validate_config_argument(IO, CHECKPOINT_PATH, '', config_parser)
+        self.checkpoint_interval = self._validate_config_argument(IO, CHECKPOINT_INTERVAL, 5, config_parser)
+
+        self.seed_path = self._validate_config_argument(IO, SEED_PATH, '', config_parser)
+        self.seed_checkpoint = self._validate_config_argument(IO, SEED_CHECKPOINT, False, config_parser)
+
+        self.log_level = self._validate_config_argument(IO, LOG_LEVEL, 'INFO', config_parser)
+        self.log_file = self._validate_config_argument(IO, LOG_FILE, DEFAULT_LOG_FILE, config_parser)
 
         LOG.info(f'Configuration instance: {self}')
 
@@ -170,6 +227,8 @@ class Config(metaclass=SingletonMetaNaive):
                 LOG.info(f'Updating configuration parameter {key.upper()} with value {value}')
                 if key == USE_EXTENDED_PATTERN_SYNTAX.lower() or key == USE_GRAMMAR_OPERATORS.lower():
                     self._check_xps_op_restriction()
+                elif key == HALL_OF_FAME_SIZE.lower():
+                    super(Config, self).__setattr__(key, self._restrict_hall_of_fame_size(value))
             else:
                 LOG.warning(f'Invalid data type {type(value)} for property {key}. Skipping update')
         else:
@@ -184,6 +243,17 @@ class Config(metaclass=SingletonMetaNaive):
         """ Representation of config instance """
         return f'{self.__class__.__name__}({self.__dict__})'
 
+    def freeze(self, **overrides) -> FrozenConfig:
+        """
+        Takes an immutable snapshot of this configuration, to be passed explicitly along a single execution
+        Args:
+            **overrides: Configuration parameters (Config attribute names) to be overridden at the snapshot
+
+        Returns: FrozenConfig instance
+
+        """
+        return FrozenConfig(**self.__dict__).replace(**overrides)
+
     #
     # Utilities
     #
@@ -216,7 +286,7 @@ class Config(metaclass=SingletonMetaNaive):
                         f'Falling back to its default value: {default}')
             value = default
 
-        LOG.debug(f'[{section}][{option}] {value}')
+        LOG.debug('[%s][%s] %s', section, option, value)
         return value
 
     @staticmethod
@@ -242,3 +312,109 @@ class Config(metaclass=SingletonMetaNaive):
             LOG.warning(f'Extended Pattern Syntax is not compatible with the usage of Grammar Operators. '
                         f'Extended Pattern Syntax has been disabled!')
             self.use_extended_pattern_syntax = False
+
+    @staticmethod
+    def _restrict_hall_of_fame_size(hall_of_fame_size: int) -> int:
+        """
+        The hall of fame must keep at least one pattern, as executions conclude with the patterns it keeps
+        Args:
+            hall_of_fame_size: Intended maximum number of patterns kept
+
+        Returns: The given size if valid, else the default one
+
+        """
+        if hall_of_fame_size < 1:
+            LOG.warning(f'[{GE}][{HALL_OF_FAME_SIZE}] must be at least 1. '
+                        f'Falling back to its default value: {DEFAULT_HALL_OF_FAME_SIZE}')
+            return DEFAULT_HALL_OF_FAME_SIZE
+        return hall_of_fame_size
+
+
+class FrozenConfig(object):
+    """ Immutable configuration snapshot, passed explicitly along a single execution instead of the Config Singleton """
+    __slots__ = Config.__slots__
+
+    def __init__(self, **parameters):
+        """
+        FrozenConfig object constructor
+        Args:
+            **parameters: Value of every Config attribute
+        """
+        for key, value in parameters.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value) -> None:
+        """ Frozen instances can not be updated """
+        raise AttributeError(f'{self.__class__.__name__} instances are immutable, use replace instead')
+
+    def __delattr__(self, key) -> None:
+        """ Frozen instances can not be updated """
+        raise AttributeError(f'{self.__class__.__name__} instances are immutable, use replace instead')
+
+    def __reduce__(self):
+        """ Pickles frozen instances, as these can not be restored by setting their attributes """
+        return self.__class__, (), self.__dict__
+
+    def __setstate__(self, state: dict) -> None:
+        """ Unpickles frozen instances """
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+
+    @property
+    def __dict__(self):
+        """ Hijacks dictionary for this config slotted class """
+        return {s: getattr(self, s, None) for s in self.__slots__}
+
+    def __repr__(self):
+        """ Representation of config instance """
+        return f'{self.__class__.__name__}({self.__dict__})'
+
+    @staticmethod
+    def from_file(config_file_path: str = None) -> FrozenConfig:
+        """
+        Builds a frozen configuration from a configuration file, without creating nor updating the Config Singleton
+        Args:
+            config_file_path: Path for a configuration file
+
+        Returns: FrozenConfig instance
+
+        """
+        config = object.__new__(Config)
+        config.__init__(config_file_path)
+        return config.freeze()
+
+    def replace(self, **overrides) -> FrozenConfig:
+        """
+        Builds a new frozen configuration with some of its parameters overridden, applying the same validations than
+        the Config Singleton does
+        Args:
+            **overrides: Configuration parameters (Config attribute names) to be overridden
+
+        Returns: FrozenConfig instance
+
+        """
+        if len(overrides) == 0:
+            return self
+
+        parameters = self.__dict__
+
+        for key, value in overrides.items():
+            if key not in parameters:
+                LOG.warning(f'Unknown configuration parameter {key}. Skipping update')
+            elif Config._preserve_property_type(parameters[key], value):
+                parameters[key] = value
+                LOG.info(f'Updating configuration parameter {key.upper()} with value {value}')
+            else:
+                LOG.warning(f'Invalid data type {type(value)} for property {key}. Skipping update')
+
+        parameters['hall_of_fame_size'] = Config._restrict_hall_of_fame_size(parameters['hall_of_fame_size'])
+
+        if 'codon_length' in overrides or 'num_codons_per_individual' in overrides:
+            parameters['dna_length'] = parameters['codon_length'] * parameters['num_codons_per_individual']
+
+        if parameters['use_extended_pattern_syntax'] is True and parameters['use_grammar_operators'] is True:
+            LOG.warning(f'Extended Pattern Syntax is not compatible with the usage of Grammar Operators. '
+                        f'Extended Pattern Syntax has been disabled!')
+            parameters['use_extended_pattern_syntax'] = False
+
+        return FrozenConfig(**parameters)
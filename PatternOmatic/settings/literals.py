@@ -69,6 +69,29 @@ class FitnessType(Enum):
         return self.name
 
 
+@unique
+class FitnessEngine(Enum):
+    """ Engine matching fenotypes against the samples while scoring them """
+    MATCHER = 0
+    NUMBA = 1
+    REGEX = 2
+    TRIE = 3
+
+    def __repr__(self):
+        """ Human readable """
+        return self.name
+
+
+# Phases of the GE loop, timed when profiling
+SELECTION_PHASE = 'selection'
+RECOMBINATION_PHASE = 'recombination'
+MUTATION_PHASE = 'mutation'
+TRANSCRIPTION_PHASE = 'transcription'
+TRANSLATION_PHASE = 'translation'
+FITNESS_PHASE = 'fitness'
+REPLACEMENT_PHASE = 'replacement'
+
+
 #
 # Dynamic grammar generation related literals
 #
@@ -169,6 +192,26 @@ MATCHER_SUPPORTED_ATTRIBUTES = (
     'like_num',
     'like_url',
     'like_email')
+# Token attributes not supported by the Matcher, exposed as custom attributes (token._. space)
+MATCHER_UNSUPPORTED_ATTRIBUTES = (
+    'ent_id_',
+    'ent_iob_',
+    'ent_kb_id_',
+    'has_vector',
+    'is_bracket',
+    'is_currency',
+    'is_left_punct',
+    'is_oov',
+    'is_quote',
+    'is_right_punct',
+    'lang_',
+    'norm_',
+    'prefix_',
+    'sentiment',
+    'string',
+    'suffix_',
+    'text_with_ws',
+    'whitespace_')
 
 #
 # Config ini literals
@@ -188,6 +231,12 @@ SELECTION_TYPE = 'SELECTION_TYPE'
 RECOMBINATION_TYPE = 'RECOMBINATION_TYPE'
 REPLACEMENT_TYPE = 'REPLACEMENT_TYPE'
 FITNESS_FUNCTION_TYPE = 'FITNESS_FUNCTION_TYPE'
+FITNESS_ENGINE = 'FITNESS_ENGINE'
+RACING_SAMPLE_SIZE = 'RACING_SAMPLE_SIZE'
+RACING_CONFIDENCE = 'RACING_CONFIDENCE'
+RANDOM_SEED = 'RANDOM_SEED'
+SEED_FRACTION = 'SEED_FRACTION'
+HALL_OF_FAME_SIZE = 'HALL_OF_FAME_SIZE'
 DGG = 'DGG'
 FEATURES_X_TOKEN = 'FEATURES_X_TOKEN'
 USE_BOOLEAN_FEATURES = 'USE_BOOLEAN_FEATURES'
@@ -196,9 +245,23 @@ USE_GRAMMAR_OPERATORS = 'USE_GRAMMAR_OPERATORS'
 USE_TOKEN_WILDCARD = 'USE_TOKEN_WILDCARD'
 USE_EXTENDED_PATTERN_SYNTAX = 'USE_EXTENDED_PATTERN_SYNTAX'
 USE_CUSTOM_ATTRIBUTES = 'USE_CUSTOM_ATTRIBUTES'
+WEIGHT_PATTERN_LENGTHS = 'WEIGHT_PATTERN_LENGTHS'
 IO = 'IO'
 REPORT_PATH = 'REPORT_PATH'
 REPORT_FORMAT = 'REPORT_FORMAT'
+REPORT_COMPRESS = 'REPORT_COMPRESS'
+REPORT_MAX_BYTES = 'REPORT_MAX_BYTES'
+REPORT_BACKUPS = 'REPORT_BACKUPS'
+PROFILE_PHASES = 'PROFILE_PHASES'
+LOG_LEVEL = 'LOG_LEVEL'
+LOG_FILE = 'LOG_FILE'
+TELEMETRY_PATH = 'TELEMETRY_PATH'
+FITNESS_STORE_PATH = 'FITNESS_STORE_PATH'
+FITNESS_STORE_MAX_ENTRIES = 'FITNESS_STORE_MAX_ENTRIES'
+CHECKPOINT_PATH = 'CHECKPOINT_PATH'
+CHECKPOINT_INTERVAL = 'CHECKPOINT_INTERVAL'
+SEED_PATH = 'SEED_PATH'
+SEED_CHECKPOINT = 'SEED_CHECKPOINT'
 
 
 @unique
@@ -18,16 +18,69 @@ You should have received a copy of the GNU Lesser General Public License
 along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 
 """
+import atexit
 import logging
+import os
 import sys
 import tempfile
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
+from queue import SimpleQueue
+from threading import Lock
+from typing import Optional
 
 FORMATTER = \
     logging.Formatter('[%(levelname)s] %(asctime)s %(filename)s:%(funcName)s:%(lineno)d : %(message)s')
 
 LOG_FILE = tempfile.gettempdir() + '/patternomatic.log'
 
+# Maximum length of the large payloads (samples, grammars...) of log messages
+MAX_PAYLOAD = 1000
+
+
+class Abbreviated(object):
+    """
+    Large payload of a log message, represented lazily (just if the message is emitted) and abbreviated: containers
+    show just their first items, up to a maximum length, and the number of items left out
+    """
+    __slots__ = ('payload', 'limit')
+
+    def __init__(self, payload, limit: int = MAX_PAYLOAD):
+        """
+        Abbreviated constructor
+        Args:
+            payload: Any object
+            limit: Maximum length of the representation
+        """
+        self.payload = payload
+        self.limit = limit
+
+    def __str__(self):
+        return Abbreviated._abbreviate(self.payload, self.limit, str)
+
+    @staticmethod
+    def _abbreviate(payload, limit: int, represent) -> str:
+        """ Abbreviated representation of a payload, items of containers sharing what is left of the maximum length """
+        if isinstance(payload, dict):
+            opening, closing = '{', '}'
+            entries = ((f'{k!r}: ', v) for k, v in payload.items())
+        elif isinstance(payload, (list, tuple, set)):
+            opening, closing = '[', ']'
+            entries = (('', v) for v in payload)
+        else:
+            text = represent(payload)
+            return text if len(text) <= limit else text[:max(limit, 0)] + '...'
+
+        shown, budget = list(), limit
+        for prefix, value in entries:
+            if budget <= 0:
+                break
+            item = prefix + Abbreviated._abbreviate(value, budget - len(prefix), repr)
+            shown.append(item)
+            budget -= len(item) + 2
+
+        left_out = len(payload) - len(shown)
+        return opening + ', '.join(shown) + (f', ... ({left_out} more)' if left_out > 0 else '') + closing
+
 
 def _get_console_handler():
     """
@@ -40,20 +93,24 @@ def _get_console_handler():
     return console_handler
 
 
-def _get_file_handler():
+def _get_file_handler(log_file: str = LOG_FILE):
     """
     File handler logger
+    Args:
+        log_file: OS path of the log file
+
     Returns:
 
     """
-    file_handler = TimedRotatingFileHandler(LOG_FILE, when='midnight')
+    file_handler = TimedRotatingFileHandler(log_file, when='midnight')
     file_handler.setFormatter(FORMATTER)
     return file_handler
 
 
 def get_logger(logger_name):
     """
-    Returns a set up logger
+    Returns a set up logger, whose records are queued and handled (written to the console and the log file) by a
+    listener thread, so logging never blocks on IO
     Args:
         logger_name: Name of the logger
 
@@ -62,10 +119,75 @@ def get_logger(logger_name):
     """
     logger = logging.getLogger(logger_name)
     logger.setLevel(logging.INFO)
-    logger.addHandler(_get_console_handler())
-    logger.addHandler(_get_file_handler())
+    logger.addHandler(_HANDLER)
     logger.propagate = False
     return logger
 
 
+def configure(level: str, log_file: str) -> None:
+    """
+    Sets the level and the file of the log up
+    Args:
+        level: Name of the logging level (e.g. DEBUG, INFO, WARNING)
+        log_file: OS path of the log file, empty to log just to the console
+
+    Returns: None
+
+    """
+    try:
+        LOG.setLevel(level.upper())
+    except ValueError:
+        LOG.warning(f'Invalid logging level {level}, keeping {logging.getLevelName(LOG.level)}')
+
+    if log_file != _LOG_FILE:
+        _stop()
+        _listen(log_file)
+
+
+#
+# Process wide listener
+#
+_HANDLER = QueueHandler(SimpleQueue())
+_LISTENER: Optional[QueueListener] = None
+_LOG_FILE: Optional[str] = None
+_LISTENER_LOCK = Lock()
+
+
+def _listen(log_file: str) -> None:
+    """ Starts a listener thread handling the records queued, writing them to the console and the given log file """
+    global _LISTENER, _LOG_FILE
+
+    with _LISTENER_LOCK:
+        handlers = [_get_console_handler()] + ([_get_file_handler(log_file)] if log_file else [])
+        _LISTENER = QueueListener(_HANDLER.queue, *handlers, respect_handler_level=True)
+        _LISTENER.start()
+        _LOG_FILE = log_file
+
+
+def _stop() -> None:
+    """ Stops the listener thread, once the records queued are handled """
+    global _LISTENER
+
+    with _LISTENER_LOCK:
+        if _LISTENER is not None:
+            _LISTENER.stop()
+            for handler in _LISTENER.handlers:
+                handler.close()
+            _LISTENER = None
+
+
+def _listen_in_child() -> None:
+    """ Listener threads do not survive forks, so forked processes (e.g. workers) get their own queue and listener """
+    global _LISTENER_LOCK
+    _LISTENER_LOCK = Lock()
+    _HANDLER.queue = SimpleQueue()
+    _listen(_LOG_FILE)
+
+
 LOG = get_logger('PatternOmatic')
+_listen(LOG_FILE)
+
+atexit.register(_stop)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_listen_in_child)
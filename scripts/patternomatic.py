@@ -23,6 +23,8 @@ import sys
 from typing import List
 from argparse import ArgumentParser
 from PatternOmatic.api import find_patterns
+from PatternOmatic.ge.store import FitnessStore
+from PatternOmatic.server import serve, DEFAULT_HOST, DEFAULT_PORT, DEFAULT_QUEUE_SIZE
 from PatternOmatic.settings.log import LOG
 
 
@@ -36,6 +38,12 @@ def main(args: List) -> None:
 
     """
     LOG.info('Parsing command line arguments...')
+    if len(args) > 0 and args[0] == 'serve':
+        return main_serve(args[1:])
+
+    if len(args) > 0 and args[0] == 'compact-store':
+        return main_compact_store(args[1:])
+
     try:
         cli = ArgumentParser(
             description='Finds the Spacy\'s Matcher pattern for the given samples',
@@ -73,6 +81,14 @@ def main(args: List) -> None:
             default=None,
         )
 
+        # Resume from checkpoint
+        cli.add_argument(
+            '-r',
+            '--resume',
+            action='store_true',
+            help='Resume the execution from its checkpoint (see CHECKPOINT_PATH) instead of starting over'
+        )
+
         # Parse command line input arguments/options
         parsed_args = cli.parse_args(args)
 
@@ -86,7 +102,8 @@ def main(args: List) -> None:
         patterns_found, _ = find_patterns(
             parsed_args.sample,
             configuration=parsed_args.config,
-            spacy_language_model_name=parsed_args.language)
+            spacy_language_model_name=parsed_args.language,
+            resume=parsed_args.resume)
 
         LOG.info(f'Patterns found: {patterns_found}')
 
@@ -95,6 +112,76 @@ def main(args: List) -> None:
         raise ex
 
 
+def main_serve(args: List) -> None:
+    """
+    PatternOmatic's serve mode, runs a local HTTP job service
+    Args:
+        args: Command Line Input Arguments following the serve command
+
+    Returns: None
+
+    """
+    try:
+        cli = ArgumentParser(
+            prog='patternomatic.py serve',
+            description='Serves pattern finding jobs over HTTP/JSON from a local job queue'
+        )
+
+        cli.add_argument('--host', type=str, default=DEFAULT_HOST, help='Interface to listen on')
+        cli.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+        cli.add_argument(
+            '-l', '--language', nargs='?', type=str, default='en_core_web_sm', help='Spacy language model to be used')
+        cli.add_argument('-c', '--config', nargs='?', type=str, default=None, help='Configuration file path to be used')
+        cli.add_argument('-w', '--workers', type=int, default=1, help='Number of worker processes evolving runs')
+        cli.add_argument(
+            '-q', '--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, help='Maximum number of jobs waiting to be run')
+
+        parsed_args = cli.parse_args(args)
+
+        serve(host=parsed_args.host,
+              port=parsed_args.port,
+              spacy_language_model_name=parsed_args.language,
+              configuration=parsed_args.config,
+              workers=parsed_args.workers,
+              queue_size=parsed_args.queue_size)
+
+    except Exception as ex:
+        LOG.critical(f'Fatal error: {repr(ex)}')
+        raise ex
+
+
+def main_compact_store(args: List) -> None:
+    """
+    PatternOmatic's fitness store compaction command
+    Args:
+        args: Command Line Input Arguments following the compact-store command
+
+    Returns: None
+
+    """
+    try:
+        cli = ArgumentParser(
+            prog='patternomatic.py compact-store',
+            description='Evicts the least recently used entries of a fitness store beyond its size limit and reclaims '
+                        'their disk space'
+        )
+
+        cli.add_argument('path', type=str, help='Fitness store file path')
+        cli.add_argument('-m', '--max-entries', type=int, default=1000000, help='Maximum number of entries to keep')
+
+        parsed_args = cli.parse_args(args)
+
+        store = FitnessStore(parsed_args.path, parsed_args.max_entries)
+        try:
+            store.compact()
+        finally:
+            store.close()
+
+    except Exception as ex:
+        LOG.critical(f'Fatal error: {repr(ex)}')
+        raise ex
+
+
 #
 # OS INPUT
 #
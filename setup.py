@@ -35,8 +35,12 @@ setuptools.setup(
     packages=setuptools.find_packages(),
     scripts=['scripts/patternomatic.py'],
     install_requires=[
-        'spacy==2.3.0'
+        'spacy==2.3.0',
+        'numpy>=1.17'
     ],
+    extras_require={
+        'numba': ['numba']
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: GNU Lesser General Public License v3 (LGPLv3)",
@@ -18,11 +18,16 @@ You should have received a copy of the GNU Lesser General Public License
 along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 
 """
+import asyncio
+import json
+import logging
 import os
 import spacy
+from threading import Event
 from unittest import TestCase, mock
-from PatternOmatic.api import find_patterns
+from PatternOmatic.api import find_patterns, find_patterns_iter, Session
 from PatternOmatic.settings.config import Config
+from PatternOmatic.settings.literals import FitnessType
 from PatternOmatic.settings.log import LOG
 
 
@@ -33,7 +38,17 @@ class Test(TestCase):
     def test_find_patterns_when_only_samples_provided(self):
         """ Tests that providing just samples makes the find_pattern keeps working """
         patterns, _ = find_patterns(self.my_samples)
-        super().assertEqual(4, len(patterns))
+        super().assertEqual(Config().hall_of_fame_size, len(patterns))
+        super().assertEqual(len(patterns), len({json.dumps(pattern) for pattern in patterns}))
+
+    def test_find_patterns_with_coverage(self):
+        """ Checks that the bitmap of the samples covered by each pattern can be returned along with the patterns """
+        patterns, fitnesses, coverages = find_patterns(self.my_samples, with_coverage=True)
+
+        super().assertEqual(len(patterns), len(coverages))
+        for fitness, coverage in zip(fitnesses, coverages):
+            super().assertLessEqual(coverage, 0b11)
+            super().assertEqual(fitness, bin(coverage).count('1') / len(self.my_samples))
 
     def test_find_patterns_when_valid_configuration_file_provided(self):
         """ Checks that providing a valid configuration file path loads configuration from that file """
@@ -46,9 +61,9 @@ class Test(TestCase):
     def test_find_patterns_when_config_instance_provided(self):
         """ Checks when setting up a Config instance before find_patterns invocation works """
         config = Config()
-        config.max_runs = 10
+        config.hall_of_fame_size = 3
         patterns, _ = find_patterns(self.my_samples)
-        super().assertEqual(10, len(patterns))
+        super().assertEqual(3, len(patterns))
 
     def test_find_patterns_when_bad_language_provided(self):
         """ Checks that providing an imaginary language model makes find_patterns use en_core_web_sm """
@@ -71,6 +86,169 @@ class Test(TestCase):
                     find_patterns(['Hi'])
                     super().assertTrue(patch_spacy_download.called)
 
+    def test_find_patterns_iter(self):
+        """ Checks that the anytime search yields the best pattern found so far and returns what find_patterns does """
+        config = Config()
+        config.max_runs = 2
+        config.max_generations = 3
+
+        snapshots = find_patterns_iter(self.my_samples)
+        reported = []
+        try:
+            while True:
+                reported.append(next(snapshots))
+        except StopIteration as stop:
+            patterns, fitnesses = stop.value
+
+        super().assertEqual(6, len(reported))
+        super().assertListEqual(sorted(s.best_fitness for s in reported), [s.best_fitness for s in reported])
+        super().assertEqual(fitnesses[0], reported[-1].best_fitness)
+        super().assertEqual(patterns[0], reported[-1].best_fenotype)
+
+    def test_find_patterns_iter_stops_early(self):
+        """ Checks that consumers can stop the anytime search after its first snapshot """
+        snapshots = find_patterns_iter(self.my_samples)
+        snapshot = next(snapshots)
+        snapshots.close()
+
+        super().assertEqual((0, 1), (snapshot.run, snapshot.generation))
+        super().assertIsNotNone(snapshot.best_fenotype)
+
+    def tearDown(self) -> None:
+        """ Destroy Config instance """
+        Config.clear_instance()
+
+
+class TestSession(TestCase):
+    """ Tests for long lived sessions """
+
+    my_samples = ['Hello world!', 'Goodbye world!']
+
+    def test_session_configures_log(self):
+        """ Checks that sessions set the log up to their configuration """
+        config = Config().freeze()
+        try:
+            with Session('en_core_web_sm', config.replace(log_level='WARNING')):
+                super().assertEqual(logging.WARNING, LOG.level)
+        finally:
+            with Session('en_core_web_sm', config):
+                super().assertEqual(logging.INFO, LOG.level)
+
+    def test_find_reuses_docs_and_grammars(self):
+        """ Checks that repeated searches over the same samples do not parse nor generate grammars again """
+        with Session('en_core_web_sm') as session:
+            patterns, _ = session.find(self.my_samples)
+            docs = [session._workspace.docs[sample] for sample in self.my_samples]
+
+            with super().assertLogs(LOG) as cm:
+                _ = session.find(self.my_samples)
+                super().assertIn('INFO:PatternOmatic:Reusing previously generated BNF', cm.output)
+
+            super().assertListEqual(docs, [session._workspace.docs[sample] for sample in self.my_samples])
+            super().assertEqual(Config().hall_of_fame_size, len(patterns))
+
+    def test_grammar_cache_follows_codon_length(self):
+        """ Checks that grammars are not reused across codon lengths, pattern lengths being weighted to fit them """
+        with Session('en_core_web_sm') as session:
+            samples = session._workspace.samples(self.my_samples)
+            config = session.config.replace(fitness_function_type=FitnessType.FULL_MATCH, weight_pattern_lengths=True)
+
+            grammar = session._workspace.grammar(samples, config)
+            super().assertIs(grammar, session._workspace.grammar(samples, config))
+            super().assertIsNot(grammar, session._workspace.grammar(samples, config.replace(codon_length=4)))
+
+    def test_find_with_config_overrides(self):
+        """ Checks that configuration overrides apply just to the search they are provided to """
+        with Session('en_core_web_sm') as session:
+            max_runs = Config().max_runs
+            patterns, _ = session.find(self.my_samples, {'max_runs': 2, 'hall_of_fame_size': 2})
+
+            super().assertEqual(2, len(patterns))
+            super().assertEqual(max_runs, Config().max_runs)
+
+    def test_find_stopped(self):
+        """ Checks that searches can be stopped through an event, returning no result """
+        stop = Event()
+        stop.set()
+
+        with Session('en_core_web_sm') as session:
+            super().assertIsNone(session.find(self.my_samples, stop=stop))
+
+    def test_find_with_workers(self):
+        """ Checks that runs can be evolved by a pool of worker processes """
+        with Session('en_core_web_sm', workers=2) as session:
+            patterns, fitnesses = session.find(self.my_samples, {'max_runs': 3, 'hall_of_fame_size': 3})
+
+            super().assertEqual(3, len(patterns))
+            super().assertListEqual(sorted(fitnesses, reverse=True), list(fitnesses))
+
+    def test_find_batch(self):
+        """ Checks that every group of a batch gets its own patterns and stats """
+        groups = {'greeting': ['Hello world!', 'Hi there!'], 'farewell': ['Goodbye world!', 'See you!']}
+
+        with Session('en_core_web_sm') as session:
+            results = session.find_batch(groups, {'max_runs': 2, 'hall_of_fame_size': 2})
+
+            super().assertListEqual(list(groups), list(results))
+            for label, texts in groups.items():
+                super().assertEqual(2, len(results[label].patterns))
+                super().assertEqual(2, len(results[label].stats.mbf_accumulator))
+                super().assertListEqual(texts, [doc.text for doc in session._workspace.samples(texts)])
+
+    def test_find_batch_with_workers(self):
+        """ Checks that the runs of every group of a batch can be evolved by a shared pool of worker processes """
+        groups = {'greeting': ['Hello world!', 'Hi there!'], 'farewell': ['Goodbye world!', 'See you!']}
+
+        with Session('en_core_web_sm', workers=2) as session:
+            results = session.find_batch(groups, {'max_runs': 2, 'hall_of_fame_size': 2})
+
+        for label in groups:
+            super().assertEqual(2, len(results[label].fitnesses))
+
+    def test_find_async_streams_progress(self):
+        """ Checks that asynchronous searches report their progress per generation before returning the patterns """
+        async def search(session: Session):
+            job = session.find_async(self.my_samples, {'max_runs': 2, 'max_generations': 3})
+            reported = [progress async for progress in job]
+            return reported, await job
+
+        with Session('en_core_web_sm') as session:
+            reported, (patterns, _) = asyncio.run(search(session))
+
+        super().assertEqual(2, len(patterns))
+        super().assertListEqual([(0, 1), (0, 2), (0, 3), (1, 1), (1, 2), (1, 3)],
+                                [(progress.run, progress.generation) for progress in reported])
+
+    def test_find_async_cancellation(self):
+        """ Checks that cancelling the task awaiting an asynchronous search stops its evolution """
+        async def search(session: Session):
+            job = session.find_async(self.my_samples, {'max_runs': 100})
+            task = asyncio.ensure_future(job)
+            async for _ in job:
+                task.cancel()
+                break
+            with super(TestSession, self).assertRaises(asyncio.CancelledError):
+                await task
+
+        with Session('en_core_web_sm') as session:
+            with super().assertLogs(LOG) as cm:
+                asyncio.run(search(session))
+                session.close()
+                super().assertIn('INFO:PatternOmatic:Execution cancelled', cm.output)
+
+    def test_find_async_cancelled_once_finished(self):
+        """ Checks that cancelling an asynchronous search already finished keeps its result """
+        async def search(session: Session):
+            job = session.find_async(self.my_samples, {'max_runs': 1, 'max_generations': 2})
+            _ = [progress async for progress in job]
+            job.cancel()
+            return await job
+
+        with Session('en_core_web_sm') as session:
+            patterns, _ = asyncio.run(search(session))
+
+        super().assertEqual(Config().hall_of_fame_size, len(patterns))
+
     def tearDown(self) -> None:
         """ Destroy Config instance """
         Config.clear_instance()
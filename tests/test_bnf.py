@@ -20,12 +20,14 @@ along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 """
 import unittest
 import spacy
+from collections import Counter
 from spacy.tokens.doc import Underscore
 
 import PatternOmatic.nlp.bnf as bnf
 from PatternOmatic.settings.literals import S, P, T, F, OP, NEGATION, ZERO_OR_ONE, ZERO_OR_MORE, ONE_OR_MORE, XPS, IN,\
     NOT_IN, EQQ, GEQ, LEQ, GTH, LTH, TOKEN_WILDCARD, UNDERSCORE, ORTH, TEXT, LOWER, POS, TAG, DEP, LEMMA, SHAPE, \
-    IS_ASCII, IS_UPPER, HAS_VECTOR
+    IS_ASCII, IS_UPPER, HAS_VECTOR, FitnessType
+from PatternOmatic.nlp.samples import SampleSet
 from PatternOmatic.settings.config import Config
 
 
@@ -54,6 +56,13 @@ class TestDG(unittest.TestCase):
 
         super().assertEqual(len(grammar[SHAPE]), 11)
 
+    def test_grammar_without_uniques_of_deduplicated_samples(self):
+        """ Tests that collapsed samples weight the grammar as the samples they stand for when use uniques is false """
+        self.config.use_uniques = False
+        samples = [self.samples[0], self.samples[1], self.samples[0]]
+
+        super().assertDictEqual(bnf.dynamic_generator(samples), bnf.dynamic_generator(SampleSet.deduplicated(samples)))
+
     def test_basic_grammar_with_booleans_dg(self):
         """ Tests that basic grammar with booleans is correctly generated """
         self.config.use_boolean_features = True
@@ -99,6 +108,19 @@ class TestDG(unittest.TestCase):
         # super().assertIn(IS_SENT_START, grammar.keys())
         super().assertIn(HAS_VECTOR, grammar.keys())
 
+    def test_custom_attributes_are_precomputed(self):
+        """ Tests that custom attributes are stored as plain values, with no getters to be run by the Matcher """
+        self.config.use_custom_attributes = True
+
+        _ = bnf.dynamic_generator(self.samples)
+
+        _, _, getter, _ = Underscore.token_extensions['CUSTOM_NORM_']
+        super().assertIsNone(getter)
+        for sample in self.samples:
+            for token in sample:
+                super().assertEqual(token.norm_, token._.CUSTOM_NORM_)
+                super().assertEqual(token.is_oov, token._.CUSTOM_IS_OOV)
+
     def test_basic_grammar_with_token_wildcard_dg(self):
         """ Tests grammar is generated with token wildcard """
         self.config.use_token_wildcard = True
@@ -143,6 +165,39 @@ class TestDG(unittest.TestCase):
 
         super().assertListEqual([expected_1[2]], bnf._symbol_stacker(DEP, 3, 3))
 
+    def test_seen_length_stacker(self):
+        """ Tests that only seen lengths are stacked, optionally weighted by their number of samples """
+        length_counts = Counter({1: 2, 3: 4})
+        expected = [DEP, DEP + ',' + DEP + ',' + DEP]
+        super().assertListEqual(expected, bnf._seen_length_stacker(DEP, length_counts))
+
+        expected_weighted = [expected[0]] + [expected[1]] * 2
+        super().assertListEqual(expected_weighted, bnf._seen_length_stacker(DEP, length_counts, True))
+
+    def test_seen_length_stacker_fits_codon_range(self):
+        """ Tests that weighted lengths are scaled to fit the codon range, every seen length staying reachable """
+        length_counts = Counter({3: 200, 5: 1})
+        codon_range = 1 << (self.config.codon_length - 1)
+        productions = bnf._seen_length_stacker(DEP, length_counts, True, codon_range)
+
+        super().assertLessEqual(len(productions), codon_range)
+        reachable = {productions[codon % len(productions)].count(DEP) for codon in range(codon_range)}
+        super().assertSetEqual({3, 5}, reachable)
+        super().assertGreater(productions.count(','.join([DEP] * 3)), productions.count(','.join([DEP] * 5)))
+
+    def test_full_match_grammar_uses_seen_lengths(self):
+        """ Tests that pattern productions only cover seen sample lengths when full match fitness is used """
+        samples = [self.nlp(u'Hi'), self.nlp(u'This is a test.'), self.nlp(u'This is a test!')]
+
+        self.config.fitness_function_type = FitnessType.FULL_MATCH
+        super().assertListEqual([T, ','.join([T] * 5)], bnf.dynamic_generator(samples)[P])
+
+        self.config.weight_pattern_lengths = True
+        super().assertListEqual([T, ','.join([T] * 5), ','.join([T] * 5)], bnf.dynamic_generator(samples)[P])
+
+        self.config.fitness_function_type = FitnessType.BASIC
+        super().assertEqual(5, len(bnf.dynamic_generator(samples)[P]))
+
     #
     # Helpers
     #
@@ -0,0 +1,104 @@
+""" Unit testing file for the execution checkpoints module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import os
+import tempfile
+import unittest
+
+from PatternOmatic.ge.checkpoint import Checkpoint
+from PatternOmatic.ge.stats import Stats
+from PatternOmatic.settings.config import Config
+
+
+class _FakePopulation(object):
+    """ Stands for a population, just taking snapshots of its state """
+
+    @staticmethod
+    def state() -> dict:
+        return {'generations_done': 5}
+
+
+class TestCheckpoint(unittest.TestCase):
+    """ Test class for the execution checkpoints """
+
+    directory = None
+    path = None
+
+    def test_save_and_load(self):
+        """ Tests that the execution state checkpointed is loaded back """
+        checkpoint = Checkpoint(self.path, 'key')
+        super().assertIsNone(checkpoint.load())
+
+        stats = Stats(Config().freeze())
+        stats.add_mbf(0.5)
+        checkpoint.save(stats, 1)
+
+        state = checkpoint.load()
+        super().assertEqual(1, state.run)
+        super().assertListEqual([0.5], state.stats.mbf_accumulator)
+        super().assertIsNone(state.population)
+
+        checkpoint.save(stats, 2, _FakePopulation())
+        state = checkpoint.load()
+        super().assertEqual(2, state.run)
+        super().assertDictEqual({'generations_done': 5}, state.population)
+
+        # Just the checkpoint itself is left behind
+        super().assertListEqual(['checkpoint.bin'], os.listdir(self.directory.name))
+
+    def test_other_execution_is_not_resumed(self):
+        """ Tests that checkpoints of another execution, or unreadable ones, are not loaded """
+        Checkpoint(self.path, 'key').save(Stats(Config().freeze()), 1)
+        super().assertIsNone(Checkpoint(self.path, 'other key').load())
+
+        with open(self.path, mode='wb') as f:
+            f.write(b'garbage')
+        super().assertIsNone(Checkpoint(self.path, 'key').load())
+
+    def test_key_of(self):
+        """ Tests that executions are keyed by their configuration """
+        config = Config().freeze()
+        super().assertEqual(Checkpoint.key_of([], config), Checkpoint.key_of([], config.replace()))
+        super().assertNotEqual(Checkpoint.key_of([], config), Checkpoint.key_of([], config.replace(max_runs=1)))
+
+    def test_remove(self):
+        """ Tests that removing a checkpoint twice does not fail """
+        checkpoint = Checkpoint(self.path, 'key')
+        checkpoint.save(Stats(Config().freeze()), 1)
+        checkpoint.remove()
+        checkpoint.remove()
+        super().assertFalse(os.path.exists(self.path))
+
+    #
+    # Helpers
+    #
+    def setUp(self) -> None:
+        """ Fresh checkpoint location """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'checkpoint.bin')
+
+    def tearDown(self) -> None:
+        """ Remove checkpoint location """
+        self.directory.cleanup()
+        Config.clear_instance()
+
+
+if __name__ == "__main__":
+    unittest.main()
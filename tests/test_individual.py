@@ -18,12 +18,17 @@ You should have received a copy of the GNU Lesser General Public License
 along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 
 """
+import os
+import tempfile
 import unittest
 import spacy
+from unittest import mock
 
+import PatternOmatic.ge.store as store
 from PatternOmatic.ge.stats import Stats
 from PatternOmatic.nlp.bnf import dynamic_generator as dgg
 from PatternOmatic.ge.individual import Individual, Fitness
+from PatternOmatic.nlp.samples import SampleSet
 from PatternOmatic.settings.config import Config
 from PatternOmatic.settings.literals import FitnessType, S, P, T, F, ORTH, TOKEN_WILDCARD, UNDERSCORE, IS_CURRENCY, \
     NOT_IN, ZERO_OR_MORE, OP, GTH, XPS, IN
@@ -87,6 +92,7 @@ class TestIndividual(unittest.TestCase):
         i = Individual(self.samples, self.grammar, self.stats, '01110101100101100110010110010101')
 
         super().assertEqual(i.fitness_value, 0.25)
+        super().assertEqual(1, bin(i.coverage).count('1'))
 
     def test_fitness_full_match(self):
         """ Fitness "full match" sets fitness """
@@ -96,6 +102,105 @@ class TestIndividual(unittest.TestCase):
 
         super().assertEqual(i.fitness_value, 0.25)
 
+    def test_fitness_of_deduplicated_samples(self):
+        """ Collapsed samples score the same as the samples they stand for """
+        samples = self.samples + [self.samples[0], self.samples[0], self.samples[1]]
+
+        for fitness_type in (FitnessType.BASIC, FitnessType.FULL_MATCH):
+            self.config.fitness_function_type = fitness_type
+            for fenotype in ([{'ORTH': 'I'}, {}, {}, {}, {}], [{'ORTH': 'a'}], [{'IS_ASCII': True}]):
+                expected = Fitness(self.config, samples, fenotype)()
+                super().assertEqual(expected, Fitness(self.config, SampleSet.deduplicated(samples), fenotype)())
+
+    def test_racing(self):
+        """ Just the individuals that could reach the bar are scored against every sample """
+        self.config.mutation_probability = 0.0
+        self.config.fitness_function_type = FitnessType.BASIC
+        self.config.racing_sample_size = 2
+        samples = SampleSet(self.samples)
+        stats = Stats()
+
+        dna = ['01110101100101100110010110010101',
+               '01101010100001101000110111000100',
+               '11111111111111111111111111111111']
+        expected = [Individual(samples, self.grammar, stats, d, self.config).fitness_value for d in dna]
+
+        # Nobody is left behind with a bar of zero
+        self.config.success_threshold = 0.0
+        stats = Stats()
+        individuals = [Individual(samples, self.grammar, stats, d, self.config, lazy=True) for d in dna]
+        Individual.evaluate_batch(individuals, elite=0.0)
+        super().assertListEqual(expected, [i.fitness_value for i in individuals])
+        super().assertEqual((3, 0), (stats.full_evaluations, stats.partial_evaluations))
+
+        # Nobody reaches an unreachable bar, so estimates are kept but the one of the best lower bound
+        self.config.success_threshold = 2.0
+        stats = Stats()
+        individuals = [Individual(samples, self.grammar, stats, d, self.config, lazy=True) for d in dna]
+        Individual.evaluate_batch(individuals, elite=2.0)
+        super().assertEqual(2, sum(i.partial for i in individuals))
+        super().assertEqual((1, 2), (stats.full_evaluations, stats.partial_evaluations))
+
+    def test_lazy_individual(self):
+        """ Lazy individuals are translated and scored on demand, twins taking after the first one, counting in AES """
+        self.config.mutation_probability = 0.0
+        self.config.fitness_function_type = FitnessType.BASIC
+        self.config.racing_sample_size = 0
+        stats = Stats()
+        dna = '01101010100001101000110111000100'
+
+        i = Individual(self.samples, self.grammar, stats, dna, self.config, lazy=True)
+        super().assertFalse(i.evaluated)
+        super().assertIsNone(i._fenotype)
+        super().assertEqual(0, stats.full_evaluations)
+
+        twins = [i, Individual(self.samples, self.grammar, stats, dna, self.config, lazy=True)]
+        Individual.evaluate_batch(twins)
+        super().assertTrue(all(twin.evaluated for twin in twins))
+        super().assertEqual(twins[0].fitness_value, twins[1].fitness_value)
+        super().assertListEqual(twins[0].fenotype, twins[1].fenotype)
+        super().assertEqual(1, stats.full_evaluations)
+        super().assertEqual(2, stats.aes_counter)
+
+        i = Individual(self.samples, self.grammar, stats, dna, self.config, lazy=True)
+        super().assertEqual(twins[0].fitness_value, i.fitness_value)
+        super().assertEqual(2, stats.full_evaluations)
+        super().assertEqual(3, stats.aes_counter)
+
+    def test_impossible_fenotype_is_rejected(self):
+        """ Fenotypes that can not match any sample score no contact without being matched """
+        self.config.fitness_function_type = FitnessType.BASIC
+        samples = SampleSet(self.samples)
+        _ = dgg(samples)
+
+        fitness = Fitness(self.config, samples, [{'ORTH': 'raccoon'}, {'ORTH': 'I'}])
+        super().assertEqual(0.0, fitness())
+        super().assertTrue(fitness.rejected)
+
+        fitness = Fitness(self.config, samples, [{'ORTH': 'a'}, {'ORTH': 'raccoon'}])
+        super().assertFalse(fitness.rejected)
+
+    def test_fitness_store_is_consulted(self):
+        """ Fenotypes already scored against the same samples are not matched again """
+        self.config.fitness_function_type = FitnessType.BASIC
+        samples = SampleSet(self.samples)
+        fenotype = [{'ORTH': 'a'}]
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.config.fitness_store_path = os.path.join(directory, 'fitness.db')
+
+            fitness = Fitness(self.config, samples, fenotype)
+            super().assertEqual(1.0, fitness())
+            super().assertEqual(0b1111, fitness.coverage)
+
+            with mock.patch('PatternOmatic.ge.individual.Matcher') as patch_matcher:
+                fitness = Fitness(self.config, samples, fenotype)
+                super().assertEqual(1.0, fitness())
+                super().assertEqual(0b1111, fitness.coverage)
+                super().assertFalse(patch_matcher.called)
+
+            store._STORES.pop(self.config.fitness_store_path).close()
+
     def test_token_wildcard_penalty(self):
         """ Checks that token wildcard penalty is properly set """
         # When using token wildcard, penalty is applied
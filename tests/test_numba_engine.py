@@ -0,0 +1,109 @@
+""" Unit testing file for the Numba compiled fitness engine module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import unittest
+import spacy
+from spacy.matcher import Matcher
+from unittest import mock
+
+import PatternOmatic.nlp.numba_engine as numba_engine
+from PatternOmatic.ge.individual import Fitness
+from PatternOmatic.nlp.samples import SampleSet
+from PatternOmatic.settings.config import Config
+from PatternOmatic.settings.literals import FitnessType, FitnessEngine
+
+
+class TestNumbaEngine(unittest.TestCase):
+    """ Test class for the Numba compiled fitness engine """
+
+    nlp = spacy.load('en_core_web_sm')
+    samples = SampleSet([nlp(u'I am a raccoon!'),
+                         nlp(u'You are a cat!'),
+                         nlp(u'Is she a rabbit?'),
+                         nlp(u'This is a test')])
+
+    fenotypes = [
+        [{'ORTH': 'a'}],
+        [{'ORTH': 'a'}, {}],
+        [{}, {}, {}, {}],
+        [{}, {}, {}, {}, {}],
+        [{'POS': 'DET'}, {'POS': 'NOUN'}, {'IS_PUNCT': True}],
+        [{'LOWER': 'is', 'IS_TITLE': True}, {}],
+        [{'LENGTH': 1}, {'SHAPE': 'xxxx'}],
+        [{'LENGTH': '1'}],
+        [{'ORTH': 'unseen'}],
+        [{'TAG': 'PRP'}, {'DEP': 'ROOT'}, {'DEP': 'det'}, {'POS': 'NOUN'}, {'IS_ASCII': True}]
+    ]
+
+    def test_compile_pattern(self):
+        """ Tests that patterns out of the engine scope are left to the Matcher """
+        super().assertIsNotNone(numba_engine.compile_pattern([{'ORTH': 'a'}, {}], self.samples.encoding))
+        super().assertIsNone(numba_engine.compile_pattern([{'ORTH': 'a', 'OP': '?'}], self.samples.encoding))
+        super().assertIsNone(numba_engine.compile_pattern([{'ORTH': {'IN': ['a']}}], self.samples.encoding))
+        super().assertIsNone(numba_engine.compile_pattern([{'_': {'CUSTOM_IS_OOV': True}}], self.samples.encoding))
+
+    def test_kernel_conforms_to_matcher(self):
+        """ Tests that the kernel (run as plain Python) covers the samples the Matcher does """
+        matrix, lengths = self.samples.encoding.arrays()
+
+        for fenotype in self.fenotypes:
+            attributes, codes = numba_engine.compile_pattern(fenotype, self.samples.encoding)
+            for full_match in (False, True):
+                covered = numba_engine._coverage(matrix, lengths, attributes, codes, full_match)
+                super().assertListEqual(self._matcher_coverage(fenotype, full_match), list(covered), fenotype)
+
+    @unittest.skipIf(numba_engine.njit is None, 'numba is not installed')
+    def test_compiled_kernel_conforms_to_matcher(self):
+        """ Tests that the compiled kernel covers the samples the Matcher does """
+        for fenotype in self.fenotypes:
+            for full_match in (False, True):
+                expected = sum(1 << i for i, hit in enumerate(self._matcher_coverage(fenotype, full_match)) if hit)
+                super().assertEqual(expected, numba_engine.coverage(fenotype, self.samples, full_match), fenotype)
+
+    def test_fitness_with_numba_engine(self):
+        """ Tests that fitness scores are the same, whether numba is installed or not """
+        config = Config()
+        config.fitness_function_type = FitnessType.BASIC
+
+        expected = Fitness(config, self.samples, self.fenotypes[4])()
+
+        config.fitness_engine = FitnessEngine.NUMBA
+        super().assertEqual(expected, Fitness(config, self.samples, self.fenotypes[4])())
+
+        with mock.patch.object(numba_engine, '_coverage_kernel', None):
+            super().assertEqual(expected, Fitness(config, self.samples, self.fenotypes[4])())
+
+    #
+    # Helpers
+    #
+    def _matcher_coverage(self, fenotype, full_match):
+        """ Samples covered by a pattern according to the Spacy's Matcher """
+        matcher = Matcher(self.samples[0].vocab)
+        matcher.add('conformance', None, fenotype)
+        return [any(not full_match or (start == 0 and end == len(sample)) for _, start, end in matcher(sample))
+                for sample in self.samples]
+
+    def tearDown(self) -> None:
+        """ Destroy Config instance """
+        Config.clear_instance()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,11 +20,14 @@ along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 """
 import unittest
 import spacy
+from threading import Event
 
 from PatternOmatic.ge.stats import Stats
 from PatternOmatic.nlp.bnf import dynamic_generator as dgg
-from PatternOmatic.ge.population import Population, Selection, Recombination, Replacement
+from PatternOmatic.ge.population import Population, Progress, Selection, Recombination, Replacement, \
+    spawn_generators
 from PatternOmatic.ge.individual import Individual
+from PatternOmatic.nlp.samples import SampleSet
 from PatternOmatic.settings.config import Config
 from PatternOmatic.settings.literals import FitnessType, SelectionType, RecombinationType, ReplacementType
 
@@ -146,6 +149,92 @@ class TestPopulation(BasePopulationTest):
         p.evolve()
         super().assertLessEqual(0.25, p.generation[0].fitness_value)
 
+    def test_evolve_reports_progress(self):
+        """ Tests that the progress of a run is reported once per generation """
+        self.config.max_generations = 3
+        stats = Stats()
+        reported = []
+
+        p = Population(self.samples, self.grammar, stats)
+        super().assertTrue(p.evolve(progress=reported.append))
+
+        super().assertListEqual([1, 2, 3], [progress.generation for progress in reported])
+        super().assertIsInstance(reported[0], Progress)
+        super().assertEqual(p.best_individual.fitness_value, reported[-1].best_fitness)
+        super().assertEqual(p.evaluations, reported[-1].evaluations)
+        super().assertLess(reported[0].evaluations, reported[-1].evaluations)
+
+    def test_evolve_iter(self):
+        """ Tests that a run can be consumed generation by generation, its stats being calculated once exhausted """
+        self.config.max_generations = 3
+        stats = Stats()
+
+        p = Population(self.samples, self.grammar, stats)
+        snapshots = p.evolve_iter()
+        snapshot = next(snapshots)
+
+        super().assertEqual(1, snapshot.generation)
+        super().assertEqual(p.best_individual.fenotype, snapshot.best_fenotype)
+        super().assertListEqual([], stats.mbf_accumulator)
+
+        super().assertEqual(2, len(list(snapshots)))
+        super().assertListEqual([p.best_individual.fitness_value], stats.mbf_accumulator)
+
+    def test_telemetry_is_recorded_when_enabled(self):
+        """ Tests that generations are recorded into the telemetry just if it is persisted """
+        self.config.max_generations = 3
+        stats = Stats()
+
+        Population(self.samples, self.grammar, stats).evolve()
+        super().assertListEqual([], stats.telemetry.columns()['generation'])
+
+        self.config.telemetry_path = 'test_telemetry_path_file.jsonl'
+        stats = Stats()
+
+        Population(self.samples, self.grammar, stats).evolve()
+        columns = stats.telemetry.columns()
+        super().assertListEqual([0, 1, 2], columns['generation'])
+        super().assertTrue(all(0.0 < diversity <= 1.0 for diversity in columns['fenotype_diversity']))
+
+    def test_evolve_stops_between_generations(self):
+        """ Tests that a stopped run does not evolve any further nor updates the run statistics """
+        self.config.max_generations = 3
+        stats = Stats()
+        stop = Event()
+        reported = []
+
+        def progress(snapshot: Progress) -> None:
+            reported.append(snapshot)
+            stop.set()
+
+        p = Population(self.samples, self.grammar, stats)
+        super().assertFalse(p.evolve(progress=progress, stop=stop))
+
+        super().assertEqual(1, len(reported))
+        super().assertListEqual([], stats.mbf_accumulator)
+
+    def test_best_challenge_scores_estimated_generations(self):
+        """ Tests that a generation just estimated by racing has its top individual fully scored to be the best one """
+        self.config.fitness_function_type = FitnessType.BASIC
+        p = Population(self.samples, self.grammar, Stats())
+        for individual in p.generation:
+            individual.keep_estimate(0.5)
+
+        p._best_challenge()
+        super().assertIsNotNone(p.best_individual)
+        super().assertFalse(p.best_individual.partial)
+
+    def test_evolve_racing_without_elitism(self):
+        """ Tests that racing offspring against the elite of their parents, that are then dropped, still evolves """
+        self.config.max_generations = 3
+        self.config.fitness_function_type = FitnessType.BASIC
+        self.config.replacement_type = ReplacementType.MU_LAMBDA_WITHOUT_ELITISM
+        self.config.racing_sample_size = 2
+        p = Population(SampleSet(self.samples), self.grammar, Stats())
+
+        super().assertTrue(p.evolve())
+        super().assertFalse(p.best_individual.partial)
+
     def test_best_challenge_changes_best_individual(self):
         """ Covers best challenge cases """
         self.config.mutation_probability = 0.0
@@ -176,6 +265,42 @@ class TestPopulation(BasePopulationTest):
 
         super().assertEqual(i2, p.best_individual)
 
+    def test_seeded_runs_are_reproducible(self):
+        """ Runs evolved with generators spawned from the same seed evolve the same way """
+        self.config.max_generations = 2
+        self.config.fitness_function_type = FitnessType.BASIC
+
+        evolved = []
+        for _ in range(2):
+            p = Population(self.samples, self.grammar, Stats(), rng=spawn_generators(42, 2)[1])
+            p.evolve()
+            evolved.append([i.bin_genotype for i in p.generation])
+
+        super().assertListEqual(evolved[0], evolved[1])
+
+        rngs = spawn_generators(42, 2)
+        super().assertNotEqual(rngs[0].random(), rngs[1].random())
+
+    def test_resumed_run_evolves_as_uninterrupted(self):
+        """ A run restored from a checkpointed state goes on evolving the same way it would have """
+        self.config.max_generations = 4
+        self.config.checkpoint_interval = 2
+        self.config.fitness_function_type = FitnessType.BASIC
+        states = []
+
+        p = Population(self.samples, self.grammar, Stats(), rng=spawn_generators(42, 1)[0],
+                       checkpoint=lambda population: states.append(population.state()))
+        p.evolve()
+        super().assertEqual(2, len(states))
+
+        resumed = Population(self.samples, self.grammar, Stats(), rng=spawn_generators(7, 1)[0])
+        resumed.restore(states[0])
+        super().assertEqual(2, resumed.generations_done)
+        resumed.evolve()
+
+        super().assertListEqual([i.bin_genotype for i in p.generation], [i.bin_genotype for i in resumed.generation])
+        super().assertEqual(p.best_individual.fitness_value, resumed.best_individual.fitness_value)
+
     def test_sr_update(self):
         """ Check SR is updated if a solution is found for the run """
         stats = Stats()
@@ -0,0 +1,113 @@
+""" Unit testing file for the regular expression fitness engine module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import unittest
+import spacy
+from spacy.matcher import Matcher
+from unittest import mock
+
+import PatternOmatic.nlp.regex_engine as regex_engine
+from PatternOmatic.ge.individual import Fitness
+from PatternOmatic.nlp.samples import SampleSet
+from PatternOmatic.settings.config import Config
+from PatternOmatic.settings.literals import FitnessType, FitnessEngine
+
+
+class TestRegexEngine(unittest.TestCase):
+    """ Test class for the regular expression fitness engine """
+
+    nlp = spacy.load('en_core_web_sm')
+    samples = SampleSet([nlp(u'I am a raccoon!'),
+                         nlp(u'You are a cat!'),
+                         nlp(u'Is she a rabbit?'),
+                         nlp(u'This is a test'),
+                         nlp(u'A cat, a cat and a cat.')])
+
+    fenotypes = [
+        [{'ORTH': 'a'}],
+        [{'ORTH': 'a'}, {}],
+        [{}, {}, {}, {}],
+        [{'POS': 'DET'}, {'POS': 'NOUN'}, {'IS_PUNCT': True}],
+        [{'LOWER': 'is', 'IS_TITLE': True}, {}],
+        [{'ORTH': 'unseen'}],
+        [{'ORTH': 'a', 'OP': '!'}, {'POS': 'NOUN'}],
+        [{'POS': 'DET', 'OP': '?'}, {'POS': 'NOUN'}, {'IS_PUNCT': True}],
+        [{'IS_ALPHA': True, 'OP': '+'}],
+        [{'IS_ALPHA': True, 'OP': '+'}, {'IS_PUNCT': True}],
+        [{}, {'OP': '*'}, {'ORTH': 'cat'}],
+        [{'ORTH': 'unseen', 'OP': '*'}, {'ORTH': 'a'}],
+        [{'ORTH': 'unseen', 'OP': '?'}],
+        [{'POS': {'IN': ['DET', 'NOUN']}}, {'POS': {'NOT_IN': ['PUNCT']}}],
+        [{'LENGTH': {'>=': 3}}, {'LENGTH': {'<': 2}}],
+        [{'LENGTH': {'==': 1}, 'OP': '+'}, {}]
+    ]
+
+    def test_compile_pattern(self):
+        """ Tests that patterns out of the engine scope are left to the Matcher """
+        super().assertIsNotNone(regex_engine.compile_pattern([{'ORTH': 'a', 'OP': '?'}, {}], self.samples.encoding))
+        super().assertIsNotNone(regex_engine.compile_pattern([{'ORTH': {'IN': ['a']}}], self.samples.encoding))
+        super().assertIsNone(regex_engine.compile_pattern([{'_': {'CUSTOM_IS_OOV': True}}], self.samples.encoding))
+        super().assertIsNone(regex_engine.compile_pattern([{'ORTH': {'REGEX': 'a'}}], self.samples.encoding))
+
+    def test_patterns_are_cached(self):
+        """ Tests that the regular expression of a pattern is compiled once """
+        regex_engine.coverage(self.fenotypes[6], self.samples, False)
+
+        with mock.patch.object(regex_engine, 'compile_pattern') as compile_pattern:
+            regex_engine.coverage(self.fenotypes[6], self.samples, True)
+            compile_pattern.assert_not_called()
+
+    def test_conforms_to_matcher(self):
+        """ Tests that the regular expressions cover the samples the Matcher does """
+        for fenotype in self.fenotypes:
+            for full_match in (False, True):
+                expected = sum(1 << i for i, hit in enumerate(self._matcher_coverage(fenotype, full_match)) if hit)
+                super().assertEqual(expected, regex_engine.coverage(fenotype, self.samples, full_match), fenotype)
+
+    def test_fitness_with_regex_engine(self):
+        """ Tests that fitness scores are the same as the ones scored with the Matcher """
+        config = Config()
+
+        for fitness_type in (FitnessType.BASIC, FitnessType.FULL_MATCH):
+            config.fitness_function_type = fitness_type
+            config.fitness_engine = FitnessEngine.MATCHER
+            expected = [Fitness(config, self.samples, fenotype)() for fenotype in self.fenotypes]
+
+            config.fitness_engine = FitnessEngine.REGEX
+            scored = [Fitness(config, self.samples, fenotype)() for fenotype in self.fenotypes]
+            super().assertListEqual(expected, scored)
+
+    #
+    # Helpers
+    #
+    def _matcher_coverage(self, fenotype, full_match):
+        """ Samples covered by a pattern according to the Spacy's Matcher """
+        matcher = Matcher(self.samples[0].vocab)
+        matcher.add('conformance', None, fenotype)
+        return [any(not full_match or (start == 0 and end == len(sample)) for _, start, end in matcher(sample))
+                for sample in self.samples]
+
+    def tearDown(self) -> None:
+        """ Destroy Config instance """
+        Config.clear_instance()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+""" Unit testing file for the execution reports module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import csv
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from PatternOmatic.ge.report import ReportWriter
+from PatternOmatic.settings.literals import ReportFormat
+
+
+def _write_records(path: str, worker: int) -> None:
+    """ Writes some records from another process """
+    writer = ReportWriter(path, ReportFormat.CSV)
+    for i in range(50):
+        writer.write([{'worker': worker, 'record': i}])
+        writer.flush()
+
+
+class TestReportWriter(unittest.TestCase):
+    """ Test class for the report writer """
+
+    directory = None
+    path = None
+
+    def test_json_lines(self):
+        """ Tests that records are written as valid JSON Lines once flushed """
+        writer = ReportWriter(self.path, ReportFormat.JSON)
+        writer.write([{'mbf': 0.5, 'most_fitted': {'fenotype': [{'ORTH': 'a'}]}}, {'mbf': None, 'most_fitted': None}])
+        super().assertFalse(os.path.exists(self.path))
+
+        writer.flush()
+        with open(self.path) as f:
+            super().assertListEqual([{'mbf': 0.5, 'most_fitted': {'fenotype': [{'ORTH': 'a'}]}},
+                                     {'mbf': None, 'most_fitted': None}], [json.loads(line) for line in f])
+
+    def test_csv_schema(self):
+        """ Tests that CSV files are headed by their schema just once, and rotated when the schema changes """
+        writer = ReportWriter(self.path, ReportFormat.CSV)
+        writer.write([{'run': 0, 'fitness': 0.5}])
+        writer.flush()
+        writer.write([{'run': 1, 'fitness': 0.25}])
+        writer.flush()
+
+        with open(self.path, newline='') as f:
+            super().assertListEqual([['run', 'fitness'], ['0', '0.5'], ['1', '0.25']], list(csv.reader(f)))
+
+        writer.write([{'run': 2, 'fitness': 1.0, 'elapsed': 0.1}])
+        writer.flush()
+
+        with open(self.path, newline='') as f:
+            super().assertListEqual([['run', 'fitness', 'elapsed'], ['2', '1.0', '0.1']], list(csv.reader(f)))
+        super().assertTrue(os.path.exists(self.path + '.1'))
+
+    def test_gzip(self):
+        """ Tests that every flush of a gzipped report appends a member, read back as a whole """
+        writer = ReportWriter(self.path, ReportFormat.CSV, compress=True)
+        for i in range(3):
+            writer.write([{'run': i}])
+            writer.flush()
+
+        with gzip.open(self.path, mode='rt', newline='') as f:
+            super().assertListEqual([['run'], ['0'], ['1'], ['2']], list(csv.reader(f)))
+
+    def test_rotation(self):
+        """ Tests that report files beyond their size limit are rotated, keeping just the newest backups """
+        writer = ReportWriter(self.path, ReportFormat.JSON, max_bytes=10, backups=2)
+        for i in range(4):
+            writer.write([{'run': i}])
+            writer.flush()
+
+        for path, run in ((self.path, 3), (self.path + '.1', 2), (self.path + '.2', 1)):
+            with open(path) as f:
+                super().assertListEqual([{'run': run}], [json.loads(line) for line in f])
+        super().assertFalse(os.path.exists(self.path + '.3'))
+
+    def test_concurrent_writers(self):
+        """ Tests that writers of several processes can share a report file """
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(_write_records, [self.path] * 4, range(4)))
+
+        with open(self.path, newline='') as f:
+            records = list(csv.DictReader(f))
+
+        super().assertEqual(200, len(records))
+        super().assertSetEqual({(str(w), str(i)) for w in range(4) for i in range(50)},
+                               {(r['worker'], r['record']) for r in records})
+
+    #
+    # Helpers
+    #
+    def setUp(self) -> None:
+        """ Fresh report location """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'report')
+
+    def tearDown(self) -> None:
+        """ Remove report location """
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
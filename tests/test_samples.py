@@ -0,0 +1,149 @@
+""" Unit testing file for Samples module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import unittest
+import spacy
+
+from PatternOmatic.nlp.samples import FeatureIndex, SampleSet, covered_samples, coverage_union, coverage_overlap
+
+
+class TestFeatureIndex(unittest.TestCase):
+    """ Test class for the samples feature co-occurrence index """
+
+    nlp = spacy.load('en_core_web_sm')
+    samples = [nlp(u'I am a raccoon!'), nlp(u'You are a cat!')]
+
+    def test_add(self):
+        """ Tests that every token owns a position and samples are separated by an unused position """
+        feature_index = FeatureIndex()
+        for sample in self.samples:
+            feature_index.add(sample)
+
+        super().assertEqual(12, feature_index.size)
+        super().assertEqual(0b11111011111, feature_index.positions)
+        super().assertEqual(0b00001000001, feature_index.starts)
+        super().assertEqual(0b10000010000, feature_index.ends)
+        super().assertEqual(0b00100000100, feature_index.postings[('ORTH', 'a')])
+
+    def test_is_feasible(self):
+        """ Tests that patterns are rejected only when no sample could match them """
+        feature_index = FeatureIndex()
+        for sample in self.samples:
+            feature_index.add(sample)
+
+        # Seen values, consecutive tokens
+        super().assertTrue(feature_index.is_feasible([{'LOWER': 'a'}, {'LOWER': 'cat'}]))
+        super().assertTrue(feature_index.is_feasible([{'ORTH': 'I'}, {}, {'ORTH': 'a'}]))
+
+        # Seen values that never occur together within a token
+        super().assertFalse(feature_index.is_feasible([{'LOWER': 'cat', 'ORTH': 'I'}]))
+
+        # Seen values that never occur one after the other
+        super().assertFalse(feature_index.is_feasible([{'LOWER': 'cat'}, {'LOWER': 'a'}]))
+
+        # Not across samples
+        super().assertFalse(feature_index.is_feasible([{'ORTH': '!'}, {'ORTH': 'You'}]))
+
+        # Unseen values
+        super().assertFalse(feature_index.is_feasible([{'ORTH': 'dog'}]))
+
+        # Full match anchors the pattern to the whole sample
+        super().assertTrue(feature_index.is_feasible([{}, {}, {}, {'ORTH': 'raccoon'}, {}], True))
+        super().assertFalse(feature_index.is_feasible([{}, {}, {'ORTH': 'raccoon'}, {}], True))
+        super().assertFalse(feature_index.is_feasible([{'ORTH': 'am'}, {}, {}, {}], True))
+
+        # Grammar operators and extended pattern syntax are not reasoned about
+        super().assertTrue(feature_index.is_feasible([{'ORTH': 'I'}, {'ORTH': 'dog', 'OP': '?'}, {'ORTH': 'dog'}]))
+        super().assertTrue(feature_index.is_feasible([{'ORTH': {'IN': ['dog']}}]))
+
+
+class TestSampleSet(unittest.TestCase):
+    """ Test class for sample sets """
+
+    nlp = spacy.load('en_core_web_sm')
+
+    def test_sample_set_is_a_list(self):
+        """ Tests that a sample set behaves as a list of Doc instances """
+        samples = SampleSet(self.nlp(text) for text in ['Hello world!', 'Goodbye world!'])
+
+        super().assertIsInstance(samples, list)
+        super().assertEqual(2, len(samples))
+        super().assertIsNone(samples.feature_index)
+
+    def test_encoding(self):
+        """ Tests that token attribute values are interned per attribute """
+        samples = SampleSet(self.nlp(text) for text in ['Hello world!', 'Goodbye world!'])
+        encoding = samples.encoding
+        orth = encoding.attributes['ORTH']
+
+        super().assertIs(encoding, samples.encoding)
+        super().assertEqual(encoding.tokens[0][1][orth], encoding.tokens[1][1][orth])
+        super().assertEqual(encoding.code('ORTH', 'world'), encoding.tokens[0][1][orth])
+        super().assertEqual(-2, encoding.code('ORTH', 'unseen'))
+
+        matrix, lengths = encoding.arrays()
+        super().assertListEqual([3, 3], list(lengths))
+        super().assertEqual((len(encoding.attributes), 2, 3), matrix.shape)
+
+    def test_digest(self):
+        """ Tests that sample sets holding the same samples, in the same order, share their digest """
+        texts = ['Hello world!', 'Goodbye world!']
+        samples = SampleSet(self.nlp(text) for text in texts)
+
+        super().assertEqual(samples.digest, SampleSet(self.nlp(text) for text in texts).digest)
+        super().assertNotEqual(samples.digest, SampleSet(self.nlp(text) for text in reversed(texts)).digest)
+
+    def test_deduplicated(self):
+        """ Tests that samples with the same token attributes are collapsed and weighted """
+        texts = ['Hello world!', 'Goodbye world!', 'Hello world!', 'Hello  world!']
+        samples = SampleSet.deduplicated(self.nlp(text) for text in texts)
+
+        super().assertEqual(2, len(samples))
+        super().assertEqual(4, samples.size)
+        super().assertListEqual([3, 1], samples.weights)
+        super().assertListEqual([[0, 2, 3], [1]], samples.origins)
+        super().assertEqual(0.5, samples.dedup_ratio)
+        super().assertEqual(0b1101, samples.expand_coverage(0b01))
+        super().assertNotEqual(samples.digest, SampleSet(samples).digest)
+        super().assertEqual(0.0, SampleSet(samples).dedup_ratio)
+
+
+class TestCoverage(unittest.TestCase):
+    """ Test class for coverage bitmap helpers """
+
+    def test_covered_samples(self):
+        """ Tests that bit i stands for the i-th sample """
+        super().assertListEqual([0, 2, 3], covered_samples(0b1101))
+        super().assertListEqual([], covered_samples(0))
+
+    def test_coverage_union(self):
+        """ Tests that the union covers the samples covered by any pattern """
+        super().assertEqual(0b1111, coverage_union([0b1001, 0b0110, 0b0010]))
+        super().assertEqual(0, coverage_union([]))
+
+    def test_coverage_overlap(self):
+        """ Tests the overlap between the coverage of two patterns """
+        super().assertAlmostEqual(1 / 3, coverage_overlap(0b0011, 0b0110))
+        super().assertEqual(1.0, coverage_overlap(0b0101, 0b0101))
+        super().assertEqual(0.0, coverage_overlap(0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -79,3 +79,70 @@ class TestPatternomaticScript(TestCase):
 
         output_signal = os.system('python ' + script_path + ' -s Hello -s Goodbye')
         super().assertEqual(0, output_signal)
+
+    def test_main_resume(self):
+        """ Checks that the resume flag is parsed and handed over to find_patterns """
+        with mock.patch('scripts.patternomatic.find_patterns', return_value=([], None)) as mock_find_patterns:
+            pom.main(['-s', 'Hello', 'world', '-s', 'Goodbye'])
+            _, kwargs = mock_find_patterns.call_args
+            super().assertEqual(['Hello world', 'Goodbye'], mock_find_patterns.call_args[0][0])
+            super().assertFalse(kwargs['resume'])
+
+            for flag in ('-r', '--resume'):
+                pom.main(['-s', 'Hello', flag])
+                _, kwargs = mock_find_patterns.call_args
+                super().assertTrue(kwargs['resume'])
+
+    def test_main_serve(self):
+        """ Checks that the serve subcommand parses its options and dispatches to serve """
+        with mock.patch('scripts.patternomatic.serve') as mock_serve, \
+                mock.patch('scripts.patternomatic.find_patterns') as mock_find_patterns:
+            pom.main(['serve'])
+            mock_serve.assert_called_once_with(host=pom.DEFAULT_HOST,
+                                               port=pom.DEFAULT_PORT,
+                                               spacy_language_model_name='en_core_web_sm',
+                                               configuration=None,
+                                               workers=1,
+                                               queue_size=pom.DEFAULT_QUEUE_SIZE)
+
+            mock_serve.reset_mock()
+            pom.main(['serve', '--host', '0.0.0.0', '-p', '8080', '-l', 'es_core_news_sm', '-c', self.config_file_path,
+                      '-w', '4', '-q', '16'])
+            mock_serve.assert_called_once_with(host='0.0.0.0',
+                                               port=8080,
+                                               spacy_language_model_name='es_core_news_sm',
+                                               configuration=self.config_file_path,
+                                               workers=4,
+                                               queue_size=16)
+            mock_find_patterns.assert_not_called()
+
+        # Wrong args
+        with mock.patch('scripts.patternomatic.serve') as mock_serve:
+            with super().assertRaises(SystemExit):
+                pom.main(['serve', '-p', 'not_a_port'])
+            mock_serve.assert_not_called()
+
+    def test_main_compact_store(self):
+        """ Checks that the compact-store subcommand compacts and closes the given fitness store """
+        with mock.patch('scripts.patternomatic.FitnessStore') as mock_store, \
+                mock.patch('scripts.patternomatic.find_patterns') as mock_find_patterns:
+            pom.main(['compact-store', 'fitness.db'])
+            mock_store.assert_called_once_with('fitness.db', 1000000)
+            mock_store.return_value.compact.assert_called_once_with()
+            mock_store.return_value.close.assert_called_once_with()
+
+            mock_store.reset_mock()
+            pom.main(['compact-store', 'fitness.db', '-m', '50'])
+            mock_store.assert_called_once_with('fitness.db', 50)
+            mock_find_patterns.assert_not_called()
+
+            # The store is closed even when compaction fails
+            mock_store.reset_mock()
+            mock_store.return_value.compact.side_effect = OSError('Mocked exception')
+            with super().assertRaises(OSError):
+                pom.main(['compact-store', 'fitness.db'])
+            mock_store.return_value.close.assert_called_once_with()
+
+        # Missing store path
+        with super().assertRaises(SystemExit):
+            pom.main(['compact-store'])
@@ -0,0 +1,117 @@
+""" Unit testing file for the population seeding module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import json
+import os
+import pickle
+import tempfile
+import unittest
+import numpy as np
+import spacy
+
+from PatternOmatic.ge.individual import Individual
+from PatternOmatic.ge.population import Population
+from PatternOmatic.ge.seeding import inverse_map, load_seeds, seed_genotypes
+from PatternOmatic.ge.stats import Stats
+from PatternOmatic.nlp.bnf import dynamic_generator as dgg
+from PatternOmatic.settings.config import Config
+
+
+class TestSeeding(unittest.TestCase):
+    """ Test class for the population seeding """
+    config = Config()
+
+    nlp = spacy.load("en_core_web_sm")
+
+    samples = [nlp(u'I am a raccoon!'),
+               nlp(u'You are a cat!'),
+               nlp(u'Is she a rabbit?'),
+               nlp(u'This is a test')]
+
+    grammar = dgg(samples)
+
+    stats = Stats()
+
+    directory = None
+
+    def test_inverse_map(self):
+        """ Patterns are mapped into genotypes translated back into the same patterns """
+        self.config.mutation_probability = 0.0
+
+        for dna in ('11111111111111111111111111111111', '01110101100101100110010110010101',
+                    '01101010100001101000110111000100'):
+            fenotype = Individual(self.samples, self.grammar, self.stats, dna, lazy=True).fenotype
+            genotype = inverse_map(fenotype, self.grammar, self.config)
+            mapped = Individual(self.samples, self.grammar, self.stats, genotype, lazy=True)
+            super().assertEqual(fenotype, mapped.fenotype)
+
+    def test_unknown_pattern_is_not_mapped(self):
+        """ Patterns the grammar can not derive are not mapped """
+        super().assertIsNone(inverse_map([{'ORTH': 'zebra'}], self.grammar, self.config))
+
+    def test_seeded_genesis(self):
+        """ The seeds of the seed file take up to the seed fraction of the first generation """
+        self.config.mutation_probability = 0.0
+        fenotype = Individual(self.samples, self.grammar, self.stats, '01110101100101100110010110010101',
+                              lazy=True).fenotype
+
+        self.config.seed_path = os.path.join(self.directory.name, 'seeds.json')
+        with open(self.config.seed_path, mode='w') as f:
+            json.dump([fenotype, '0' * self.config.dna_length, [{'ORTH': 'zebra'}], '01'], f)
+
+        super().assertEqual(2, len(seed_genotypes(self.grammar, self.config)))
+
+        self.config.seed_fraction = 1.0
+        p = Population(self.samples, self.grammar, self.stats)
+        super().assertEqual(fenotype, p.generation[0].fenotype)
+        super().assertEqual('0' * self.config.dna_length, p.generation[1].bin_genotype)
+        super().assertEqual(self.config.dna_length, len(p.generation))
+
+        self.config.seed_fraction = 0.0
+        p = Population(self.samples, self.grammar, self.stats)
+        super().assertNotEqual('0' * self.config.dna_length, p.generation[1].bin_genotype)
+
+    def test_checkpoint_seeds_must_be_allowed(self):
+        """ Checkpoints are unpickled as seed files just if allowed, else seed files are read just as JSON """
+        genotype = '01' * (self.config.dna_length // 2)
+        path = os.path.join(self.directory.name, 'checkpoint.pkl')
+        genotypes = np.packbits(np.frombuffer(genotype.encode('ascii'), dtype=np.uint8) - ord('0'))[np.newaxis]
+        with open(path, mode='wb') as f:
+            pickle.dump({'population': {'genotypes': genotypes}}, f)
+
+        super().assertListEqual([], load_seeds(path, self.config.dna_length))
+        super().assertListEqual([genotype], load_seeds(path, self.config.dna_length, checkpoint=True))
+
+    #
+    # Helpers
+    #
+    def setUp(self) -> None:
+        """ Fresh Config instance and seed file location """
+        self.config = Config()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        """ Destroy Config instance and remove seed file location """
+        Config.clear_instance()
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
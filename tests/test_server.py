@@ -0,0 +1,132 @@
+""" Unit testing file for the local HTTP job service module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import json
+import time
+import urllib.error
+import urllib.request
+from threading import Thread
+from unittest import TestCase, mock
+
+from PatternOmatic.api import Session
+from PatternOmatic.server import JobService, JobServer, DONE, CANCELLED
+from PatternOmatic.settings.config import Config
+
+
+class TestJobServer(TestCase):
+    """ Tests the job service through its HTTP interface, on localhost """
+
+    session = None
+    service = None
+    server = None
+
+    def test_job_lifecycle(self):
+        """ Checks that a job can be submitted, queried and its results fetched """
+        self.service.start()
+
+        status, job = self._request('POST', '/jobs', {'samples': ['Hello world!', 'Goodbye world!'],
+                                                      'config': {'max_runs': 2, 'hall_of_fame_size': 2}})
+        super().assertEqual(202, status)
+
+        job = self._wait_for(job['id'])
+        super().assertEqual(DONE, job['status'])
+
+        status, result = self._request('GET', f'/jobs/{job["id"]}/result')
+        super().assertEqual(200, status)
+        super().assertEqual(2, len(result['patterns']))
+        super().assertEqual(2, len(result['fitnesses']))
+
+    def test_bad_requests(self):
+        """ Checks that malformed jobs and unknown jobs are rejected """
+        super().assertEqual(400, self._request('POST', '/jobs', {'samples': []})[0])
+        super().assertEqual(400, self._request('POST', '/jobs', {'texts': ['Hello']})[0])
+        super().assertEqual(404, self._request('GET', '/jobs/unknown')[0])
+        super().assertEqual(404, self._request('DELETE', '/jobs/unknown')[0])
+
+    def test_file_overrides_are_rejected(self):
+        """ Checks that jobs can not override the files nor the logging of the server """
+        for key, value in (('checkpoint_path', '/tmp/victim'), ('report_path', '/tmp/victim'),
+                           ('telemetry_path', '/tmp/victim'), ('fitness_store_path', '/tmp/victim'),
+                           ('seed_path', '/tmp/victim'), ('seed_checkpoint', True), ('log_file', '/tmp/victim'),
+                           ('log_level', 'DEBUG'), ('file_path', '/tmp/victim')):
+            status, reply = self._request('POST', '/jobs', {'samples': ['Hello'], 'config': {key: value}})
+            super().assertEqual(400, status)
+            super().assertIn(key, reply['error'])
+
+        super().assertEqual(0, self.service._queue.qsize())
+        super().assertEqual(202, self._request('POST', '/jobs', {'samples': ['Hello'], 'config': {'max_runs': 1}})[0])
+
+    def test_backpressure(self):
+        """ Checks that jobs are refused with too many requests when the queue is full """
+        super().assertEqual(202, self._request('POST', '/jobs', {'samples': ['Hello world!']})[0])
+        super().assertEqual(202, self._request('POST', '/jobs', {'samples': ['Hello world!']})[0])
+        super().assertEqual(429, self._request('POST', '/jobs', {'samples': ['Hello world!']})[0])
+
+    def test_cancellation(self):
+        """ Checks that cancelled jobs are not run and have no results """
+        _, job = self._request('POST', '/jobs', {'samples': ['Hello world!']})
+
+        status, job = self._request('DELETE', f'/jobs/{job["id"]}')
+        super().assertEqual(202, status)
+        super().assertEqual(CANCELLED, job['status'])
+
+        with mock.patch.object(Session, '_find') as patch_find:
+            self.service.start()
+            self.service.close()
+            super().assertFalse(patch_find.called)
+
+        super().assertEqual(409, self._request('GET', f'/jobs/{job["id"]}/result')[0])
+
+    #
+    # Helpers
+    #
+    def _request(self, method: str, path: str, body: dict = None):
+        """ Sends a JSON request to the server, returns the response status and JSON body """
+        data = None if body is None else json.dumps(body).encode('utf-8')
+        request = urllib.request.Request(f'http://127.0.0.1:{self.server.server_port}{path}', data, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            return error.code, json.loads(error.read())
+
+    def _wait_for(self, job_id: str, timeout: float = 120.0) -> dict:
+        """ Polls a job until it is finished """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            _, job = self._request('GET', f'/jobs/{job_id}')
+            if job['status'] not in ('queued', 'running'):
+                return job
+            time.sleep(0.1)
+        super().fail(f'Job {job_id} did not finish in time')
+
+    def setUp(self) -> None:
+        """ Local job server listening on an ephemeral port, its dispatcher is started by the tests needing it """
+        self.session = Session('en_core_web_sm')
+        self.service = JobService(self.session, queue_size=2)
+        self.server = JobServer(self.service, port=0)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self) -> None:
+        """ Shuts the server down, destroys Config instance """
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+        Config.clear_instance()
@@ -19,10 +19,13 @@ along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 
 """
 import configparser
+import logging
 import os
+import pickle
 import unittest
 
-from PatternOmatic.settings.config import Config, RecombinationType
+from PatternOmatic.settings.config import Config, FrozenConfig, RecombinationType
+from PatternOmatic.settings.log import LOG, Abbreviated, configure as configure_log
 
 
 class TestConfig(unittest.TestCase):
@@ -122,6 +125,87 @@ class TestConfig(unittest.TestCase):
         super().assertEqual(
             {}, self.config._validate_config_argument(test_section, test_option_int, {}, config_parser))
 
+    def test_frozen_config_is_immutable(self):
+        """ Tests a frozen config holds the values of the Singleton by the time it was frozen and can not be updated """
+        frozen = self.config.freeze()
+        self.config.max_runs = 1
+
+        super().assertIsInstance(frozen, FrozenConfig)
+        super().assertNotEqual(1, frozen.max_runs)
+        with super().assertRaises(AttributeError):
+            frozen.max_runs = 1
+
+    def test_frozen_config_replace(self):
+        """ Tests overridden frozen configs are validated the same way the Config Singleton does """
+        frozen = self.config.freeze()
+
+        super().assertIs(frozen, frozen.replace())
+
+        replaced = frozen.replace(max_runs=2, codon_length=4, report_path=0, unknown_parameter=True)
+        super().assertEqual(2, replaced.max_runs)
+        super().assertEqual(4 * frozen.num_codons_per_individual, replaced.dna_length)
+        super().assertEqual(frozen.report_path, replaced.report_path)
+        super().assertNotEqual(2, frozen.max_runs)
+
+        replaced = frozen.replace(use_grammar_operators=True, use_extended_pattern_syntax=True)
+        super().assertEqual(False, replaced.use_extended_pattern_syntax)
+
+    def test_frozen_config_is_picklable(self):
+        """ Tests frozen configs can be sent to worker processes """
+        frozen = self.config.freeze(max_runs=3)
+        super().assertDictEqual(frozen.__dict__, pickle.loads(pickle.dumps(frozen)).__dict__)
+
+    def test_frozen_config_from_file(self):
+        """ Tests frozen configs can be read from a file without touching the Config Singleton """
+        file_path = os.path.join(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir), 'config.ini')
+        frozen = FrozenConfig.from_file(file_path)
+
+        super().assertEqual(file_path, frozen.file_path)
+        super().assertEqual(None, Config().file_path)
+
+    def test_hall_of_fame_size_is_at_least_one(self):
+        """ Tests hall of fame sizes below one fall back to the default one, wherever they are set """
+        default = self.config.hall_of_fame_size
+
+        self.config.hall_of_fame_size = 0
+        super().assertEqual(default, self.config.hall_of_fame_size)
+
+        self.config.hall_of_fame_size = 3
+        super().assertEqual(3, self.config.hall_of_fame_size)
+
+        frozen = self.config.freeze()
+        super().assertEqual(default, frozen.replace(hall_of_fame_size=-1).hall_of_fame_size)
+        super().assertEqual(1, frozen.replace(hall_of_fame_size=1).hall_of_fame_size)
+
+    def test_log_level_is_configurable(self):
+        """ Tests the logging level is set up on demand, not as a side effect of building or updating configs """
+        self.config.log_level = 'WARNING'
+        super().assertEqual(logging.INFO, LOG.level)
+
+        try:
+            configure_log(self.config.log_level, self.config.log_file)
+            super().assertEqual(logging.WARNING, LOG.level)
+
+            Config.clear_instance()
+            self.config = Config()
+            super().assertEqual(logging.WARNING, LOG.level)
+
+            configure_log('NOT_A_LEVEL', self.config.log_file)
+            super().assertEqual(logging.WARNING, LOG.level)
+        finally:
+            configure_log('INFO', self.config.log_file)
+
+        super().assertEqual(logging.INFO, LOG.level)
+
+    def test_log_payloads_are_abbreviated(self):
+        """ Tests large log payloads are abbreviated, counting the items left out """
+        super().assertEqual("['a', 'b']", str(Abbreviated(['a', 'b'])))
+
+        abbreviated = str(Abbreviated(list(range(1000)), limit=50))
+        super().assertTrue(abbreviated.startswith('[0, 1, 2'))
+        super().assertTrue(abbreviated.endswith('more)]'))
+        super().assertLessEqual(len(abbreviated), 50 + len('... (1000 more)]'))
+
     #
     # Helpers
     #
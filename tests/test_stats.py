@@ -18,11 +18,13 @@ You should have received a copy of the GNU Lesser General Public License
 along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
 
 """
+import csv
+import json
 import os
 from unittest import TestCase, mock
 
 from PatternOmatic.ge.individual import Individual
-from PatternOmatic.ge.stats import Stats
+from PatternOmatic.ge.stats import Stats, HallOfFame, PhaseTimer, Telemetry
 from PatternOmatic.settings.config import Config
 from PatternOmatic.settings.literals import ReportFormat
 
@@ -62,12 +64,105 @@ class TestStats(TestCase):
         self.stats.add_most_fitted(expected)
         super().assertListEqual([expected], self.stats.most_fitted_accumulator)
 
+    def test_hall_of_fame(self):
+        """ Hall of fame keeps the best distinct fenotypes, leaving estimates aside """
+        hall_of_fame = HallOfFame(3)
+
+        hall_of_fame.update([self._individual([{'ORTH': 'a'}], 0.5),
+                             self._individual([{'ORTH': 'b'}], 0.2),
+                             self._individual([{'ORTH': 'a'}], 0.5),
+                             self._individual([{'ORTH': 'c'}], 0.9, partial=True),
+                             self._individual([{'ORTH': 'd'}], 0.1)])
+        super().assertListEqual([[{'ORTH': 'a'}], [{'ORTH': 'b'}], [{'ORTH': 'd'}]],
+                                [i.fenotype for i in hall_of_fame])
+
+        # The worst one is evicted, so its fenotype can make it again
+        super().assertTrue(hall_of_fame.add(self._individual([{'ORTH': 'e'}], 0.7)))
+        super().assertFalse(hall_of_fame.add(self._individual([{'ORTH': 'f'}], 0.1)))
+        super().assertListEqual([0.7, 0.5, 0.2], [i.fitness_value for i in hall_of_fame])
+        super().assertSetEqual({'[{"ORTH": "a"}]', '[{"ORTH": "b"}]', '[{"ORTH": "e"}]'}, hall_of_fame.keys)
+
+        # Stats of runs evolved elsewhere are merged into the same bounded archive
+        other = Stats()
+        other.hall_of_fame.update([self._individual([{'ORTH': 'a'}], 0.5), self._individual([{'ORTH': 'g'}], 1.0)])
+        self.stats.hall_of_fame = hall_of_fame
+        self.stats.merge(other)
+        super().assertListEqual([1.0, 0.7, 0.5], [i.fitness_value for i in self.stats.hall_of_fame])
+
+    def test_phase_timer(self):
+        """ Nested phases are charged just their own time, and disabled timers time nothing """
+        timer = PhaseTimer(True)
+        with mock.patch('PatternOmatic.ge.stats.perf_counter', side_effect=[0.0, 1.0, 3.0, 4.0]):
+            with timer('fitness'):
+                with timer('translation'):
+                    pass
+
+        super().assertDictEqual({'fitness': (2.0, 1), 'translation': (2.0, 1)}, timer.take())
+        super().assertDictEqual({}, timer.take())
+
+        timer = PhaseTimer(False)
+        with timer('fitness'):
+            pass
+        super().assertDictEqual({}, timer.take())
+
+    def test_phase_metrics(self):
+        """ Phase times are aggregated per generation and per run, and reported just when profiling """
+        config = Config()
+        config.profile_phases = True
+        stats = Stats()
+
+        for run in ([{'fitness': (2.0, 4)}, {'fitness': (4.0, 4), 'selection': (1.0, 1)}], [{'fitness': (6.0, 4)}]):
+            stats.reset()
+            for generation in run:
+                stats.phases.seconds = {phase: seconds for phase, (seconds, _) in generation.items()}
+                stats.phases.counts = {phase: count for phase, (_, count) in generation.items()}
+                stats.add_phases()
+        stats.calculate_metrics()
+
+        super().assertDictEqual({'fitness': 6.0, 'selection': 0.5}, stats.phase_times)
+        super().assertDictEqual({'fitness': 6.0, 'selection': 0.5}, stats.phase_counts)
+        super().assertDictEqual({'fitness': 4.0, 'selection': 1 / 3}, stats.phase_generation_times)
+        super().assertEqual(stats.phase_times, dict(stats)['phase_times'])
+
+        config.profile_phases = False
+        super().assertNotIn('phase_times', dict(Stats()))
+
+    def test_telemetry(self):
+        """ Generations fill the preallocated series of their run, and just the ones evolved are exported """
+        telemetry = Telemetry(3)
+        telemetry.start_run()
+        telemetry.record(0, 0.5, 0.25, 1.0, 0.5, 10, 0, 0.1)
+        telemetry.record(1, 0.75, 0.5, 0.5, 0.5, 8, 2, 0.2)
+
+        other = Telemetry(3)
+        other.start_run()
+        other.record(0, 1.0, 0.5, 1.0, 1.0, 10, 0, 0.1)
+        telemetry.merge(other)
+
+        columns = telemetry.columns()
+        super().assertEqual(2, len(telemetry))
+        super().assertListEqual(['run', 'generation', *Telemetry.FIELDS], list(columns))
+        super().assertListEqual([0, 0, 1], columns['run'])
+        super().assertListEqual([0, 1, 0], columns['generation'])
+        super().assertListEqual([0.5, 0.75, 1.0], columns['best_fitness'])
+        super().assertListEqual([0.0, 2.0, 0.0], columns['cache_hits'])
+
+        records = list(telemetry.records('execution'))
+        super().assertEqual(3, len(records))
+        super().assertDictEqual({'execution': 'execution', **{k: v[-1] for k, v in columns.items()}}, records[-1])
+
     def test_sum_aes(self):
         """ Time counter works """
         self.stats.sum_aes(2)
         self.stats.sum_aes(2)
         super().assertEqual(4, self.stats.aes_counter,)
 
+    def test_sum_rejected(self):
+        """ Rejected fenotypes counter works """
+        self.stats.sum_rejected(1)
+        self.stats.sum_rejected(3)
+        super().assertEqual(4, self.stats.rejected)
+
     def test_reset(self):
         """ Reset stats method works """
         self.stats.aes_counter = 100
@@ -121,6 +216,10 @@ class TestStats(TestCase):
             'mbf': 0.5,
             'aes': 100,
             'mean_time': 4.5,
+            'rejected': 0,
+            'dedup_ratio': 0.0,
+            'full_evaluations': 0,
+            'partial_evaluations': 0,
             'most_fitted': None
         }
 
@@ -147,6 +246,7 @@ class TestStats(TestCase):
         super().assertEqual(f'Stats({repr(stats_dict)})', repr(stats))
 
     def test_persist(self):
+        """ Execution reports are appended as JSON Lines """
         config = Config()
         config.report_format = ReportFormat.JSON
         config.report_path = self.test_report_path_file
@@ -161,58 +261,52 @@ class TestStats(TestCase):
         self.stats.most_fitted_accumulator = [i]
         self.stats.persist()
 
-        with open(self.test_report_path_file, 'r') as persisted_report:
-            red_report = persisted_report.readlines()
-
-        super().assertEqual(str(dict(self.stats)) + '\n', red_report[0])
-
         # When a best individual has not been found
         self.stats.most_fitted_accumulator = []
         self.stats.persist()
 
         with open(self.test_report_path_file, 'r') as persisted_report:
-            red_report = persisted_report.readlines()
-
-        super().assertEqual(str(dict(self.stats)) + '\n', red_report[1])
-
-    def test_to_csv(self):
-        """ Test stats instance dict to csv conversion """
-        with mock.patch('PatternOmatic.ge.stats.time') as mock_time:
-            mock_time.return_value = .123
-            self.stats.aes = 10
-            self.stats.mbf = 0.5
-            self.stats.mean_time = 0.22
-            self.stats.success_rate = 0.5
+            red_report = [json.loads(line) for line in persisted_report]
 
-            # When a best individual has not been found
-            csv_stats = \
-                f'{.123}\t{self.stats.mbf}\t{self.stats.success_rate}\t{self.stats.aes}\t{self.stats.mean_time}\t' \
-                f'{None}\t'
+        super().assertEqual(2, len(red_report))
+        super().assertDictEqual({'bin_genotype': None, 'fenotype': None, 'fitness_value': 1.0},
+                                red_report[0]['most_fitted'])
+        super().assertDictEqual(dict(self.stats), {k: v for k, v in red_report[1].items() if k != 'timestamp'})
 
-            super().assertEqual(csv_stats, self.stats._to_csv())
-
-            # When a best individual has been found
-            i = object.__new__(Individual)
-            i.__setattr__(self.fitness_value_literal, 1.0)
-            self.stats.most_fitted_accumulator = [i]
-
-            csv_stats += f'{None}\t{i.fitness_value}\t'
-            super().assertEqual(csv_stats, self.stats._to_csv())
+    def test_persist_csv(self):
+        """ Execution reports are appended as CSV rows headed by their schema, nested values JSON encoded """
+        config = Config()
+        config.report_path = self.test_report_path_file
+        config.report_format = ReportFormat.CSV
 
-            # Also check csv is correctly persisted
-            config = Config()
-            config.report_path = self.test_report_path_file
-            config.report_format = ReportFormat.CSV
-            self.stats.persist()
+        i = object.__new__(Individual)
+        i.__setattr__(self.fitness_value_literal, 1.0)
+        self.stats.mbf = 0.5
+        self.stats.most_fitted_accumulator = [i]
+        self.stats.persist()
+        self.stats.persist()
 
-            with open(self.test_report_path_file, 'r') as persisted_report:
-                red_report = persisted_report.readlines()
+        with open(self.test_report_path_file, 'r', newline='') as persisted_report:
+            red_report = list(csv.DictReader(persisted_report))
 
-            super().assertEqual(csv_stats + '\n', red_report[0])
+        super().assertEqual(2, len(red_report))
+        super().assertListEqual(['timestamp', *dict(self.stats)], list(red_report[0]))
+        super().assertEqual('0.5', red_report[0]['mbf'])
+        super().assertEqual('', red_report[0]['aes'])
+        super().assertDictEqual(i.__dict__, json.loads(red_report[1]['most_fitted']))
 
     #
     # Helpers
     #
+    @staticmethod
+    def _individual(fenotype: list, fitness_value: float, partial: bool = False) -> Individual:
+        """ Evaluated individual standing for a fenotype """
+        individual = object.__new__(Individual)
+        individual.fenotype = fenotype
+        individual.fitness_value = fitness_value
+        individual.partial = partial
+        return individual
+
     def setUp(self) -> None:
         """ Fresh Stats instance """
         self.stats = Stats()
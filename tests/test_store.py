@@ -0,0 +1,94 @@
+""" Unit testing file for the persistent fitness store module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import os
+import tempfile
+import unittest
+
+from PatternOmatic.ge.store import FitnessStore
+
+
+class TestFitnessStore(unittest.TestCase):
+    """ Test class for the persistent fitness store """
+
+    directory = None
+    path = None
+
+    def test_put_and_get(self):
+        """ Tests that stored scores are found, either pending to be flushed or already written down """
+        fitness_store = FitnessStore(self.path)
+        key = FitnessStore.key('digest', 1, [{'ORTH': 'a'}])
+
+        super().assertIsNone(fitness_store.get(key))
+        fitness_store.put(key, 0.5, 0b101)
+        super().assertEqual((0.5, 0b101), fitness_store.get(key))
+        fitness_store.close()
+
+        fitness_store = FitnessStore(self.path)
+        super().assertEqual((0.5, 0b101), fitness_store.get(key))
+        super().assertIsNone(fitness_store.get(FitnessStore.key('digest', 0, [{'ORTH': 'a'}])))
+        fitness_store.close()
+
+    def test_key_is_canonical(self):
+        """ Tests that fenotypes differing just in their attributes order share their key """
+        super().assertEqual(FitnessStore.key('digest', 1, [{'ORTH': 'a', 'POS': 'DET'}]),
+                            FitnessStore.key('digest', 1, [{'POS': 'DET', 'ORTH': 'a'}]))
+
+    def test_size_limit(self):
+        """ Tests that the least recently used entries are evicted beyond the size limit """
+        fitness_store = FitnessStore(self.path, max_entries=2)
+        keys = [FitnessStore.key('digest', 1, [{'ORTH': str(i)}]) for i in range(3)]
+
+        fitness_store.put(keys[0], 0.0, 0)
+        fitness_store.put(keys[1], 0.0, 0)
+        fitness_store.flush()
+        fitness_store.put(keys[2], 0.0, 0)
+        fitness_store.flush()
+
+        super().assertEqual(2, len(fitness_store))
+        super().assertIsNone(fitness_store.get(keys[0]))
+        fitness_store.close()
+
+    def test_compact(self):
+        """ Tests that compaction applies a new size limit """
+        fitness_store = FitnessStore(self.path)
+        for i in range(10):
+            fitness_store.put(FitnessStore.key('digest', 1, [{'ORTH': str(i)}]), 0.0, 0)
+        fitness_store.close()
+
+        fitness_store = FitnessStore(self.path, max_entries=4)
+        super().assertDictEqual({'before': 10, 'after': 4}, fitness_store.compact())
+        fitness_store.close()
+
+    #
+    # Helpers
+    #
+    def setUp(self) -> None:
+        """ Fresh store location """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'fitness.db')
+
+    def tearDown(self) -> None:
+        """ Remove store location """
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
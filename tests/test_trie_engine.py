@@ -0,0 +1,112 @@
+""" Unit testing file for the shared prefix trie fitness engine module
+
+This file is part of PatternOmatic.
+
+Copyright © 2020  Miguel Revuelta Espinosa
+
+PatternOmatic is free software: you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+PatternOmatic is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with PatternOmatic. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import unittest
+import spacy
+from spacy.matcher import Matcher
+from unittest import mock
+
+import PatternOmatic.nlp.trie_engine as trie_engine
+from PatternOmatic.ge.individual import Fitness
+from PatternOmatic.nlp.samples import SampleSet
+from PatternOmatic.settings.config import Config
+from PatternOmatic.settings.literals import FitnessType, FitnessEngine
+
+
+class TestTrieEngine(unittest.TestCase):
+    """ Test class for the shared prefix trie fitness engine """
+
+    nlp = spacy.load('en_core_web_sm')
+    samples = SampleSet([nlp(u'I am a raccoon!'),
+                         nlp(u'You are a cat!'),
+                         nlp(u'Is she a rabbit?'),
+                         nlp(u'This is a test')])
+
+    fenotypes = [
+        [{'ORTH': 'a'}],
+        [{'ORTH': 'a'}, {}],
+        [{'ORTH': 'a'}, {'POS': 'NOUN'}],
+        [{'ORTH': 'a'}, {'POS': 'NOUN'}, {'IS_PUNCT': True}],
+        [{}, {}, {}, {}],
+        [{}, {}, {}, {}, {}],
+        [{'LOWER': 'is', 'IS_TITLE': True}, {}],
+        [{'LENGTH': 1}, {'SHAPE': 'xxxx'}],
+        [{'ORTH': 'unseen'}],
+        [{'TAG': 'PRP'}, {'DEP': 'ROOT'}, {'DEP': 'det'}, {'POS': 'NOUN'}, {'IS_ASCII': True}]
+    ]
+
+    def test_shared_prefixes(self):
+        """ Tests that patterns sharing their first token constraints share their trie path """
+        trie = trie_engine.PatternTrie()
+        for fenotype in self.fenotypes[:4] + self.fenotypes[:1]:
+            trie.insert(trie_engine.compile_pattern(fenotype, self.samples.encoding))
+
+        super().assertEqual(4, len(trie.patterns))
+        super().assertEqual(1, len(trie.root.children))
+        super().assertIsNone(trie_engine.compile_pattern([{'ORTH': 'a', 'OP': '?'}], self.samples.encoding))
+        super().assertIsNone(trie_engine.compile_pattern([{'ORTH': {'IN': ['a']}}], self.samples.encoding))
+
+    def test_conforms_to_matcher(self):
+        """ Tests that a batch walk and single pattern walks cover the samples the Matcher does """
+        for full_match in (False, True):
+            expected = [sum(1 << i for i, hit in enumerate(self._matcher_coverage(fenotype, full_match)) if hit)
+                        for fenotype in self.fenotypes]
+
+            self.samples.encoding.batch_coverages = dict()
+            super().assertListEqual(
+                expected, [trie_engine.coverage(fenotype, self.samples, full_match) for fenotype in self.fenotypes])
+
+            trie_engine.evaluate(self.fenotypes, self.samples, full_match)
+            with mock.patch.object(trie_engine.PatternTrie, 'coverages') as coverages:
+                super().assertListEqual(
+                    expected, [trie_engine.coverage(fenotype, self.samples, full_match) for fenotype in self.fenotypes])
+                coverages.assert_not_called()
+
+    def test_fitness_with_trie_engine(self):
+        """ Tests that fitness scores of a prepared batch are the same as the ones scored with the Matcher """
+        config = Config()
+
+        for fitness_type in (FitnessType.BASIC, FitnessType.FULL_MATCH):
+            config.fitness_function_type = fitness_type
+            config.fitness_engine = FitnessEngine.MATCHER
+            expected = [Fitness(config, self.samples, fenotype)() for fenotype in self.fenotypes]
+
+            config.fitness_engine = FitnessEngine.TRIE
+            Fitness.prepare(config, self.samples, self.fenotypes)
+            scored = [Fitness(config, self.samples, fenotype)() for fenotype in self.fenotypes]
+            super().assertListEqual(expected, scored)
+
+    #
+    # Helpers
+    #
+    def _matcher_coverage(self, fenotype, full_match):
+        """ Samples covered by a pattern according to the Spacy's Matcher """
+        matcher = Matcher(self.samples[0].vocab)
+        matcher.add('conformance', None, fenotype)
+        return [any(not full_match or (start == 0 and end == len(sample)) for _, start, end in matcher(sample))
+                for sample in self.samples]
+
+    def tearDown(self) -> None:
+        """ Destroy Config instance """
+        Config.clear_instance()
+
+
+if __name__ == "__main__":
+    unittest.main()